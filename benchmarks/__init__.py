@@ -0,0 +1,6 @@
+"""
+Benchmarking tools for the payroll system.
+
+Everything in here works against a scratch database created by
+benchmarks.datagen -- never against the live database.db.
+"""
@@ -0,0 +1,129 @@
+"""
+JSON API benchmark: integration calls against the HTML pages they replace.
+
+Reads, for a sample of --sample employees:
+
+    pages      GET /payroll/<id> once per employee (what scraping costs)
+    api        one GET /api/v1/employees?ids=... and one GET of their
+               payslips, plus a full walk of /api/v1/time-records for them
+
+and writes, --posts time records:
+
+    ingest     one POST /attendance/ingest per record (per-record commits)
+    bulk       one POST /api/v1/time-records with all of them
+
+A full export of every time record through the API (records per second,
+pages of --limit) is reported as well.
+
+Usage:
+    python -m benchmarks.bench_api --employees 5000 --sample 200 --posts 1000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+import models
+from benchmarks import datagen
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def _walk(client, url):
+    """GETs every page of an API list. Returns (records, pages)."""
+    records = pages = 0
+    cursor = None
+    while True:
+        body = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        records += len(body['data'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return records, pages
+
+
+def measure_reads(client, sample):
+    ids = ','.join(map(str, sample))
+    _, pages_ms = _timed(lambda: [client.get(f'/payroll/{emp_id}').get_data() for emp_id in sample])
+    (employees, payslips, (records, pages)), api_ms = _timed(lambda: (
+        client.get(f'/api/v1/employees?ids={ids}').get_json(),
+        client.get(f'/api/v1/payslips?employee_ids={ids}&limit=1000').get_json(),
+        _walk(client, f'/api/v1/time-records?employee_ids={ids}&limit=1000')))
+    return {'employees': len(sample), 'pages': len(sample), 'pages_ms': pages_ms,
+            'api_calls': 2 + pages, 'api_ms': api_ms, 'api_employees': len(employees['data']),
+            'api_time_records': records}
+
+
+def measure_writes(flask_app, client, emp_ids, posts):
+    day = date.today().replace(day=1).isoformat()
+    records = [{'employee_id': random.choice(emp_ids), 'date': day, 'hours_worked': 8.0, 'overtime_hours': 0.5}
+               for _ in range(posts)]
+    flask_app.config['TIME_INGEST_GROUP_COMMIT'] = False  # one request, one commit: the per-record path
+    statuses, ingest_ms = _timed(lambda: {client.post('/attendance/ingest', json=r).status_code for r in records})
+    response, bulk_ms = _timed(lambda: client.post('/api/v1/time-records', json=records))
+    return {'posts': posts, 'ingest_ms': ingest_ms, 'ingest_status': sorted(statuses),
+            'bulk_ms': bulk_ms, 'bulk_status': response.status_code}
+
+
+def measure_export(client, limit):
+    (records, pages), elapsed_ms = _timed(lambda: _walk(client, f'/api/v1/time-records?limit={limit}'))
+    return {'records': records, 'pages': pages, 'ms': elapsed_ms,
+            'records_per_s': round(records / (elapsed_ms / 1000)) if elapsed_ms else None}
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-api-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'api.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=args.days, seed=args.seed, users=0)
+        import app as web
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+        emp_ids = [emp.id for emp in models.get_employees()]
+        random.seed(args.seed)
+        sample = sorted(random.sample(emp_ids, min(args.sample, len(emp_ids))))
+        return {'employees': args.employees, 'reads': measure_reads(client, sample),
+                'writes': measure_writes(web.app, client, emp_ids, args.posts),
+                'export': measure_export(client, args.limit)}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare JSON API calls with the HTML pages and posts they replace.')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=20, help='Time records per employee')
+    parser.add_argument('--sample', type=int, default=200, help='Employees read page by page vs in bulk')
+    parser.add_argument('--posts', type=int, default=1000, help='Time records written')
+    parser.add_argument('--limit', type=int, default=1000, help='Page size of the full export')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    reads, writes, export = report['reads'], report['writes'], report['export']
+    print(f"read {reads['employees']} employees: {reads['pages']} pages in {reads['pages_ms']} ms, "
+          f"{reads['api_calls']} API calls in {reads['api_ms']} ms ({reads['api_time_records']} time records)")
+    print(f"write {writes['posts']} time records: {writes['posts']} ingest posts in {writes['ingest_ms']} ms, "
+          f"1 bulk post in {writes['bulk_ms']} ms")
+    print(f"export every time record: {export['records']} in {export['pages']} pages, {export['ms']} ms "
+          f"({export['records_per_s']}/s)")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Audit log overhead benchmark.
+
+Edits employees (models.update_employee) in a loop on a scratch database,
+once per audit mode, and reports the latency of a single edit:
+
+    off          auditing disabled: the edit alone
+    buffered     the shipped AuditBuffer, flushed in batches by its thread
+    synchronous  every entry written in its own transaction right away
+
+    p50_ms / p99_ms   per-edit latency; overhead_pct is p50 against `off`
+
+Usage:
+    python -m benchmarks.bench_audit --edits 3000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from benchmarks.loadtest import percentile
+
+
+def _edit(employee, salary):
+    models.update_employee(employee.id, employee.name, employee.position, employee.department, salary,
+                           employee.payroll_period, employee.date_hired, employee.photo, employee.hourly_rate,
+                           employee.contact_number, employee.address, employee.bank_account_number,
+                           employee.sss_number, employee.philhealth_number, employee.pagibig_number,
+                           employee.tin_number)
+
+
+def _synchronous(table_name, record_id, action, before, after):
+    models.audit_buffer.record(table_name, record_id, action, before, after)
+    models.audit_buffer.flush()
+
+
+AUDIT_MODES = {
+    'off': lambda *entry: None,
+    'buffered': models._audit,
+    'synchronous': _synchronous,
+}
+
+
+def measure(mode, employees, edits):
+    """Per-edit latencies, in seconds, of `edits` edits with auditing in `mode`."""
+    original = models._audit
+    models._audit = AUDIT_MODES[mode]
+    latencies = []
+    try:
+        for i in range(edits):
+            employee = employees[i % len(employees)]
+            started = time.perf_counter()
+            _edit(employee, 20000.0 + i)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        models._audit = original
+        models.flush_audit()
+    return latencies
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-audit-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'audit.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        models.init_db()
+        employees = models.get_employees()
+        measure('off', employees, min(args.edits, 200))  # warm up
+        # Modes take turns, so the database and its WAL growing over the run weigh on each alike
+        latencies = {mode: [] for mode in AUDIT_MODES}
+        for _ in range(args.rounds):
+            for mode in AUDIT_MODES:
+                latencies[mode] += measure(mode, employees, args.edits // args.rounds)
+        results = []
+        for mode, values in latencies.items():
+            values.sort()
+            results.append({'mode': mode, 'p50_ms': round(percentile(values, 50) * 1000, 3),
+                            'p99_ms': round(percentile(values, 99) * 1000, 3)})
+        baseline = results[0]['p50_ms']
+        for r in results:
+            r['overhead_pct'] = round((r['p50_ms'] - baseline) * 100 / baseline, 1)
+        return {'employees': args.employees, 'edits': args.edits, 'results': results}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cost of auditing employee edits.')
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--edits', type=int, default=3000, help='Edits per mode')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{'mode':<13}{'p50_ms':>9}{'p99_ms':>9}{'overhead':>10}")
+    for r in report['results']:
+        print(f"{r['mode']:<13}{r['p50_ms']:>9}{r['p99_ms']:>9}{r['overhead_pct']:>9}%")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
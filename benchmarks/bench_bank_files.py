@@ -0,0 +1,97 @@
+"""
+Bank payroll-credit file benchmark.
+
+Fills a scratch database with one committed payslip per employee for a
+period, then writes the bank file for that period in each format:
+
+    seconds     wall time to produce the whole file
+    rows_per_s  credits written per second
+    bytes       file size
+    peak_bytes  peak memory traced by tracemalloc while writing (a second, untimed run)
+
+Usage:
+    python -m benchmarks.bench_bank_files --employees 100000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import models
+from benchmarks import datagen
+from services import bank_files
+
+PERIOD = ('2030-01-01', '2030-01-31')
+
+
+def _committed_payslips(period_start, period_end):
+    conn = models.get_db_connection()
+    conn.execute('''
+        INSERT INTO payslips (employee_id, pay_period_start, pay_period_end, net_pay, net_pay_centavos)
+        SELECT id, ?, ?, 0, 1000000 + abs(random()) % 4000000 FROM employees
+    ''', (period_start, period_end))
+    conn.commit()
+    conn.close()
+
+
+def _write(format_name):
+    totals = bank_files.ControlTotals()
+    size = 0
+    for line in bank_files.generate(format_name, *PERIOD, totals):
+        size += len(line)
+    return totals, size
+
+
+def measure(format_name):
+    gc.collect()
+    started = time.perf_counter()
+    totals, size = _write(format_name)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    _write(format_name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'format': format_name, 'credits': totals.count, 'skipped': totals.skipped,
+            'seconds': round(elapsed, 3), 'rows_per_s': round(totals.count / elapsed),
+            'bytes': size, 'peak_bytes': peak}
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-bank-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'bank.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        _committed_payslips(*PERIOD)
+        return {'employees': args.employees, 'results': [measure(name) for name in sorted(bank_files.FORMATS)]}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure bank credit file generation.')
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{'format':<8}{'credits':>9}{'seconds':>9}{'rows/s':>10}{'bytes':>12}{'peak_KB':>9}")
+    for r in report['results']:
+        print(f"{r['format']:<8}{r['credits']:>9}{r['seconds']:>9}{r['rows_per_s']:>10}{r['bytes']:>12}"
+              f"{r['peak_bytes'] / 1e3:>9.1f}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
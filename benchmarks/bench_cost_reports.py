@@ -0,0 +1,139 @@
+"""
+Payroll cost report benchmark: a department by month pivot over --months
+months of payslips (one per employee per month, ending with the current
+month), through the payroll_costs cache (services.cost_reports) and
+straight from the payslips:
+
+    sql_ms      the pivot as one GROUP BY over every payslip, joined to
+                employees, with the LAG window on top (no cache)
+    cold_ms     the first report: every month built into payroll_costs
+    warm_ms     the report again with nothing changed
+    open_ms     the report after a payslip is added to the open month,
+                which is the only month rebuilt
+    page_ms     GET /reports for the same range, warm, without ETags
+
+Usage:
+    python -m benchmarks.bench_cost_reports --employees 5000 --months 24
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from services import cost_reports, remittances
+
+RUNS = 5
+
+SQL_PIVOT = '''
+    WITH monthly AS (
+        SELECT COALESCE(e.department, 'Unassigned') AS department, substr(p.pay_period_end, 1, 7) AS month,
+               SUM(p.gross_pay_centavos) AS amount
+        FROM payslips p LEFT JOIN employees e ON e.id = p.employee_id
+        WHERE p.pay_period_end >= ? AND p.pay_period_end < ?
+        GROUP BY 1, 2
+    )
+    SELECT *, LAG(amount) OVER (PARTITION BY department ORDER BY month) FROM monthly
+'''
+
+
+def _payslip_history(first_month, last_month):
+    conn = models.get_db_connection()
+    for month in cost_reports.months_between(first_month, last_month):
+        conn.execute('''
+            INSERT INTO payslips (employee_id, pay_period_start, pay_period_end, gross_pay_centavos,
+                                  sss_centavos, philhealth_centavos, pagibig_centavos, tax_centavos,
+                                  total_deductions_centavos, net_pay_centavos)
+            SELECT id, ?, ?, 2000000 + abs(random()) % 3000000, 90000, 50000, 20000,
+                   abs(random()) % 400000, 0, 1500000 + abs(random()) % 2500000
+            FROM employees
+        ''', remittances.month_bounds(month))
+    conn.commit()
+    conn.close()
+
+
+def _timed_ms(func):
+    started = time.perf_counter()
+    func()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _median_ms(func):
+    return statistics.median(_timed_ms(func) for _ in range(RUNS))
+
+
+def _sql(first_month, last_month):
+    conn = models.get_db_connection()
+    conn.cursor().execute(SQL_PIVOT, (f'{first_month}-01', f'{last_month}-32')).fetchall()
+    conn.close()
+
+
+def _add_open_payslip(last_month):
+    conn = models.get_db_connection()
+    conn.execute('''
+        INSERT INTO payslips (employee_id, pay_period_start, pay_period_end, gross_pay_centavos, net_pay_centavos)
+        SELECT MIN(id), ?, ?, 100000, 90000 FROM employees
+    ''', remittances.month_bounds(last_month))
+    conn.commit()
+    conn.close()
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-costs-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'costs.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        models.init_db()
+        last_month = cost_reports.default_range()[1]
+        first_month = cost_reports.add_months(last_month, 1 - args.months)
+        _payslip_history(first_month, last_month)
+
+        def report():
+            return cost_reports.pivot('department', first_month, last_month)
+
+        sql_ms = _median_ms(lambda: _sql(first_month, last_month))
+        cold_ms = _timed_ms(report)
+        warm_ms = _median_ms(report)
+        _add_open_payslip(last_month)
+        open_ms = _timed_ms(report)
+
+        import app as web
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+        url = f'/reports?by=department&start={first_month}&end={last_month}'
+        client.get(url)
+        page_ms = _median_ms(lambda: client.get(url).get_data())
+        return {'employees': args.employees, 'months': args.months, 'payslips': args.employees * args.months + 1,
+                'departments': len(report()['rows']), 'sql_ms': sql_ms, 'cold_ms': cold_ms, 'warm_ms': warm_ms,
+                'open_ms': open_ms, 'page_ms': page_ms}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cached department by month payroll cost pivot.')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{report['payslips']} payslips over {report['months']} months, {report['departments']} departments")
+    print(f"uncached GROUP BY {report['sql_ms']} ms; cached report: cold {report['cold_ms']} ms, "
+          f"warm {report['warm_ms']} ms, open month changed {report['open_ms']} ms; page {report['page_ms']} ms")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
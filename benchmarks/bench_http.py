@@ -0,0 +1,89 @@
+"""
+Compression and conditional-GET benchmark for the large pages and exports.
+
+For each path, GETs it once per Accept-Encoding and then revalidates with
+the ETag it was given:
+
+    bytes       body size as sent, per coding (identity, gzip, br)
+    full_ms     time for the full 200 response, per coding
+    reload_ms   time for an unchanged reload (If-None-Match -> 304)
+
+Usage:
+    python -m benchmarks.bench_http --employees 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from services import compression
+
+PATHS = ('/employees', '/export/csv', '/leave')
+
+
+def _get(client, path, headers):
+    started = time.perf_counter()
+    response = client.get(path, headers=headers)
+    data = response.get_data()
+    elapsed = time.perf_counter() - started
+    return response, len(data), elapsed
+
+
+def measure(client, path):
+    codings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+    result = {'path': path}
+    for coding in codings:
+        headers = {'Accept-Encoding': coding}
+        response, size, elapsed = _get(client, path, headers)
+        result[coding] = {'status': response.status_code, 'bytes': size, 'full_ms': round(elapsed * 1000, 1)}
+        etag = response.headers.get('ETag')
+        if etag:
+            reload, _, elapsed = _get(client, path, {**headers, 'If-None-Match': etag})
+            result[coding].update(reload_status=reload.status_code, reload_ms=round(elapsed * 1000, 2))
+    return result
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-http-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'http.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=args.days, seed=args.seed, users=0)
+        import app as web
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+        return {'employees': args.employees, 'results': [measure(client, path) for path in PATHS]}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure response compression and 304 revalidation.')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=5, help='Time records per employee')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{'path':<14}{'coding':<10}{'bytes':>12}{'full_ms':>10}{'reload':>8}{'reload_ms':>11}")
+    for r in report['results']:
+        for coding in ('identity', 'gzip', 'br'):
+            if coding in r:
+                c = r[coding]
+                print(f"{r['path']:<14}{coding:<10}{c['bytes']:>12}{c['full_ms']:>10}"
+                      f"{c.get('reload_status', '-'):>8}{c.get('reload_ms', '-'):>11}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
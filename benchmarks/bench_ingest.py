@@ -0,0 +1,145 @@
+"""
+Time-record ingestion benchmark: shift start at the clock-in terminals.
+
+Starts N concurrent posters at once, each POSTing time records to
+/attendance/ingest through the WSGI app, and reports throughput and latency
+percentiles for two write paths:
+
+    per-record    every post commits its own transaction (models.add_time_record)
+    group-commit  posts are batched by services/time_ingest.py
+
+A post counts as done when the endpoint answers, which for both paths is
+after the durable commit.
+
+Usage:
+    python -m benchmarks.bench_ingest --posters 100,1000 --posts 5
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import models
+from benchmarks import datagen
+from benchmarks.loadtest import percentile
+from services import time_ingest
+
+MODES = ('per-record', 'group-commit')
+
+
+def _login_cookie(flask_app):
+    """Logs in once and returns the session cookie, so posters skip password hashing."""
+    client = flask_app.test_client()
+    client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+    return client.get_cookie('session').value
+
+
+def run_case(flask_app, mode, posters, posts, emp_ids, cookie):
+    flask_app.config['TIME_INGEST_GROUP_COMMIT'] = mode == 'group-commit'
+    writer = time_ingest.get_writer()
+    batches_before = writer.batches
+    latencies = []  # list.append is atomic, so threads share it without a lock
+    errors = []
+    start_line = threading.Barrier(posters + 1)
+
+    def poster(index):
+        client = flask_app.test_client()
+        client.set_cookie('session', cookie)
+        emp_id = emp_ids[index % len(emp_ids)]
+        start_line.wait()
+        for i in range(posts):
+            payload = {'employee_id': emp_id, 'date': f'2030-01-{i % 28 + 1:02d}',
+                       'hours_worked': 8.0, 'overtime_hours': 0.5}
+            started = time.perf_counter()
+            response = client.post('/attendance/ingest', json=payload)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 201:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=poster, args=(i,), daemon=True) for i in range(posters)]
+    for thread in threads:
+        thread.start()
+    start_line.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'posters': posters,
+        'posts': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'commits': len(latencies) - len(errors) if mode == 'per-record' else writer.batches - batches_before,
+    }
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-ingest-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'ingest.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        import app as web
+        cookie = _login_cookie(web.app)
+        emp_ids = [emp.id for emp in models.get_employees()]
+        results = []
+        for posters in args.posters:
+            for mode in args.modes:
+                print(f'[{posters} posters] {mode}...', file=sys.stderr)
+                results.append(run_case(web.app, mode, posters, args.posts, emp_ids, cookie))
+        web.app.config['TIME_INGEST_GROUP_COMMIT'] = True
+        time_ingest.get_writer().close()
+        time_ingest._writer = None
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return {'posts_per_poster': args.posts, 'flush_interval_s': time_ingest.FLUSH_INTERVAL,
+            'max_batch': time_ingest.MAX_BATCH, 'results': results}
+
+
+def print_report(report, stream=sys.stdout):
+    print(f"{'posters':>8}  {'mode':<13}{'posts':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'commits':>9}", file=stream)
+    for r in report['results']:
+        print(f"{r['posters']:>8}  {r['mode']:<13}{r['posts']:>7}{r['errors']:>5}{r['throughput_rps']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['commits']:>9}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark time-record ingestion under concurrent posters.')
+    parser.add_argument('--posters', default='100,1000', help='Comma-separated poster counts (default: %(default)s)')
+    parser.add_argument('--posts', type=int, default=5, help='Records each poster sends')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated write paths (default: %(default)s)')
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+    args.posters = [int(p) for p in args.posters.split(',') if p.strip()]
+    args.modes = [m for m in args.modes.split(',') if m.strip()]
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f'unknown modes: {", ".join(sorted(unknown))}')
+
+    report = run(args)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    # Lock timeouts on the per-record path are what this measures; only group-commit failures are errors
+    return 1 if any(r['errors'] for r in report['results'] if r['mode'] == 'group-commit') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
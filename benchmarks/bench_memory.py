@@ -0,0 +1,91 @@
+"""
+Memory benchmark for the roster pages.
+
+Measures, with tracemalloc:
+
+    route_employees   peak bytes allocated while rendering GET /employees
+    roster_records    bytes and allocated blocks still held by the roster
+                      records the route builds (employees plus payroll results)
+
+Usage:
+    python -m benchmarks.bench_memory --employees 50000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+import models
+import utils
+from benchmarks import datagen
+from benchmarks.suite import current_period
+
+
+def measure_route(client):
+    gc.collect()
+    tracemalloc.start()
+    response = client.get('/employees')
+    response.get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return {'status': response.status_code, 'peak_bytes': peak}
+
+
+def measure_records():
+    start, end = current_period()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    employees = models.get_employees()
+    payrolls = utils.calculate_payroll_batch(employees, start, end)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    held = {'bytes': sum(stat.size_diff for stat in diff), 'blocks': sum(stat.count_diff for stat in diff)}
+    held['bytes_per_employee'] = round(held['bytes'] / max(len(employees), 1), 1)
+    del employees, payrolls
+    return held
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-memory-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'memory.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=args.days, seed=args.seed, users=0)
+        import app as web
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+        return {
+            'employees': args.employees,
+            'route_employees': measure_route(client),
+            'roster_records': measure_records(),
+        }
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure memory used by the roster pages.')
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--days', type=int, default=5, help='Time records per employee')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
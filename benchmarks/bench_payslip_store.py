@@ -0,0 +1,132 @@
+"""
+Payslip history analytics benchmark: SQL GROUP BY against the columnar store.
+
+Fills a scratch database with one payslip per employee per month for
+several years, builds the columnar store (services.payslip_store), then
+runs each aggregation both ways:
+
+    sql_ms     the same totals as one GROUP BY over payslips (joined to employees)
+    store_ms   from the memory-mapped .npy partitions
+    sync_s     building every partition; sync_noop_ms a sync with nothing to do
+
+Usage:
+    python -m benchmarks.bench_payslip_store --employees 5000 --years 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from services import payslip_store, remittances
+
+FIRST_YEAR = 2020
+COLUMNS = ('gross_pay_centavos', 'net_pay_centavos')
+RUNS = 5
+
+SQL_QUERIES = {
+    'by_year': '''
+        SELECT substr(pay_period_start, 1, 4), COUNT(*), SUM(gross_pay_centavos), SUM(net_pay_centavos)
+        FROM payslips GROUP BY 1
+    ''',
+    'by_period': '''
+        SELECT pay_period_start, COUNT(*), SUM(gross_pay_centavos), SUM(net_pay_centavos)
+        FROM payslips GROUP BY pay_period_start, pay_period_end
+    ''',
+    'by_department': '''
+        SELECT e.department, COUNT(*), SUM(p.gross_pay_centavos), SUM(p.net_pay_centavos)
+        FROM payslips p JOIN employees e ON e.id = p.employee_id GROUP BY e.department
+    ''',
+}
+
+STORE_QUERIES = {
+    'by_year': payslip_store.totals_by_year,
+    'by_period': payslip_store.totals_by_period,
+    'by_department': payslip_store.totals_by_department,
+}
+
+
+def _payslip_history(years):
+    conn = models.get_db_connection()
+    for year in range(FIRST_YEAR, FIRST_YEAR + years):
+        for month in range(1, 13):
+            start, end = remittances.month_bounds(f'{year}-{month:02d}')
+            conn.execute('''
+                INSERT INTO payslips (employee_id, pay_period_start, pay_period_end, gross_pay_centavos,
+                                      sss_centavos, philhealth_centavos, pagibig_centavos, tax_centavos,
+                                      total_deductions_centavos, net_pay_centavos)
+                SELECT id, ?, ?, 2000000 + abs(random()) % 3000000, 90000, 50000, 20000,
+                       abs(random()) % 400000, 0, 1500000 + abs(random()) % 2500000
+                FROM employees
+            ''', (start, end))
+    conn.commit()
+    conn.close()
+
+
+def _median_ms(func):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def _sql(query):
+    conn = models.get_db_connection()
+    conn.cursor().execute(query).fetchall()
+    conn.close()
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-store-')
+    original_database = models.DATABASE
+    original_folder = payslip_store.STORE_FOLDER
+    models.DATABASE = os.path.join(temp_dir, 'store.db')
+    payslip_store.STORE_FOLDER = os.path.join(temp_dir, 'payslip_store')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        models.init_db()
+        _payslip_history(args.years)
+        started = time.perf_counter()
+        payslip_store.sync()
+        sync_s = time.perf_counter() - started
+        results = [{'query': name, 'sql_ms': _median_ms(lambda: _sql(SQL_QUERIES[name])),
+                    'store_ms': _median_ms(lambda: STORE_QUERIES[name](COLUMNS))} for name in SQL_QUERIES]
+        return {'employees': args.employees, 'payslips': args.employees * 12 * args.years,
+                'sync_s': round(sync_s, 2), 'sync_noop_ms': _median_ms(payslip_store.sync), 'results': results}
+    finally:
+        models.DATABASE = original_database
+        payslip_store.STORE_FOLDER = original_folder
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure payslip analytics over SQL and the columnar store.')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    if not payslip_store.numpy_available():
+        print('The payslip store requires NumPy.', file=sys.stderr)
+        return 2
+    report = run(args)
+    print(f"{report['payslips']} payslips, store built in {report['sync_s']}s, no-op sync {report['sync_noop_ms']}ms")
+    print(f"{'query':<16}{'sql_ms':>10}{'store_ms':>10}")
+    for r in report['results']:
+        print(f"{r['query']:<16}{r['sql_ms']:>10}{r['store_ms']:>10}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Page-weight benchmark for employee photos on the employee list.
+
+Gives every employee a full-size photo stored the old way (original name, no
+thumbnails), measures GET /employees plus every photo it references, then
+runs the thumbnail backfill (services/photos.py) and measures again:
+
+    html_bytes      the page itself
+    image_bytes     every distinct row photo the page references, as served
+    page_bytes      html_bytes + image_bytes
+    decode_ms       time to decode those photos (what the browser does to paint them)
+    megapixels      pixels decoded
+    cache_control   Cache-Control the photos are served with
+
+Usage:
+    python -m benchmarks.bench_photos --employees 200
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from services import photos
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ROW_PHOTO = re.compile(r'<td class="table-profile">\s*<img src="([^"]+)"')
+
+
+def _legacy_photos(folder, count, width, height, seed):
+    """Writes `count` camera-sized JPEGs named photo_<id>.jpg, as uploads were saved before thumbnails."""
+    rng = random.Random(seed)
+    base = Image.effect_noise((width, height), 48).convert('RGB')
+    for emp_id in range(1, count + 1):
+        tint = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        Image.blend(base, tint, 0.5).save(os.path.join(folder, f'photo_{emp_id}.jpg'), 'JPEG', quality=90)
+    conn = models.get_db_connection()
+    conn.execute("UPDATE employees SET photo = 'photo_' || id || '.jpg'")
+    conn.commit()
+    conn.close()
+
+
+def measure(client):
+    started = time.perf_counter()
+    html = client.get('/employees').get_data()
+    render = time.perf_counter() - started
+    urls = sorted(set(ROW_PHOTO.findall(html.decode())))
+    image_bytes = pixels = 0
+    decode = 0.0
+    cache_control = None
+    for url in urls:
+        response = client.get(url)
+        data = response.get_data()
+        cache_control = response.headers.get('Cache-Control')
+        image_bytes += len(data)
+        started = time.perf_counter()
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            pixels += image.width * image.height
+        decode += time.perf_counter() - started
+    return {'html_bytes': len(html), 'render_ms': round(render * 1000, 1), 'images': len(urls),
+            'image_bytes': image_bytes, 'page_bytes': len(html) + image_bytes,
+            'decode_ms': round(decode * 1000, 1), 'megapixels': round(pixels / 1e6, 2),
+            'cache_control': cache_control}
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-photos-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'photos.db')
+    static_folder = os.path.join(temp_dir, 'static')
+    upload_folder = os.path.join(static_folder, 'uploads')
+    os.makedirs(upload_folder)
+    import app as web
+    original_static = web.app.static_folder
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        _legacy_photos(upload_folder, args.employees, args.width, args.height, args.seed)
+        web.app.static_folder = static_folder
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+
+        before = measure(client)
+        started = time.perf_counter()
+        converted, missing = photos.backfill(upload_folder)
+        backfill_s = time.perf_counter() - started
+        after = measure(client)
+        return {'employees': args.employees, 'photo_size': f'{args.width}x{args.height}',
+                'backfill': {'converted': converted, 'missing': missing, 'seconds': round(backfill_s, 2)},
+                'before': before, 'after': after}
+    finally:
+        web.app.static_folder = original_static
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure employee-list page weight before and after thumbnails.')
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--width', type=int, default=1600, help='Width of each original photo')
+    parser.add_argument('--height', type=int, default=1200, help='Height of each original photo')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+    if Image is None:
+        print('bench_photos requires Pillow (pip install Pillow).', file=sys.stderr)
+        return 1
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Remittance report benchmark: a year of reports for every agency.
+
+Fills a scratch database with one payslip per employee per month for a
+closed year, then builds every month x agency report twice per format:
+
+    cold_s   first build: aggregate query, write, fill the cache
+    warm_s   second build: served from the cache
+    bytes    total size of the reports
+
+Usage:
+    python -m benchmarks.bench_remittances --employees 10000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import models
+from benchmarks import datagen
+from services import remittances
+
+YEAR = 2024  # a closed year, so reports are cached
+
+
+def _year_of_payslips(year):
+    conn = models.get_db_connection()
+    for month in range(1, 13):
+        start, end = remittances.month_bounds(f'{year}-{month:02d}')
+        conn.execute('''
+            INSERT INTO payslips (employee_id, pay_period_start, pay_period_end, gross_pay_centavos,
+                                  sss_centavos, philhealth_centavos, pagibig_centavos, tax_centavos, net_pay_centavos)
+            SELECT id, ?, ?, 2000000 + abs(random()) % 3000000, 90000, 50000, 20000, abs(random()) % 400000, 0
+            FROM employees
+        ''', (start, end))
+    conn.commit()
+    conn.close()
+
+
+def _build_year(fmt):
+    size = 0
+    for month in range(1, 13):
+        for agency in remittances.AGENCIES:
+            for chunk in remittances.report(agency, f'{YEAR}-{month:02d}', fmt):
+                size += len(chunk)
+    return size
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-remit-')
+    original_database = models.DATABASE
+    original_cache = remittances.CACHE_FOLDER
+    models.DATABASE = os.path.join(temp_dir, 'remit.db')
+    remittances.CACHE_FOLDER = os.path.join(temp_dir, 'cache')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=1, seed=args.seed, users=0)
+        _year_of_payslips(YEAR)
+        results = []
+        for fmt in sorted(remittances.FORMATS):
+            started = time.perf_counter()
+            size = _build_year(fmt)
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            _build_year(fmt)
+            warm = time.perf_counter() - started
+            results.append({'format': fmt, 'reports': 12 * len(remittances.AGENCIES),
+                            'cold_s': round(cold, 3), 'warm_s': round(warm, 3), 'bytes': size})
+        return {'employees': args.employees, 'payslips': args.employees * 12, 'results': results}
+    finally:
+        models.DATABASE = original_database
+        remittances.CACHE_FOLDER = original_cache
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure building a year of remittance reports.')
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{report['payslips']} payslips")
+    print(f"{'format':<8}{'reports':>9}{'cold_s':>9}{'warm_s':>9}{'bytes':>13}")
+    for r in report['results']:
+        print(f"{r['format']:<8}{r['reports']:>9}{r['cold_s']:>9}{r['warm_s']:>9}{r['bytes']:>13}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
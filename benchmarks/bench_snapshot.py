@@ -0,0 +1,121 @@
+"""
+Snapshot report benchmark: do long reports hold up payroll writes?
+
+One thread keeps running the payroll CSV export's reads inside
+models.snapshot() while another posts time records, once per journal mode:
+
+    reports     reports completed during the run
+    report_ms   median report time
+    writes      time records posted
+    write_p50 / write_p99 / write_max   commit latency of a posted record, ms
+
+With the old rollback journal a snapshot's read transaction holds a shared
+lock, so every write waits for the report to finish. In WAL mode (what
+init_db sets) writes go straight through.
+
+Usage:
+    python -m benchmarks.bench_snapshot --employees 5000 --duration 10
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import models
+import utils
+from benchmarks import datagen
+from benchmarks.loadtest import percentile
+
+JOURNAL_MODES = ('delete', 'wal')
+
+
+def _period():
+    start = date.today().replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def _report_loop(stop, timings):
+    period = _period()
+    while not stop.is_set():
+        started = time.perf_counter()
+        with models.snapshot():
+            utils.calculate_payroll_batch(models.get_employees(), *period)
+        timings.append(time.perf_counter() - started)
+
+
+def _write_loop(stop, emp_ids, latencies, interval):
+    day = date.today().replace(day=1).isoformat()
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        models.add_time_record(emp_ids[i % len(emp_ids)], day, 1.0, 0.0)
+        latencies.append(time.perf_counter() - started)
+        i += 1
+        time.sleep(interval)
+
+
+def measure(journal_mode, duration, interval):
+    conn = models.get_db_connection()
+    conn.cursor().execute(f'PRAGMA journal_mode = {journal_mode}')
+    conn.close()
+    emp_ids = [emp.id for emp in models.get_employees()]
+    stop = threading.Event()
+    reports, writes = [], []
+    threads = [threading.Thread(target=_report_loop, args=(stop, reports)),
+               threading.Thread(target=_write_loop, args=(stop, emp_ids, writes, interval))]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    reports.sort()
+    writes.sort()
+    ms = lambda seconds: round(seconds * 1000, 1) if seconds is not None else None
+    return {'journal_mode': journal_mode, 'reports': len(reports), 'report_ms': ms(percentile(reports, 50)),
+            'writes': len(writes), 'write_p50_ms': ms(percentile(writes, 50)),
+            'write_p99_ms': ms(percentile(writes, 99)), 'write_max_ms': ms(writes[-1] if writes else None)}
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-snapshot-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'snapshot.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=args.days, seed=args.seed, users=0)
+        results = [measure(mode, args.duration, args.interval) for mode in JOURNAL_MODES]
+        return {'employees': args.employees, 'duration_s': args.duration, 'results': results}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure write latency while snapshot reports run.')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per journal mode')
+    parser.add_argument('--interval', type=float, default=0.02, help='Seconds between posted records')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{'journal':<9}{'reports':>8}{'report_ms':>11}{'writes':>8}{'w_p50':>9}{'w_p99':>9}{'w_max':>9}")
+    for r in report['results']:
+        print(f"{r['journal_mode']:<9}{r['reports']:>8}{r['report_ms']:>11}{r['writes']:>8}"
+              f"{r['write_p50_ms']:>9}{r['write_p99_ms']:>9}{r['write_max_ms']:>9}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Startup benchmark: what importing the app costs a fresh worker.
+
+Each run starts a new interpreter with `python -X importtime -c "import app"`
+and reports, over --runs runs:
+
+    import_ms   app's cumulative import time from -X importtime (median, best)
+    wall_ms     the whole interpreter start-up and import, as a worker sees it
+    rss_mb      peak resident memory of the process after the import
+    heavy       which of HEAVY_MODULES were imported (should be none)
+
+plus the slowest of the module's own imports in the last run.
+test_startup.py holds import_ms to IMPORT_BUDGET_MS.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --module payroll
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use by the views and commands that need them, never at startup
+HEAVY_MODULES = ('reportlab', 'numpy', 'PIL')
+IMPORT_BUDGET_MS = 450
+
+_REPORT_RSS = 'import resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)'
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime's stderr lines."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import(module='app'):
+    """Imports `module` in a fresh interpreter. Returns (import rows, wall seconds, peak RSS in KiB)."""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}; {_REPORT_RSS}'],
+                            cwd=APP_ROOT, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    rss_kib = int(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr), wall, rss_kib
+
+
+def cumulative_ms(rows, module):
+    return next(cumulative for name, _, cumulative, _ in rows if name == module) / 1000
+
+
+def direct_imports(rows, module):
+    """The rows `module` imported itself (-X importtime lists them just before it, one level deeper)."""
+    index = next(i for i, row in enumerate(rows) if row[0] == module)
+    children = []
+    for row in reversed(rows[:index]):
+        if row[3] <= rows[index][3]:
+            break
+        if row[3] == rows[index][3] + 1:
+            children.append(row)
+    return children
+
+
+def heavy_imports(rows):
+    return sorted({name.split('.')[0] for name, _, _, _ in rows} & set(HEAVY_MODULES))
+
+
+def run(args):
+    imports, walls, rss, heavy, rows = [], [], [], set(), []
+    for _ in range(args.runs):
+        rows, wall, rss_kib = measure_import(args.module)
+        imports.append(cumulative_ms(rows, args.module))
+        walls.append(wall * 1000)
+        rss.append(rss_kib / 1024)
+        heavy.update(heavy_imports(rows))
+    slowest = sorted(direct_imports(rows, args.module), key=lambda row: -row[2])[:args.top]
+    return {'module': args.module, 'runs': args.runs,
+            'import_ms': round(statistics.median(imports), 1), 'import_best_ms': round(min(imports), 1),
+            'wall_ms': round(statistics.median(walls), 1), 'rss_mb': round(statistics.median(rss), 1),
+            'heavy': sorted(heavy),
+            'slowest': [{'module': name, 'ms': round(cumulative / 1000, 1)} for name, _, cumulative, _ in slowest]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the app's cold import time and memory.")
+    parser.add_argument('--module', default='app', help='Module to import (default app)')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8, help='Slowest direct imports to list')
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"import {report['module']}: {report['import_ms']} ms median, {report['import_best_ms']} ms best "
+          f"(budget {IMPORT_BUDGET_MS} ms); interpreter + import {report['wall_ms']} ms; "
+          f"peak RSS {report['rss_mb']} MB")
+    print(f"heavy modules loaded: {', '.join(report['heavy']) or 'none'}")
+    for row in report['slowest']:
+        print(f"  {row['module']:<28}{row['ms']:>8} ms")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Time-to-first-byte and peak-memory benchmark for the large list pages.
+
+For each page, drives one GET through the WSGI app and records:
+
+    ttfb_ms      time until the first body chunk is produced
+    total_ms     time until the last chunk
+    chunks       body chunks produced
+    bytes        body size
+    peak_bytes   peak memory traced by tracemalloc over a second, untimed request
+
+Usage:
+    python -m benchmarks.bench_streaming --employees 50000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import models
+from benchmarks import datagen
+
+PAGES = ('/employees', '/leave', '/users')
+
+
+def _drive(client, path):
+    """One GET, consumed chunk by chunk. Returns (response, ttfb, total, chunks, bytes)."""
+    started = time.perf_counter()
+    response = client.get(path, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    ttfb = time.perf_counter() - started
+    size, count = len(first), 1
+    for chunk in chunks:
+        size += len(chunk)
+        count += 1
+    total = time.perf_counter() - started
+    response.close()
+    return response, ttfb, total, count, size
+
+
+def measure(client, path):
+    # Timed and traced in separate requests: tracemalloc slows every allocation
+    gc.collect()
+    response, ttfb, total, count, size = _drive(client, path)
+    gc.collect()
+    tracemalloc.start()
+    _drive(client, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'page': path, 'status': response.status_code, 'ttfb_ms': round(ttfb * 1000, 3),
+            'total_ms': round(total * 1000, 3), 'chunks': count, 'bytes': size, 'peak_bytes': peak}
+
+
+def run(args):
+    temp_dir = tempfile.mkdtemp(prefix='payroll-stream-')
+    original_database = models.DATABASE
+    models.DATABASE = os.path.join(temp_dir, 'stream.db')
+    try:
+        datagen.generate(models.DATABASE, employees=args.employees, days=args.days, seed=args.seed,
+                         leave_ratio=args.leave_ratio, users=args.users)
+        import app as web
+        client = web.app.test_client()
+        client.post('/login', data={'username': datagen.ADMIN_USERNAME, 'password': datagen.ADMIN_PASSWORD})
+        return {'employees': args.employees, 'users': args.users,
+                'results': [measure(client, path) for path in PAGES]}
+    finally:
+        models.DATABASE = original_database
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure TTFB and peak memory of the list pages.')
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--days', type=int, default=5, help='Time records per employee')
+    parser.add_argument('--leave-ratio', type=float, default=1.0, help='Leave requests per employee')
+    parser.add_argument('--users', type=int, default=10, help='Employee logins (each row lists every employee)')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"{'page':<12}{'ttfb_ms':>12}{'total_ms':>12}{'chunks':>9}{'bytes':>12}{'peak_MB':>10}")
+    for r in report['results']:
+        print(f"{r['page']:<12}{r['ttfb_ms']:>12}{r['total_ms']:>12}{r['chunks']:>9}{r['bytes']:>12}"
+              f"{r['peak_bytes'] / 1e6:>10.1f}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Deterministic synthetic data generator.
+
+Fills a scratch database with N employees, M days of time records, loans and
+leave requests. The same arguments always produce the same rows, so benchmark
+runs on different machines or releases are comparable.
+
+Usage:
+    python -m benchmarks.datagen scratch.db --employees 10000 --days 30
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import models
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlo', 'Liza',
+               'Miguel', 'Grace', 'Ramon', 'Joy', 'Paolo', 'Kris', 'Andres', 'Bea']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres',
+              'Flores', 'Villanueva', 'Ramos', 'Castillo', 'Aquino', 'Navarro', 'Dela Cruz']
+DEPARTMENTS = {
+    'Operations': ['Visa Processor', 'Documentation Officer', 'Operations Supervisor'],
+    'Customer Service': ['Front Desk Officer', 'Customer Service Representative'],
+    'Finance': ['Accountant', 'Payroll Officer', 'Cashier'],
+    'IT': ['Systems Administrator', 'Developer'],
+    'Human Resources': ['HR Officer', 'Recruiter'],
+}
+PAYROLL_PERIODS = ['Monthly'] * 8 + ['Semi-Monthly'] * 3 + ['Weekly']
+LEAVE_TYPES = ['Vacation', 'Sick', 'Personal', 'Other']
+LEAVE_STATUSES = ['Pending', 'Approved', 'Approved', 'Rejected']
+
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = 'admin'
+EMPLOYEE_PASSWORD = 'password'
+
+
+def employee_username(index):
+    """Username of the generated user linked to the index-th employee (1-based)."""
+    return f'employee{index}'
+
+
+def _employee_rows(rng, count, period_start):
+    departments = sorted(DEPARTMENTS)
+    for i in range(1, count + 1):
+        department = rng.choice(departments)
+        hourly_rate = round(rng.uniform(80, 800) * 4) / 4
+        hired = period_start - timedelta(days=rng.randint(30, 3650))
+        is_active = 0 if rng.random() < 0.05 else 1
+        resigned = (hired + timedelta(days=rng.randint(1, 900))).isoformat() if not is_active else None
+        yield (
+            f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i:06d}',
+            rng.choice(DEPARTMENTS[department]),
+            department,
+            round(hourly_rate * 8 * 22, 2),
+            rng.choice(PAYROLL_PERIODS),
+            hired.isoformat(),
+            'default.png',
+            hourly_rate,
+            f'09{rng.randint(100000000, 999999999)}',
+            f'{rng.randint(1, 999)} Rizal St., Davao City',
+            f'{rng.randint(10 ** 11, 10 ** 12 - 1)}',
+            f'34-{rng.randint(1000000, 9999999)}-{rng.randint(0, 9)}',
+            f'{rng.randint(10 ** 11, 10 ** 12 - 1)}',
+            f'{rng.randint(10 ** 11, 10 ** 12 - 1)}',
+            f'{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(100, 999)}-000',
+            resigned,
+            is_active,
+        )
+
+
+def _time_record_rows(rng, count, period_start, days):
+    for emp_id in range(1, count + 1):
+        for offset in range(days):
+            day = period_start + timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            hours = 8.0 if rng.random() < 0.85 else rng.randint(8, 15) / 2
+            overtime = rng.randint(1, 6) / 2 if rng.random() < 0.15 else 0.0
+            yield (emp_id, day.isoformat(), hours, overtime)
+
+
+def _loan_rows(rng, count, ratio):
+    for emp_id in range(1, count + 1):
+        if rng.random() >= ratio:
+            continue
+        total = rng.randint(10, 200) * 500.0
+        monthly = round(total / rng.choice([6, 12, 24]), 2)
+        paid = round(monthly * rng.randint(0, 5), 2)
+        yield (emp_id, rng.choice(['Company Loan', 'Salary Loan', 'Emergency Loan']),
+               total, min(paid, total), monthly)
+
+
+def _leave_rows(rng, count, ratio, period_start, days):
+    for emp_id in range(1, count + 1):
+        if rng.random() >= ratio:
+            continue
+        start = period_start + timedelta(days=rng.randint(0, max(days - 1, 0)))
+        end = start + timedelta(days=rng.randint(0, 4))
+        yield (emp_id, rng.choice(LEAVE_TYPES), start.isoformat(), end.isoformat(),
+               'Synthetic leave request', rng.choice(LEAVE_STATUSES))
+
+
+def generate(db_path, employees=100, days=30, start_date=None, seed=2024,
+             loan_ratio=0.2, leave_ratio=0.1, users=10):
+    """
+    Creates a fresh database at db_path filled with synthetic data.
+
+    start_date defaults to the first day of the current month so that the
+    routes (which look at the current month) see the generated time records.
+    An admin user (admin/admin) and `users` employee logins
+    (employee1..employeeN / password) are created for route benchmarks.
+    Returns a summary dict of what was generated.
+    """
+    if os.path.abspath(db_path) == os.path.abspath('database.db'):
+        raise ValueError('Refusing to generate synthetic data into the live database.db')
+    if start_date is None:
+        start_date = date.today().replace(day=1)
+    elif isinstance(start_date, str):
+        start_date = date.fromisoformat(start_date)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    rng = random.Random(seed)
+    previous_database = models.DATABASE
+    models.DATABASE = db_path
+    try:
+        models.init_db()
+        conn = models.get_db_connection()
+        c = conn.cursor()
+        c.executemany('''
+            INSERT INTO employees (
+                name, position, department, salary, payroll_period, date_hired, photo, hourly_rate,
+                contact_number, address, bank_account_number, sss_number, philhealth_number,
+                pagibig_number, tin_number, date_resigned, is_active
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _employee_rows(rng, employees, start_date))
+        c.executemany('''
+            INSERT INTO time_records (employee_id, date, hours_worked, overtime_hours)
+            VALUES (?, ?, ?, ?)
+        ''', _time_record_rows(rng, employees, start_date, days))
+        c.executemany('''
+            INSERT INTO loans (employee_id, loan_name, total_amount, amount_paid, monthly_deduction)
+            VALUES (?, ?, ?, ?, ?)
+        ''', _loan_rows(rng, employees, loan_ratio))
+        c.executemany('''
+            INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, reason, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', _leave_rows(rng, employees, leave_ratio, start_date, days))
+
+        # Hash each password once; hashing per user would dominate generation time.
+        c.execute('INSERT INTO users (username, password_hash, is_admin) VALUES (?, ?, 1)',
+                  (ADMIN_USERNAME, generate_password_hash(ADMIN_PASSWORD)))
+        employee_hash = generate_password_hash(EMPLOYEE_PASSWORD)
+        c.executemany('INSERT INTO users (username, password_hash, is_admin, employee_id) VALUES (?, ?, 0, ?)',
+                      ((employee_username(i), employee_hash, i) for i in range(1, min(users, employees) + 1)))
+        conn.commit()
+
+        summary = {'database': db_path, 'seed': seed, 'start_date': start_date.isoformat(), 'days': days}
+        for table in ('employees', 'time_records', 'loans', 'leave_requests', 'users'):
+            summary[table] = c.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        conn.close()
+    finally:
+        models.DATABASE = previous_database
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic payroll database.')
+    parser.add_argument('database', help='Path of the scratch database to (re)create')
+    parser.add_argument('--employees', type=int, default=100)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--start-date', help='First day of time records (default: first of this month)')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--loan-ratio', type=float, default=0.2)
+    parser.add_argument('--leave-ratio', type=float, default=0.1)
+    parser.add_argument('--users', type=int, default=10, help='Number of employee logins to create')
+    args = parser.parse_args(argv)
+
+    summary = generate(args.database, employees=args.employees, days=args.days,
+                       start_date=args.start_date, seed=args.seed, loan_ratio=args.loan_ratio,
+                       leave_ratio=args.leave_ratio, users=args.users)
+    for key, value in summary.items():
+        print(f'{key}: {value}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
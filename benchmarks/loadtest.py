@@ -0,0 +1,332 @@
+"""
+Concurrent load-test harness for the Flask app.
+
+Simulates a payday: employees hammering /my-payslips while admins browse and
+run payroll. Each virtual user logs in through /login and then picks routes
+from its script until the run ends. Requests are driven either in-process
+through the WSGI app (default) or against a running server (--url).
+
+In-process runs also count SQLite lock waits: connections are opened with a
+zero busy timeout, so every statement that would have blocked on another
+connection's lock is seen, counted, and then retried with the normal timeout.
+
+Usage:
+    python -m benchmarks.loadtest --employees 2000 --admins 2 --staff 50 --duration 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --database scratch.db
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+import models
+from benchmarks import datagen
+
+# (weight, method, path) -- paths may contain {emp_id}.
+ADMIN_SCRIPT = [
+    (5, 'GET', '/dashboard'),
+    (3, 'GET', '/employees'),
+    (2, 'GET', '/payroll/{emp_id}'),
+    (1, 'GET', '/export/csv'),
+    (1, 'POST', '/payroll/process'),
+]
+EMPLOYEE_SCRIPT = [
+    (6, 'GET', '/my-payslips'),
+    (2, 'GET', '/my-dashboard'),
+    (1, 'GET', '/my-leave'),
+]
+BUSY_TIMEOUT_MS = 5000
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LockStats:
+    """Thread-safe counters for SQLite lock contention."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, waited, timed_out):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += waited
+            if timed_out:
+                self.timeouts += 1
+
+    def as_dict(self):
+        return {'lock_waits': self.waits,
+                'lock_wait_ms': round(self.wait_seconds * 1000, 3),
+                'lock_timeouts': self.timeouts}
+
+
+def _is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def instrumented_connection_factory(stats):
+    """
+    Returns a replacement for models.get_db_connection whose connections
+    report lock waits to `stats`.
+    """
+
+    def retry_blocked(conn, func):
+        try:
+            return func()
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+        started = time.perf_counter()
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        try:
+            result = func()
+        except sqlite3.OperationalError as e:
+            stats.record(time.perf_counter() - started, timed_out=_is_locked(e))
+            raise
+        finally:
+            conn.execute('PRAGMA busy_timeout = 0')
+        stats.record(time.perf_counter() - started, timed_out=False)
+        return result
+
+    class InstrumentedCursor(sqlite3.Cursor):
+        def execute(self, *args):
+            return retry_blocked(self.connection, lambda: super(InstrumentedCursor, self).execute(*args))
+
+        def executemany(self, *args):
+            return retry_blocked(self.connection, lambda: super(InstrumentedCursor, self).executemany(*args))
+
+    class InstrumentedConnection(sqlite3.Connection):
+        def cursor(self, factory=InstrumentedCursor):
+            return super().cursor(factory)
+
+        def commit(self):
+            return retry_blocked(self, super().commit)
+
+    def get_db_connection():
+        snapshot = models.current_snapshot()
+        if snapshot is not None:  # report reads share their snapshot's connection
+            return snapshot.conn
+        conn = sqlite3.connect(models.DATABASE, timeout=0, factory=InstrumentedConnection)
+        conn.row_factory = sqlite3.Row
+        models.register_sql_functions(conn)
+        return conn
+
+    return get_db_connection
+
+
+class InProcessTransport:
+    """Sends requests straight into the WSGI app through Flask's test client."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    """Sends requests to a running server, keeping a per-user cookie jar."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        if method == 'POST' and body is None:
+            body = b''
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, name, transport, username, password, script, emp_ids, deadline, seed, results):
+        super().__init__(name=name, daemon=True)
+        self.transport = transport
+        self.username = username
+        self.password = password
+        self.script = script
+        self.emp_ids = emp_ids
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.results = results
+        self.error = None
+
+    def timed(self, label, method, path, data=None):
+        started = time.perf_counter()
+        status = self.transport.request(method, path, data)
+        self.results.append((label, time.perf_counter() - started, status))
+        return status
+
+    def run(self):
+        try:
+            status = self.timed('POST /login', 'POST', '/login',
+                                {'username': self.username, 'password': self.password})
+            if status != 302:
+                raise RuntimeError(f'login failed for {self.username} (status {status})')
+            weights = [entry[0] for entry in self.script]
+            while time.perf_counter() < self.deadline:
+                _, method, path = self.rng.choices(self.script, weights)[0]
+                label = f'{method} {path}'
+                self.timed(label, method, path.format(emp_id=self.rng.choice(self.emp_ids)))
+        except Exception as e:  # Reported in the summary instead of killing the run
+            self.error = f'{type(e).__name__}: {e}'
+
+
+def summarize(results, elapsed):
+    by_route = defaultdict(list)
+    errors = defaultdict(int)
+    for label, latency, status in results:
+        by_route[label].append(latency)
+        if status >= 500:
+            errors[label] += 1
+    routes = {}
+    for label, latencies in sorted(by_route.items()):
+        latencies.sort()
+        routes[label] = {
+            'requests': len(latencies),
+            'errors': errors[label],
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3),
+        }
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'routes': routes,
+    }
+
+
+def run(args):
+    if args.url and not args.database:
+        raise SystemExit('--url needs --database pointing at the scratch database the server uses')
+
+    temp_dir = None
+    db_path = args.database
+    if not db_path:
+        temp_dir = tempfile.mkdtemp(prefix='payroll-load-')
+        db_path = os.path.join(temp_dir, 'load.db')
+        datagen.generate(db_path, employees=args.employees, seed=args.seed, users=args.staff)
+
+    original_database = models.DATABASE
+    original_factory = models.get_db_connection
+    models.DATABASE = db_path
+    lock_stats = None
+    try:
+        emp_ids = [emp.id for emp in models.get_employees()]
+        staff_ids = [row['employee_id'] for row in models.get_all_users() if row['employee_id']]
+        if args.staff > len(staff_ids):
+            raise SystemExit(f'Only {len(staff_ids)} employee logins exist in {db_path}')
+
+        if args.url:
+            make_transport = lambda: HttpTransport(args.url)
+        else:
+            import app as web
+            lock_stats = LockStats()
+            models.get_db_connection = instrumented_connection_factory(lock_stats)
+            make_transport = lambda: InProcessTransport(web.app)
+
+        results = []  # list.append is atomic, so threads share it without a lock
+        deadline = time.perf_counter() + args.duration
+        users = [VirtualUser(f'admin-{i}', make_transport(), datagen.ADMIN_USERNAME, datagen.ADMIN_PASSWORD,
+                             ADMIN_SCRIPT, emp_ids, deadline, args.seed + i, results)
+                 for i in range(args.admins)]
+        users += [VirtualUser(f'staff-{i}', make_transport(), datagen.employee_username(i + 1),
+                              datagen.EMPLOYEE_PASSWORD, EMPLOYEE_SCRIPT, emp_ids, deadline,
+                              args.seed + 1000 + i, results)
+                  for i in range(args.staff)]
+
+        started = time.perf_counter()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        models.get_db_connection = original_factory
+        models.DATABASE = original_database
+        if temp_dir:
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = summarize(results, elapsed)
+    report['mode'] = 'http' if args.url else 'in-process'
+    report['users'] = {'admins': args.admins, 'staff': args.staff}
+    report['sqlite'] = lock_stats.as_dict() if lock_stats else None
+    report['user_errors'] = {u.name: u.error for u in users if u.error}
+    return report
+
+
+def print_report(report, stream=sys.stdout):
+    print(f"{report['mode']}: {report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s)", file=stream)
+    print(f"{'route':<28}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}", file=stream)
+    for label, r in report['routes'].items():
+        print(f"{label:<28}{r['requests']:>7}{r['errors']:>5}{r['throughput_rps']:>9}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}", file=stream)
+    if report['sqlite']:
+        s = report['sqlite']
+        print(f"sqlite: {s['lock_waits']} lock waits ({s['lock_wait_ms']} ms total), "
+              f"{s['lock_timeouts']} timeouts", file=stream)
+    for name, error in report['user_errors'].items():
+        print(f'{name} stopped early: {error}', file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent load test for the payroll web app.')
+    parser.add_argument('--url', help='Base URL of a running server (default: drive the app in-process)')
+    parser.add_argument('--database', help='Existing synthetic database (default: generate a temporary one)')
+    parser.add_argument('--employees', type=int, default=1000, help='Roster size when generating data')
+    parser.add_argument('--admins', type=int, default=2, help='Concurrent admin users')
+    parser.add_argument('--staff', type=int, default=20, help='Concurrent employee users')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['user_errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Benchmark suite for the payroll hot paths.
+
+Generates (or reuses) a synthetic database per roster size, times each case
+and writes a JSON report. Passing --baseline compares against an earlier
+report and exits non-zero when a case got slower than the tolerance allows.
+
+Usage:
+    python -m benchmarks.suite --sizes 100,10000,100000 --output bench.json
+    python -m benchmarks.suite --sizes 100 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import models
+from benchmarks import datagen
+from services import pay_periods
+
+REPORT_SCHEMA = 1
+DEFAULT_SIZES = (100, 10000, 100000)
+CALC_SAMPLE = 500
+PDF_SAMPLE = 20
+
+
+def current_period():
+    """The period the routes use for company-wide figures, as (start, end)."""
+    period = pay_periods.company_period()
+    return period.start_date, period.end_date
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_case(func, repeat):
+    """Runs func `repeat` times and returns the list of wall-clock durations."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(case, size, ops, timings):
+    median = statistics.median(timings)
+    return {
+        'case': case,
+        'employees': size,
+        'ops': ops,
+        'repeat': len(timings),
+        'min_s': round(min(timings), 6),
+        'median_s': round(median, 6),
+        'max_s': round(max(timings), 6),
+        'per_op_s': round(median / ops, 9) if ops else None,
+    }
+
+
+def logged_in_client(flask_app, username=datagen.ADMIN_USERNAME, password=datagen.ADMIN_PASSWORD):
+    client = flask_app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'Could not log in as {username!r} (status {response.status_code})')
+    return client
+
+
+def check_ok(response):
+    if response.status_code != 200:
+        raise RuntimeError(f'{response.request.path} returned {response.status_code}')
+    return response
+
+
+def run_size(size, args, data_dir):
+    """Runs every case against a roster of `size` employees."""
+    # Imported here so that models.DATABASE is already pointing at scratch data
+    # whenever app code runs.
+    import app as web
+    import utils
+    from services.pdf_generator import create_pdf_from_payroll_data
+
+    db_path = os.path.join(data_dir, f'synthetic_{size}_{args.days}_{args.seed}.db')
+    if not os.path.exists(db_path) or args.regenerate:
+        print(f'[{size}] generating synthetic data...', file=sys.stderr)
+        datagen.generate(db_path, employees=size, days=args.days, seed=args.seed)
+
+    start, end = current_period()
+    results = []
+    models.DATABASE = db_path
+    employees = models.get_employees()
+    sample = employees[:CALC_SAMPLE]
+    client = logged_in_client(web.app)
+
+    def record(case, ops, func, repeat=args.repeat):
+        print(f'[{size}] {case}...', file=sys.stderr)
+        results.append(summarize(case, size, ops, time_case(func, repeat)))
+
+    record('calculate_payroll', len(sample),
+           lambda: [utils.calculate_payroll(emp, start, end) for emp in sample])
+    record('get_payroll_totals', len(employees),
+           lambda: utils.get_payroll_totals(employees, start, end))
+    record('route_employees', 1, lambda: check_ok(client.get('/employees')))
+    record('route_export_csv', 1, lambda: check_ok(client.get('/export/csv')))
+
+    pdf_inputs = [(emp, utils.calculate_payroll(emp, start, end)) for emp in employees[:PDF_SAMPLE]]
+    record('pdf_render', len(pdf_inputs),
+           lambda: [create_pdf_from_payroll_data(emp, payroll, start, end) for emp, payroll in pdf_inputs])
+
+    # process_payroll writes payslips and loan payments, so every repetition
+    # runs on a fresh copy of the generated database.
+    timings = []
+    for _ in range(args.repeat):
+        scratch = os.path.join(data_dir, f'process_{size}.db')
+        shutil.copyfile(db_path, scratch)
+        models.DATABASE = scratch
+        started = time.perf_counter()
+        response = client.post('/payroll/process')
+        timings.append(time.perf_counter() - started)
+        if response.status_code != 302:
+            raise RuntimeError(f'/payroll/process returned {response.status_code}')
+        os.remove(scratch)
+    print(f'[{size}] route_process_payroll...', file=sys.stderr)
+    results.append(summarize('route_process_payroll', size, 1, timings))
+    models.DATABASE = db_path
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Returns a list of regressions: cases whose median grew by more than `tolerance`."""
+    previous = {(r['case'], r['employees']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        old = previous.get((result['case'], result['employees']))
+        if not old or not old['median_s']:
+            continue
+        ratio = result['median_s'] / old['median_s']
+        if ratio > 1 + tolerance:
+            regressions.append({'case': result['case'], 'employees': result['employees'],
+                                'baseline_s': old['median_s'], 'current_s': result['median_s'],
+                                'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the payroll hot paths.')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma-separated roster sizes (default: %(default)s)')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help='Where generated databases are kept and reused '
+                                           '(default: a temporary directory)')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerate databases in --data-dir')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown versus the baseline, as a fraction (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    temp_dir = None
+    data_dir = args.data_dir
+    if not data_dir:
+        temp_dir = tempfile.mkdtemp(prefix='payroll-bench-')
+        data_dir = temp_dir
+    os.makedirs(data_dir, exist_ok=True)
+
+    original_database = models.DATABASE
+    report = {
+        'schema': REPORT_SCHEMA,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': models.sqlite3.sqlite_version,
+        'params': {'sizes': sizes, 'days': args.days, 'seed': args.seed, 'repeat': args.repeat},
+        'results': [],
+    }
+    try:
+        for size in sizes:
+            report['results'].extend(run_size(size, args, data_dir))
+    finally:
+        models.DATABASE = original_database
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['case']} @ {regression['employees']}: "
+                  f"{regression['baseline_s']}s -> {regression['current_s']}s", file=sys.stderr)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
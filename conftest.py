@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+import models
+import utils
+
+# The date-dependent tests run in mid-October 2026: September is a closed month, October the open one.
+TODAY = date(2026, 10, 18)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Points models at a fresh, empty database for the duration of a test."""
+    path = str(tmp_path / 'test.db')
+    monkeypatch.setattr(models, 'DATABASE', path)
+    models.init_db()
+    return path
+
+
+@pytest.fixture
+def admin_client(db, tmp_path, monkeypatch):
+    """A Flask test client logged in as an admin user."""
+    from app import app
+    from services import payslip_store
+    monkeypatch.setattr(payslip_store, 'STORE_FOLDER', str(tmp_path / 'payslip_store'))
+    models.create_user('admin', 'admin', is_admin=1)
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
+
+
+@pytest.fixture
+def today():
+    """TODAY, for the `today=` argument of the closed-period services."""
+    return TODAY
+
+
+@pytest.fixture
+def add_employee(db):
+    """Adds a monthly-paid employee with a bank account and every statutory number; returns the new id."""
+    def add(name='Juan Santos', hourly_rate=100.0, department='IT', position='Developer'):
+        models.add_employee(name, position, department, 17600.0, 'Monthly', '2024-01-15', 'default.png',
+                            hourly_rate, '09171234567', 'Davao City', '123456789012',
+                            '34-1234567-8', '123456789012', '123456789012', '123-456-789-000')
+        return models.get_employees()[-1].id
+    return add
+
+
+@pytest.fixture
+def pay_run(db):
+    """Records a payroll run paying each employee `regular_hours` (hundredths) at ₱100; returns the payroll."""
+    def run(period_start, period_end, employee_ids, regular_hours=16000):
+        payroll = utils.compute_payroll(10000, regular_hours, 0, 0)
+        models.record_payroll_run(period_start, period_end, [(emp_id, payroll) for emp_id in employee_ids])
+        return payroll
+    return run
@@ -1,19 +1,436 @@
+import atexit
+import json
+import os
 import sqlite3
 import datetime
+import threading
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from money import to_centavos, to_hundredths
+from records import Employee, EMPLOYEE_COLUMNS
+
 DATABASE = 'database.db'
 
 def get_db_connection():
-    """Creates a database connection."""
+    """Creates a database connection (or, inside snapshot(), returns the snapshot's)."""
+    current = current_snapshot()
+    if current is not None:
+        return current.conn
     conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row  # This is key for accessing columns by name
+    register_sql_functions(conn)
     return conn
 
+# --- Fixed-point SQL ---
+# SQL converts REAL pesos and hours to centavos and hundredths with the same
+# rule as money.to_centavos and to_hundredths (half up on the decimal the
+# value prints as). ROUND(x * 100) alone rounds the binary product instead
+# (0.285 * 100 = 28.4999...), so near a half the money function itself is
+# called; everywhere else the two give the same integer, natively.
+def register_sql_functions(conn):
+    """Adds TO_CENTAVOS and TO_HUNDREDTHS (see fixed_point_sql) to a connection."""
+    conn.create_function('TO_CENTAVOS', 1, to_centavos, deterministic=True)
+    conn.create_function('TO_HUNDREDTHS', 1, to_hundredths, deterministic=True)
+
+def fixed_point_sql(column, function='TO_CENTAVOS'):
+    """SQL for `column` (a REAL expression) * 100 as an INTEGER, rounded like money.`function`."""
+    scaled = f'({column}) * 100'
+    return (f'(CASE WHEN ABS({scaled} - ROUND({scaled})) < 0.49 THEN CAST(ROUND({scaled}) AS INTEGER) '
+            f'ELSE {function}({column}) END)')
+
+# --- Snapshot reads ---
+# Reports run inside snapshot(): every query in the block reads the same
+# committed state through one read transaction. init_db puts the database in
+# WAL mode, where that transaction neither waits for nor blocks payroll
+# writes, and any number of snapshots can read at once.
+_snapshot = ContextVar('snapshot', default=None)
+
+class _SnapshotConnection(sqlite3.Connection):
+    """The connection shared by a snapshot's reads: close() and commit() leave its read transaction open."""
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+class Snapshot:
+    def __init__(self, conn, taken_at):
+        self.conn = conn
+        self.taken_at = taken_at  # local time the read transaction started, 'YYYY-MM-DD HH:MM:SS'
+
+def current_snapshot():
+    """The Snapshot the calling code is reading from, or None."""
+    return _snapshot.get()
+
+@contextmanager
+def snapshot():
+    """
+    Runs the block's reads against one consistent, read-only view of the
+    database: get_db_connection() returns the snapshot's connection until the
+    block ends, and writes through it fail. Yields the Snapshot, whose
+    taken_at reports should state. Nested calls share the outer snapshot.
+    """
+    current = current_snapshot()
+    if current is not None:
+        yield current
+        return
+    conn = sqlite3.connect(DATABASE, factory=_SnapshotConnection)
+    conn.row_factory = sqlite3.Row
+    register_sql_functions(conn)
+    conn.execute('PRAGMA query_only = ON')
+    archived = _attach_archive(conn)  # ATTACH is not allowed inside the transaction
+    conn.execute('BEGIN')
+    # Each database's snapshot is fixed at its first read: read both now, not when a query first needs the archive
+    conn.execute('SELECT COUNT(*) FROM main.sqlite_master').fetchone()
+    if archived:
+        conn.execute('SELECT COUNT(*) FROM archive.sqlite_master').fetchone()
+    current = Snapshot(conn, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    token = _snapshot.set(current)
+    try:
+        yield current
+    finally:
+        _snapshot.reset(token)
+        conn.rollback()
+        sqlite3.Connection.close(conn)
+
+STREAM_BATCH = 500  # rows fetched per cursor round-trip by _stream_rows
+
+def _stream_rows(query, params=(), row_factory=None):
+    """
+    Yields the rows of `query` as they are fetched, STREAM_BATCH at a time, so
+    a streamed page never holds the whole result. The connection opens on the
+    first row requested and closes when the rows run out or the generator is
+    closed. For history reads, pass `query` as a function of the connection:
+    it is then a _history_connection, for _history_source.
+    """
+    conn = _history_connection() if callable(query) else get_db_connection()
+    try:
+        c = conn.cursor()
+        if row_factory is not None:
+            c.row_factory = row_factory
+        c.execute(query(conn) if callable(query) else query, params)
+        while True:
+            rows = c.fetchmany(STREAM_BATCH)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        conn.close()
+
+# --- Audit log ---
+# Payroll-affecting changes (employee edits and archiving, leave decisions,
+# loans, user roles) are recorded with the row before and after. The write
+# path only appends them to an in-memory buffer; a background thread turns
+# them into diffs and inserts them into audit_log in one transaction per
+# batch, every AUDIT_FLUSH_INTERVAL seconds or as soon as AUDIT_MAX_BATCH
+# entries wait. A crash can lose at most that interval's entries; a normal
+# exit flushes at shutdown.
+AUDIT_FLUSH_INTERVAL = 1.0
+AUDIT_MAX_BATCH = 500
+
+_audit_actor = ContextVar('audit_actor', default=None)
+
+def set_audit_actor(actor):
+    """Names who is making changes in the current context (the app sets the logged-in user per request)."""
+    return _audit_actor.set(actor)
+
+def _audit_diff(before, after):
+    """{column: [old, new]} for every column whose value changed; new rows diff against nothing."""
+    before = before or {}
+    after = after or {}
+    return {name: [before.get(name), after.get(name)] for name in {**before, **after}
+            if before.get(name) != after.get(name)}
+
+class AuditBuffer:
+    """Collects audit entries in memory and writes them to audit_log in batches."""
+
+    def __init__(self, interval=AUDIT_FLUSH_INTERVAL, max_batch=AUDIT_MAX_BATCH):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def record(self, table_name, record_id, action, before, after):
+        """Queues a change; `before` and `after` are dicts (or sqlite3.Rows) of the row, or None."""
+        entry = (DATABASE, datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+                 _audit_actor.get(), table_name, record_id, action,
+                 dict(before) if before is not None else None, dict(after) if after is not None else None)
+        with self._lock:
+            self._entries.append(entry)
+            pending = len(self._entries)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+        if pending >= self.max_batch:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # the entries are back in the buffer; the next round retries
+
+    def flush(self):
+        """Writes every buffered entry now. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            by_database = {}
+            for database, changed_at, actor, table_name, record_id, action, before, after in entries:
+                changes = _audit_diff(before, after)
+                if changes or action != 'update':
+                    by_database.setdefault(database, []).append(
+                        (changed_at, actor, table_name, record_id, action, json.dumps(changes, default=str)))
+            written = 0
+            for database, rows in by_database.items():
+                try:
+                    conn = sqlite3.connect(database, timeout=30)
+                    try:
+                        conn.cursor().executemany('''
+                            INSERT INTO audit_log (changed_at, actor, table_name, record_id, action, changes)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', rows)
+                        conn.commit()
+                    finally:
+                        conn.close()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._entries[:0] = [e for e in entries if e[0] == database]
+                    raise
+                written += len(rows)
+            return written
+
+audit_buffer = AuditBuffer()
+atexit.register(lambda: audit_buffer.flush())
+
+def _audit(table_name, record_id, action, before, after):
+    audit_buffer.record(table_name, record_id, action, before, after)
+
+def flush_audit():
+    """Writes any buffered audit entries now."""
+    return audit_buffer.flush()
+
+def get_audit_log(table_name=None, record_id=None, limit=100):
+    """The latest audit entries, newest first, optionally for one table or row. Flushes the buffer first."""
+    flush_audit()
+    where, params = [], []
+    if table_name is not None:
+        where.append('table_name = ?')
+        params.append(table_name)
+    if record_id is not None:
+        where.append('record_id = ?')
+        params.append(record_id)
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT * FROM audit_log {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY id DESC LIMIT ?
+    ''', params + [limit])
+    entries = c.fetchall()
+    conn.close()
+    return entries
+
+# --- Archive (cold history) ---
+# archive_history moves closed-period time records, old payslips and
+# long-resigned employees into a second database file beside DATABASE. The
+# history readers (get_employee_by_id, get_time_records,
+# get_payslips_by_employee) ATTACH it and read both through UNION ALL, so
+# moved rows still appear wherever history is shown.
+ARCHIVE_TABLES = ('employees', 'time_records', 'payslips')
+ARCHIVE_INDEXES = {  # table -> {index name suffix: columns}
+    'time_records': {'history': 'employee_id, date'},
+    'payslips': {'history': 'employee_id, pay_period_end', 'period': 'pay_period_start, pay_period_end'},
+}
+_history_columns = {}  # (database, table) -> column list shared by main and archive; see _history_source
+
+def archive_path():
+    """The archive database for DATABASE: 'database.db' -> 'database-archive.db'."""
+    root, ext = os.path.splitext(DATABASE)
+    return f'{root}-archive{ext or ".db"}'
+
+def _attach_archive(conn, create=False):
+    """Attaches the archive as 'archive' when it exists (or `create` is set). True if attached."""
+    path = archive_path()
+    if not create and not os.path.exists(path):
+        return False
+    conn.cursor().execute('ATTACH DATABASE ? AS archive', (path,))
+    return True
+
+def _history_connection():
+    """get_db_connection(), with the archive attached if there is one (a snapshot attaches its own)."""
+    conn = get_db_connection()
+    if current_snapshot() is None:
+        _attach_archive(conn)
+    return conn
+
+def _history_source(conn, table):
+    """
+    FROM source for `table` on a _history_connection: the table itself, or
+    its hot and archived rows together. Both sides select the hot table's
+    columns (NULL where an older archive lacks one), so a migration that
+    adds a column does not break history reads.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'")
+    if c.fetchone() is None:
+        return table
+    key = (DATABASE, table)
+    if key not in _history_columns:
+        hot = [row[1] for row in c.execute(f'PRAGMA main.table_info({table})')]
+        cold = {row[1] for row in c.execute(f'PRAGMA archive.table_info({table})')}
+        _history_columns[key] = (', '.join(hot),
+                                 ', '.join(name if name in cold else f'NULL AS {name}' for name in hot))
+    hot, cold = _history_columns[key]
+    return f'(SELECT {hot} FROM main.{table} UNION ALL SELECT {cold} FROM archive.{table})'
+
+def _create_archive_tables(c):
+    """Creates the ARCHIVE_TABLES in the attached archive with the hot tables' definitions, adding new columns."""
+    for table in ARCHIVE_TABLES:
+        c.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        definition = c.fetchone()[0]
+        c.execute(definition.replace(f'CREATE TABLE {table}', f'CREATE TABLE IF NOT EXISTS archive.{table}', 1))
+        cold = {row[1] for row in c.execute(f'PRAGMA archive.table_info({table})').fetchall()}
+        for row in c.execute(f'PRAGMA main.table_info({table})').fetchall():
+            if row[1] not in cold:
+                c.execute(f'ALTER TABLE archive.{table} ADD COLUMN {row[1]} {row[2]}')
+        for suffix, columns in ARCHIVE_INDEXES.get(table, {}).items():
+            c.execute(f'CREATE INDEX IF NOT EXISTS archive.idx_{table}_{suffix} ON {table} ({columns})')
+    _history_columns.clear()
+
+def _move_rows(c, table, where, params=()):
+    """Copies the rows of main.`table` matching `where` into the archive, then deletes them. Returns the count."""
+    columns = ', '.join(row[1] for row in c.execute(f'PRAGMA main.table_info({table})').fetchall())
+    c.execute(f'INSERT OR IGNORE INTO archive.{table} ({columns}) SELECT {columns} FROM main.{table} WHERE {where}',
+              params)
+    c.execute(f'DELETE FROM main.{table} WHERE {where}', params)
+    return c.rowcount
+
+def archive_history(before):
+    """
+    Moves history older than `before` ('YYYY-MM-DD') to the archive database:
+    time records dated before it, payslips of periods that ended before it,
+    and inactive employees who resigned before it and have nothing left in
+    the hot tables (time records, payslips, loans, leave requests).
+    payroll_ytd is left as it was. Returns {table: rows moved}.
+
+    Each database commits atomically, but in WAL mode not the pair: if the
+    process dies mid-commit, rows can be in both until the next run, which
+    skips rows already archived and finishes the move.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    try:
+        _attach_archive(conn, create=True)
+        c.execute('PRAGMA archive.journal_mode = WAL')  # so snapshots reading it do not block the next move
+        _create_archive_tables(c)
+        moved = {'time_records': _move_rows(c, 'time_records', 'date < ?', (before,))}
+
+        # The delete trigger takes the moved payslips out of payroll_ytd; put them back
+        c.execute('CREATE TEMP TABLE archived_payslips AS SELECT id FROM main.payslips WHERE pay_period_end < ?',
+                  (before,))
+        moved['payslips'] = _move_rows(c, 'payslips', 'id IN (SELECT id FROM temp.archived_payslips)')
+        amounts = ', '.join(f'SUM({amount})' for amount in _ytd_amounts('p'))
+        c.execute(f'''
+            {YTD_INSERT}
+            SELECT p.employee_id, substr(p.pay_period_end, 1, 4), COUNT(*), {amounts}
+            FROM archive.payslips p
+            WHERE p.id IN (SELECT id FROM temp.archived_payslips)
+            GROUP BY p.employee_id, substr(p.pay_period_end, 1, 4)
+            {YTD_ACCUMULATE}
+        ''')
+        c.execute('DROP TABLE temp.archived_payslips')
+
+        moved['employees'] = _move_rows(c, 'employees', '''
+            is_active = 0 AND date_resigned < ?
+            AND NOT EXISTS (SELECT 1 FROM main.time_records t WHERE t.employee_id = employees.id)
+            AND NOT EXISTS (SELECT 1 FROM main.payslips p WHERE p.employee_id = employees.id)
+            AND NOT EXISTS (SELECT 1 FROM main.loans l WHERE l.employee_id = employees.id)
+            AND NOT EXISTS (SELECT 1 FROM main.leave_requests r WHERE r.employee_id = employees.id)
+        ''', (before,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return moved
+
+def count_rows(tables):
+    """{table: row count} in the hot database."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    counts = {table: c.execute(f'SELECT COUNT(*) FROM main.{table}').fetchone()[0] for table in tables}
+    conn.close()
+    return counts
+
+def vacuum():
+    """Rewrites the hot database file without the pages freed by deletes."""
+    conn = get_db_connection()
+    conn.cursor().execute('VACUUM')
+    conn.close()
+
+# --- Year-to-date totals (payroll_ytd) ---
+YTD_SOURCE_COLUMNS = 'gross_pay_centavos, sss_centavos, philhealth_centavos, pagibig_centavos, tax_centavos'
+YTD_AMOUNT_COLUMNS = ('gross_centavos', 'contributions_centavos', 'taxable_centavos', 'tax_centavos')
+
+def _ytd_amounts(row):
+    """payroll_ytd amounts of one payslip row ('NEW', 'OLD' or a table alias), in column order."""
+    contributions = (f'COALESCE({row}.sss_centavos, 0) + COALESCE({row}.philhealth_centavos, 0)'
+                     f' + COALESCE({row}.pagibig_centavos, 0)')
+    gross = f'COALESCE({row}.gross_pay_centavos, 0)'
+    return [gross, contributions, f'{gross} - ({contributions})', f'COALESCE({row}.tax_centavos, 0)']
+
+YTD_INSERT = '''
+    INSERT INTO payroll_ytd (employee_id, year, payslips, gross_centavos, contributions_centavos,
+                             taxable_centavos, tax_centavos)
+'''
+YTD_ACCUMULATE = '''
+    ON CONFLICT (employee_id, year) DO UPDATE SET
+        payslips = payslips + excluded.payslips,
+        gross_centavos = gross_centavos + excluded.gross_centavos,
+        contributions_centavos = contributions_centavos + excluded.contributions_centavos,
+        taxable_centavos = taxable_centavos + excluded.taxable_centavos,
+        tax_centavos = tax_centavos + excluded.tax_centavos
+'''
+
+def _ytd_upsert(row, sign):
+    """Trigger statement adding (sign 1) or removing (sign -1) a payslip from its year's totals."""
+    amounts = ', '.join(f'{sign} * ({amount})' for amount in _ytd_amounts(row))
+    return f'''
+        {YTD_INSERT}
+        VALUES ({row}.employee_id, substr({row}.pay_period_end, 1, 4), {sign}, {amounts})
+        {YTD_ACCUMULATE};
+    '''
+
+def _rebuild_payroll_ytd(c):
+    """Refills payroll_ytd from the payslips, hot and archived when `c` is on a _history_connection."""
+    c.execute('DELETE FROM payroll_ytd')
+    amounts = ', '.join(f'SUM({amount})' for amount in _ytd_amounts('p'))
+    c.execute(f'''
+        {YTD_INSERT}
+        SELECT p.employee_id, substr(p.pay_period_end, 1, 4), COUNT(*), {amounts}
+        FROM {_history_source(c.connection, 'payslips')} p
+        GROUP BY p.employee_id, substr(p.pay_period_end, 1, 4)
+    ''')
+    return c.rowcount
+
 def init_db():
     """Initializes the database and creates tables if they don't exist."""
     conn = get_db_connection()
     c = conn.cursor()
+    # Write-ahead log: readers (see snapshot) and the writer no longer block each other.
+    # The mode is stored in the database file, so every later connection uses it.
+    c.execute('PRAGMA journal_mode = WAL')
     
     # --- UPDATED: employees table ---
     # Added fields for contact, statutory numbers, and employment status
@@ -122,12 +539,281 @@ def init_db():
             total_deductions REAL,
             net_pay REAL,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+
+            -- Exact amounts in integer centavos (the REAL columns are kept for old readers)
+            gross_pay_centavos INTEGER,
+            overtime_pay_centavos INTEGER,
+            allowances_centavos INTEGER,
+            sss_centavos INTEGER,
+            philhealth_centavos INTEGER,
+            pagibig_centavos INTEGER,
+            tax_centavos INTEGER,
+            loan_deductions_centavos INTEGER,
+            total_deductions_centavos INTEGER,
+            net_pay_centavos INTEGER,
             FOREIGN KEY (employee_id) REFERENCES employees (id)
         )
     ''')
-    
+    _add_payslip_centavo_columns(c)
+
+    # --- loan_payments table ---
+    # Ledger of every deduction applied to a loan; loans.amount_paid is its running total.
+    # Payroll postings are unique per loan and period, so a re-run cannot charge twice.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS loan_payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            loan_id INTEGER NOT NULL,
+            employee_id INTEGER NOT NULL,
+            pay_period_start TEXT NOT NULL,
+            pay_period_end TEXT NOT NULL,
+            amount_centavos INTEGER NOT NULL,
+            source TEXT DEFAULT 'payroll', -- 'payroll' or 'manual'
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (loan_id) REFERENCES loans (id),
+            FOREIGN KEY (employee_id) REFERENCES employees (id)
+        )
+    ''')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_loan_payments_period
+        ON loan_payments (loan_id, pay_period_start, pay_period_end) WHERE source = 'payroll'
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_loan_payments_employee ON loan_payments (employee_id, pay_period_end)')
+
+    # --- leave_ledger / leave_balances tables ---
+    # Every accrual, consumption and reversal of leave, in hundredths of a day.
+    # leave_balances is the running total per employee and leave type, kept
+    # current by a trigger so showing a balance is a primary-key lookup.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS leave_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            leave_type TEXT NOT NULL,
+            entry_date TEXT NOT NULL,
+            days_hundredths INTEGER NOT NULL, -- positive = earned, negative = taken
+            kind TEXT NOT NULL, -- 'accrual', 'consumption' or 'reversal'
+            accrual_period TEXT, -- 'YYYY-MM' for accruals
+            leave_request_id INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees (id),
+            FOREIGN KEY (leave_request_id) REFERENCES leave_requests (id)
+        )
+    ''')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_leave_ledger_accrual
+        ON leave_ledger (employee_id, leave_type, accrual_period) WHERE kind = 'accrual'
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_leave_ledger_balance ON leave_ledger (employee_id, leave_type)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_leave_ledger_request ON leave_ledger (leave_request_id)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS leave_balances (
+            employee_id INTEGER NOT NULL,
+            leave_type TEXT NOT NULL,
+            balance_hundredths INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, leave_type)
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_leave_ledger_balance AFTER INSERT ON leave_ledger
+        BEGIN
+            INSERT INTO leave_balances (employee_id, leave_type, balance_hundredths)
+            VALUES (NEW.employee_id, NEW.leave_type, NEW.days_hundredths)
+            ON CONFLICT (employee_id, leave_type)
+            DO UPDATE SET balance_hundredths = balance_hundredths + excluded.balance_hundredths;
+        END
+    ''')
+
+    # --- payroll_ytd table ---
+    # Year-to-date totals per employee and calendar year (the year of
+    # pay_period_end), kept current by triggers on payslips, so annualized tax
+    # and YTD figures are a primary-key lookup instead of a sum over the year.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payroll_ytd'")
+    backfill_ytd = c.fetchone() is None
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS payroll_ytd (
+            employee_id INTEGER NOT NULL,
+            year TEXT NOT NULL,
+            payslips INTEGER NOT NULL DEFAULT 0,
+            gross_centavos INTEGER NOT NULL DEFAULT 0,
+            contributions_centavos INTEGER NOT NULL DEFAULT 0, -- SSS + PhilHealth + Pag-IBIG
+            taxable_centavos INTEGER NOT NULL DEFAULT 0,       -- gross - contributions
+            tax_centavos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, year)
+        )
+    ''')
+    for name, event, changes in (('insert', 'INSERT', [('NEW', 1)]),
+                                 ('delete', 'DELETE', [('OLD', -1)]),
+                                 ('update', f'UPDATE OF employee_id, pay_period_end, {YTD_SOURCE_COLUMNS}',
+                                  [('OLD', -1), ('NEW', 1)])):
+        statements = ''.join(_ytd_upsert(row, sign) for row, sign in changes)
+        c.execute(f'CREATE TRIGGER IF NOT EXISTS trg_payslips_ytd_{name} AFTER {event} ON payslips BEGIN {statements} END')
+
+    # --- time_record_summaries table ---
+    # Daily time records of a paid period, compacted (see compact_time_records):
+    # one row per employee and period with the totals payroll reads, and the
+    # daily rows as zlib-compressed JSON in `detail`, expanded on demand.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS time_record_summaries (
+            employee_id INTEGER NOT NULL,
+            period_start TEXT NOT NULL,
+            period_end TEXT NOT NULL,
+            records INTEGER NOT NULL,
+            regular_hundredths INTEGER NOT NULL,
+            overtime_hundredths INTEGER NOT NULL,
+            detail BLOB NOT NULL,
+            compacted_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (employee_id, period_start),
+            FOREIGN KEY (employee_id) REFERENCES employees (id)
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_time_record_summaries_period
+        ON time_record_summaries (period_start, period_end)
+    ''')
+
+    # --- payroll_costs tables (services.cost_reports) ---
+    # Payslip totals per month (of pay_period_end), department and position;
+    # payroll_cost_months records what each month was built from and whether
+    # the month had closed.
+    amounts = ',\n'.join(f'            {name} INTEGER NOT NULL DEFAULT 0' for name in COST_COLUMNS)
+    c.execute(f'''
+        CREATE TABLE IF NOT EXISTS payroll_costs (
+            month TEXT NOT NULL,
+            department TEXT NOT NULL,
+            position TEXT NOT NULL,
+            employees INTEGER NOT NULL,
+            payslips INTEGER NOT NULL,
+{amounts},
+            PRIMARY KEY (month, department, position)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS payroll_cost_months (
+            month TEXT PRIMARY KEY,
+            payslips INTEGER NOT NULL,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            seen_id INTEGER NOT NULL DEFAULT 0,
+            payslip_version INTEGER,
+            closed INTEGER NOT NULL DEFAULT 0,
+            data_stamp TEXT,
+            built_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # --- Indexes for the per-employee lookups done on every payroll calculation ---
+    # Without these, each get_time_records/get_active_loans call scans the whole table.
+    c.execute('CREATE INDEX IF NOT EXISTS idx_time_records_employee_date ON time_records (employee_id, date)')
+    # Covering index so whole-roster period totals (get_period_hours) only read the period's rows
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_time_records_date
+        ON time_records (date, employee_id, hours_worked, overtime_hours)
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_loans_employee_active ON loans (employee_id, is_active)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_payslips_employee_period ON payslips (employee_id, pay_period_end)')
+    # One period's payslips in id order, for bank files, without sorting or scanning history
+    c.execute('CREATE INDEX IF NOT EXISTS idx_payslips_period ON payslips (pay_period_start, pay_period_end)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_leave_requests_employee_status ON leave_requests (employee_id, status)')
+    # Interval index for approved leave, sorted by end date: "overlaps [start, end]" becomes a
+    # range scan over end_date >= start that skips all leave already over (the bulk of history).
+    # status is repeated as a column so the scan never has to visit the table.
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_leave_requests_approved
+        ON leave_requests (end_date, start_date, employee_id, leave_type, status) WHERE status = 'Approved'
+    ''')
+
+    # --- audit_log table (see AuditBuffer) ---
+    # Append-only: the triggers refuse any update or delete.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            changed_at TEXT NOT NULL,
+            actor TEXT,
+            table_name TEXT NOT NULL,
+            record_id INTEGER,
+            action TEXT NOT NULL,
+            changes TEXT NOT NULL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_audit_log_record ON audit_log (table_name, record_id)')
+    for event in ('UPDATE', 'DELETE'):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_audit_log_no_{event.lower()} BEFORE {event} ON audit_log
+            BEGIN
+                SELECT RAISE(ABORT, 'audit_log is append-only');
+            END
+        ''')
+
+    # --- Data version stamps (see get_data_stamp) ---
+    # Inserts already move MAX(rowid); updates and deletes bump a per-table counter.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        for event in ('UPDATE', 'DELETE'):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO data_versions (name, version) VALUES ('{table}', 1)
+                    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+                END
+            ''')
+
     conn.commit()
     conn.close()
+    if backfill_ytd:
+        rebuild_payroll_ytd()
+
+# Tables whose changes get_data_stamp can detect
+VERSIONED_TABLES = ('employees', 'users', 'time_records', 'loans', 'loan_payments',
+                    'leave_requests', 'leave_ledger', 'payslips')
+
+def get_data_stamp(tables):
+    """
+    A tuple that changes whenever any of `tables` does: each table's
+    MAX(rowid), which every insert moves, and its data_versions counter,
+    which triggers bump on every update and delete. One indexed lookup per
+    table, so it is cheap enough to check before rendering anything.
+    """
+    unknown = set(tables) - set(VERSIONED_TABLES)
+    if unknown:
+        raise ValueError(f'Not a versioned table: {", ".join(sorted(unknown))}')
+    columns = ', '.join(
+        f"(SELECT MAX(rowid) FROM {table}), (SELECT version FROM data_versions WHERE name = '{table}')"
+        for table in tables
+    )
+    conn = get_db_connection()
+    c = conn.cursor()
+    stamp = tuple(c.execute(f'SELECT {columns}').fetchone())
+    conn.close()
+    return stamp
+
+# REAL payslip column -> its exact centavo twin
+PAYSLIP_CENTAVO_COLUMNS = {
+    'gross_pay': 'gross_pay_centavos',
+    'overtime_pay': 'overtime_pay_centavos',
+    'allowances': 'allowances_centavos',
+    'sss_deduction': 'sss_centavos',
+    'philhealth_deduction': 'philhealth_centavos',
+    'pagibig_deduction': 'pagibig_centavos',
+    'tax_deduction': 'tax_centavos',
+    'loan_deductions': 'loan_deductions_centavos',
+    'total_deductions': 'total_deductions_centavos',
+    'net_pay': 'net_pay_centavos',
+}
+
+def _add_payslip_centavo_columns(c):
+    """Adds the centavo columns to a payslips table created before they existed, and backfills them."""
+    c.execute("PRAGMA table_info(payslips)")
+    existing = {col[1] for col in c.fetchall()}
+    for real_column, centavo_column in PAYSLIP_CENTAVO_COLUMNS.items():
+        if centavo_column not in existing:
+            c.execute(f'ALTER TABLE payslips ADD COLUMN {centavo_column} INTEGER')
+            c.execute(f'''
+                UPDATE payslips SET {centavo_column} = {fixed_point_sql(real_column)}
+                WHERE {real_column} IS NOT NULL
+            ''')
 
 # --- Employee Functions (Updated) ---
 
@@ -149,28 +835,68 @@ def add_employee(name, position, department, salary, payroll_period, date_hired,
     conn.close()
 
 def get_employees():
-    """Fetches all *active* employees from the database."""
+    """Fetches all *active* employees from the database, as records.Employee."""
+    return list(iter_employees())
+
+def iter_employees():
+    """Like get_employees, but yields each employee as it is read from the cursor."""
+    return _stream_rows(f'SELECT {EMPLOYEE_COLUMNS} FROM employees WHERE is_active = 1 ORDER BY name',
+                        row_factory=Employee.row_factory)
+
+def get_employee_rates():
+    """(id, hourly_rate) of every active employee; all a payroll calculation needs from the record."""
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM employees WHERE is_active = 1 ORDER BY name')
-    employees = c.fetchall()
+    c.row_factory = None
+    c.execute('SELECT id, hourly_rate FROM employees WHERE is_active = 1')
+    rates = c.fetchall()
     conn.close()
-    return employees
+    return rates
 
 def get_all_employees():
     """Fetches *all* employees from the database, including inactive."""
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM employees ORDER BY name')
+    c.row_factory = Employee.row_factory
+    c.execute(f'SELECT {EMPLOYEE_COLUMNS} FROM employees ORDER BY name')
     employees = c.fetchall()
     conn.close()
     return employees
 
+def get_employee_choices():
+    """(id, name) of *all* employees, including inactive, for selection lists."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT id, name FROM employees ORDER BY name')
+    employees = c.fetchall()
+    conn.close()
+    return employees
+
+def get_employee_photos():
+    """Distinct photo file names stored for employees, including inactive ones."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT DISTINCT photo FROM employees WHERE photo IS NOT NULL')
+    photos = [row['photo'] for row in c.fetchall()]
+    conn.close()
+    return photos
+
+def rename_employee_photo(old_photo, new_photo):
+    """Points every employee using `old_photo` at `new_photo`. Returns the number updated."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('UPDATE employees SET photo = ? WHERE photo = ?', (new_photo, old_photo))
+    conn.commit()
+    updated = c.rowcount
+    conn.close()
+    return updated
+
 def get_employee_by_id(emp_id):
     """Fetches a single employee by their ID."""
-    conn = get_db_connection()
+    conn = _history_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM employees WHERE id = ?', (emp_id,))
+    c.row_factory = Employee.row_factory
+    c.execute(f'SELECT {EMPLOYEE_COLUMNS} FROM {_history_source(conn, "employees")} WHERE id = ?', (emp_id,))
     employee = c.fetchone()
     conn.close()
     return employee
@@ -179,8 +905,15 @@ def update_employee(emp_id, name, position, department, salary, payroll_period,
                     contact_number, address, bank_account_number, 
                     sss_number, philhealth_number, pagibig_number, tin_number):
     """Updates an existing employee's information."""
+    fields = {'name': name, 'position': position, 'department': department, 'salary': salary,
+             'payroll_period': payroll_period, 'date_hired': date_hired, 'photo': photo,
+             'hourly_rate': hourly_rate, 'contact_number': contact_number, 'address': address,
+             'bank_account_number': bank_account_number, 'sss_number': sss_number,
+             'philhealth_number': philhealth_number, 'pagibig_number': pagibig_number, 'tin_number': tin_number}
     conn = get_db_connection()
     c = conn.cursor()
+    select = f'SELECT {", ".join(fields)} FROM employees WHERE id = ?'
+    before = c.execute(select, (emp_id,)).fetchone()
     c.execute('''
         UPDATE employees 
         SET name = ?, position = ?, department = ?, salary = ?, 
@@ -191,22 +924,31 @@ def update_employee(emp_id, name, position, department, salary, payroll_period,
     ''', (name, position, department, salary, payroll_period, date_hired, photo, hourly_rate,
           contact_number, address, bank_account_number, sss_number, philhealth_number, pagibig_number, tin_number,
           emp_id))
+    # Diff the stored values, not the form's strings ('20000' is stored as 20000.0)
+    after = c.execute(select, (emp_id,)).fetchone()
     conn.commit()
     conn.close()
+    if before is not None:
+        _audit('employees', emp_id, 'update', before, after)
 
 def archive_employee(emp_id, resignation_date=None):
     """
     Archives an employee (sets is_active=0) instead of deleting.
-    This preserves their record for history.
+    This preserves their record for history. Once their history is old
+    enough, archive_history moves it all to the archive database.
     """
     if not resignation_date:
         resignation_date = datetime.date.today().isoformat()
         
     conn = get_db_connection()
     c = conn.cursor()
+    c.execute('SELECT is_active, date_resigned FROM employees WHERE id = ?', (emp_id,))
+    before = c.fetchone()
     c.execute('UPDATE employees SET is_active = 0, date_resigned = ? WHERE id = ?', (resignation_date, emp_id))
     conn.commit()
     conn.close()
+    if before is not None:
+        _audit('employees', emp_id, 'update', before, {'is_active': 0, 'date_resigned': resignation_date})
 
 # --- User Functions (Updated) ---
 
@@ -246,32 +988,47 @@ def get_user_by_id(user_id):
 
 def get_all_users():
     """Fetches all users from the database."""
+    return list(iter_users())
+
+def iter_users():
+    """Like get_all_users, but yields each user as it is read from the cursor."""
+    return _stream_rows('SELECT * FROM users ORDER BY username')
+
+def count_users():
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM users ORDER BY username')
-    users = c.fetchall()
+    count = c.execute('SELECT COUNT(*) FROM users').fetchone()[0]
     conn.close()
-    return users
+    return count
 
 def update_user_links(user_id, employee_id, is_admin):
     """Updates a user's employee link and admin status."""
     conn = get_db_connection()
     c = conn.cursor()
+    select = 'SELECT employee_id, is_admin FROM users WHERE id = ?'
+    before = c.execute(select, (user_id,)).fetchone()
     c.execute('''
         UPDATE users 
         SET employee_id = ?, is_admin = ?
         WHERE id = ?
     ''', (employee_id, is_admin, user_id))
+    after = c.execute(select, (user_id,)).fetchone()  # stored types, as in `before`
     conn.commit()
     conn.close()
+    if before is not None:
+        _audit('users', user_id, 'update', before, after)
 
 def make_user_admin(username):
     """Updates a user to be an admin."""
     conn = get_db_connection()
     c = conn.cursor()
+    c.execute('SELECT id, is_admin FROM users WHERE username = ?', (username,))
+    before = c.fetchone()
     c.execute('UPDATE users SET is_admin = 1 WHERE username = ?', (username,))
     conn.commit()
     conn.close()
+    if before is not None:
+        _audit('users', before['id'], 'update', {'is_admin': before['is_admin']}, {'is_admin': 1})
     print(f"User {username} is now an admin.")
 
 # --- NEW Functions for other modules ---
@@ -284,22 +1041,214 @@ def add_time_record(employee_id, date, hours_worked, overtime_hours):
         INSERT INTO time_records (employee_id, date, hours_worked, overtime_hours)
         VALUES (?, ?, ?, ?)
     ''', (employee_id, date, hours_worked, overtime_hours))
+    record_id = c.lastrowid
     conn.commit()
     conn.close()
+    return record_id
 
-def get_time_records(employee_id, start_date, end_date):
+def add_time_records(records):
+    """
+    Inserts (employee_id, date, hours_worked, overtime_hours) tuples in one
+    transaction. Returns the new ids as a range: AUTOINCREMENT ids handed out
+    inside one write transaction are consecutive.
+    """
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('''
-        SELECT * FROM time_records 
+    try:
+        c.executemany('''
+            INSERT INTO time_records (employee_id, date, hours_worked, overtime_hours)
+            VALUES (?, ?, ?, ?)
+        ''', records)
+        count = c.rowcount
+        c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'time_records'")
+        row = c.fetchone()
+        last_id = row[0] if row else 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return range(last_id - count + 1, last_id + 1)
+
+def get_time_records(employee_id, start_date, end_date):
+    conn = _history_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT * FROM {_history_source(conn, 'time_records')}
         WHERE employee_id = ? AND date BETWEEN ? AND ?
         ORDER BY date
     ''', (employee_id, start_date, end_date))
     records = c.fetchall()
     conn.close()
+    compacted = get_compacted_time_records(employee_id, start_date, end_date)
+    if compacted:
+        records = sorted(compacted + records, key=lambda record: record['date'])
     return records
 
+# Hours of one time_records row in hundredths, rounded as compact_time_records stores them
+REGULAR_HUNDREDTHS = fixed_point_sql('hours_worked', 'TO_HUNDREDTHS')
+OVERTIME_HUNDREDTHS = fixed_point_sql('overtime_hours', 'TO_HUNDREDTHS')
+
+def get_period_hours(start_date, end_date):
+    """
+    Totals regular and overtime hours per employee for a date range in one query,
+    in integer hundredths of an hour. Used by batch calculations that need every
+    employee's hours at once. Compacted periods inside the range count through
+    their summary totals; one that only partly overlaps it adds the hundredths
+    stored for its days in the range, rounded when they were compacted.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT employee_id,
+               SUM(regular_hundredths) AS regular_hundredths,
+               SUM(overtime_hundredths) AS overtime_hundredths
+        FROM (
+            SELECT employee_id, {REGULAR_HUNDREDTHS} AS regular_hundredths,
+                   {OVERTIME_HUNDREDTHS} AS overtime_hundredths
+            FROM time_records
+            WHERE date BETWEEN ? AND ?
+            UNION ALL
+            SELECT employee_id, regular_hundredths, overtime_hundredths
+            FROM time_record_summaries
+            WHERE period_start >= ? AND period_end <= ?
+        )
+        GROUP BY employee_id
+    ''', (start_date, end_date, start_date, end_date))
+    totals = c.fetchall()
+    c.execute('''
+        SELECT * FROM time_record_summaries
+        WHERE period_start <= ? AND period_end >= ? AND NOT (period_start >= ? AND period_end <= ?)
+    ''', (end_date, start_date, start_date, end_date))
+    partial = c.fetchall()
+    conn.close()
+    if not partial:
+        return totals
+
+    hours = {row['employee_id']: dict(row) for row in totals}
+    for summary in partial:
+        row = hours.setdefault(summary['employee_id'], {'employee_id': summary['employee_id'],
+                                                        'regular_hundredths': 0, 'overtime_hundredths': 0})
+        for day, regular, overtime in _detail_hundredths(summary['detail']):
+            if start_date <= day <= end_date:
+                row['regular_hundredths'] += regular
+                row['overtime_hundredths'] += overtime
+    return list(hours.values())
+
+# --- Time record compaction ---
+
+def _compress_detail(columns, rows, hundredths):
+    """The detail blob: the rows, and each row's [regular, overtime] hundredths as the summary totals counted them."""
+    return zlib.compress(json.dumps({'columns': columns, 'rows': rows, 'hundredths': hundredths},
+                                    separators=(',', ':')).encode(), 9)
+
+def _expand_detail(detail):
+    """The daily time_records rows stored in a summary's detail blob, as dicts."""
+    data = json.loads(zlib.decompress(detail))
+    return [dict(zip(data['columns'], row)) for row in data['rows']]
+
+def _detail_hundredths(detail):
+    """
+    [(date, regular_hundredths, overtime_hundredths)] for each row of a
+    detail blob, as stored at compaction (blobs written before the
+    hundredths were stored are rounded now, with money.to_hundredths).
+    """
+    data = json.loads(zlib.decompress(detail))
+    records = [dict(zip(data['columns'], row)) for row in data['rows']]
+    hundredths = data.get('hundredths') or [
+        [to_hundredths(record['hours_worked']), to_hundredths(record['overtime_hours'])] for record in records]
+    return [(record['date'], *pair) for record, pair in zip(records, hundredths)]
+
+def get_compacted_time_records(employee_id, start_date, end_date):
+    """An employee's compacted daily records dated in [start_date, end_date], expanded."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT detail FROM time_record_summaries
+        WHERE employee_id = ? AND period_start <= ? AND period_end >= ?
+        ORDER BY period_start
+    ''', (employee_id, end_date, start_date))
+    details = [row['detail'] for row in c.fetchall()]
+    conn.close()
+    return [record for detail in details for record in _expand_detail(detail)
+            if start_date <= record['date'] <= end_date]
+
+def get_compactable_periods(before):
+    """Paid periods ((start, end) pairs with payslips) that ended before `before` and still have daily records."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT DISTINCT p.pay_period_start, p.pay_period_end FROM payslips p
+        WHERE p.pay_period_end < ?
+          AND EXISTS (SELECT 1 FROM time_records t WHERE t.date BETWEEN p.pay_period_start AND p.pay_period_end)
+        ORDER BY p.pay_period_start
+    ''', (before,))
+    periods = [tuple(row) for row in c.fetchall()]
+    conn.close()
+    return periods
+
+def compact_time_records(period_start, period_end):
+    """
+    Collapses the daily time records of a paid period into one
+    time_record_summaries row per employee: record count, hour totals (the
+    hundredths get_period_hours would have summed) and the rows themselves
+    with each row's hundredths, compressed. Records added to a period after it was compacted are merged
+    into its summary on the next run. Raises ValueError if the period has no
+    payslips yet. Returns (records compacted, summaries written).
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    try:
+        c.execute('SELECT 1 FROM payslips WHERE pay_period_start = ? AND pay_period_end = ? LIMIT 1',
+                  (period_start, period_end))
+        if c.fetchone() is None:
+            raise ValueError(f'Payroll for {period_start} to {period_end} has not been processed')
+        # Each row with its hundredths last, rounded once here for the totals and the blob alike
+        c.execute(f'''
+            SELECT *, {REGULAR_HUNDREDTHS}, {OVERTIME_HUNDREDTHS}
+            FROM time_records WHERE date BETWEEN ? AND ? ORDER BY employee_id, date, id
+        ''', (period_start, period_end))
+        columns = [d[0] for d in c.description][:-2]
+        by_employee = {}
+        for row in c.fetchall():
+            by_employee.setdefault(row['employee_id'], []).append(list(row))
+
+        for employee_id, rows in by_employee.items():
+            c.execute('''
+                SELECT * FROM time_record_summaries WHERE employee_id = ? AND period_start = ?
+            ''', (employee_id, period_start))
+            earlier = c.fetchone()
+            if earlier is not None:
+                kept = zip(_expand_detail(earlier['detail']), _detail_hundredths(earlier['detail']))
+                rows = sorted([[record[name] for name in columns] + list(hundredths[1:]) for record, hundredths in kept]
+                              + rows, key=lambda row: (row[columns.index('date')], row[columns.index('id')]))
+            c.execute('''
+                INSERT OR REPLACE INTO time_record_summaries
+                    (employee_id, period_start, period_end, records, regular_hundredths, overtime_hundredths, detail)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (employee_id, period_start, period_end, len(rows), sum(row[-2] for row in rows),
+                  sum(row[-1] for row in rows), _compress_detail(columns, [row[:-2] for row in rows],
+                                                                  [row[-2:] for row in rows])))
+        c.execute('DELETE FROM time_records WHERE date BETWEEN ? AND ?', (period_start, period_end))
+        compacted = c.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return compacted, len(by_employee)
+
 # --- Loan Functions ---
+
+# What an active loan deducts this period: the monthly deduction, or the
+# remaining balance if that is smaller (centavos).
+LOAN_TOTAL_CENTAVOS = fixed_point_sql('total_amount')
+LOAN_PAID_CENTAVOS = fixed_point_sql('amount_paid')
+LOAN_DUE_CENTAVOS = f'''MIN({fixed_point_sql('monthly_deduction')},
+        {LOAN_TOTAL_CENTAVOS} - {LOAN_PAID_CENTAVOS})'''
+
 def add_loan(employee_id, loan_name, total_amount, monthly_deduction):
     conn = get_db_connection()
     c = conn.cursor()
@@ -307,8 +1256,11 @@ def add_loan(employee_id, loan_name, total_amount, monthly_deduction):
         INSERT INTO loans (employee_id, loan_name, total_amount, monthly_deduction)
         VALUES (?, ?, ?, ?)
     ''', (employee_id, loan_name, total_amount, monthly_deduction))
+    loan_id = c.lastrowid
     conn.commit()
     conn.close()
+    _audit('loans', loan_id, 'insert', None, {'employee_id': employee_id, 'loan_name': loan_name,
+                                              'total_amount': total_amount, 'monthly_deduction': monthly_deduction})
 
 def get_active_loans(employee_id):
     conn = get_db_connection()
@@ -318,27 +1270,145 @@ def get_active_loans(employee_id):
     conn.close()
     return loans
 
+# A loan's monthly deduction is charged once per calendar month (by period
+# end), however often the employee is paid: true when another period ending
+# in the same month already charged it. Parameters: _loan_month_params().
+LOAN_CHARGED_THIS_MONTH = '''EXISTS (
+        SELECT 1 FROM loan_payments lp
+        WHERE lp.loan_id = loans.id AND lp.source = 'payroll'
+          AND lp.pay_period_end BETWEEN ? AND ? AND lp.pay_period_start <> ?)'''
+
+def _loan_month_params(period_start, period_end):
+    month = period_end[:7]
+    return f'{month}-01', f'{month}-31', period_start
+
+def get_loan_deduction_totals(period_start=None, period_end=None, employee_id=None):
+    """
+    Sums what every active loan will deduct, per employee, in centavos. Given
+    a period, loans already charged by another period ending in the same
+    month deduct nothing.
+    """
+    where, params = ['is_active = 1'], []
+    if period_start and period_end:
+        where.append(f'NOT {LOAN_CHARGED_THIS_MONTH}')
+        params += _loan_month_params(period_start, period_end)
+    if employee_id is not None:
+        where.append('employee_id = ?')
+        params.append(employee_id)
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT employee_id, SUM({LOAN_DUE_CENTAVOS}) AS loan_deductions_centavos
+        FROM loans
+        WHERE {' AND '.join(where)}
+        GROUP BY employee_id
+    ''', params)
+    totals = c.fetchall()
+    conn.close()
+    return totals
+
+def _apply_loan_payments(c, after_payment_id):
+    """
+    Adds every ledger entry posted after `after_payment_id` to its loan's
+    amount_paid, capped at total_amount, and closes loans that are paid off.
+    One UPDATE for all loans; the arithmetic is done in centavos.
+    """
+    c.execute(f'''
+        UPDATE loans
+        SET amount_paid = MIN({LOAN_TOTAL_CENTAVOS}, {LOAN_PAID_CENTAVOS} + posted.amount_centavos) / 100.0,
+            is_active = CASE
+                WHEN {LOAN_PAID_CENTAVOS} + posted.amount_centavos >= {LOAN_TOTAL_CENTAVOS} THEN 0
+                ELSE is_active
+            END
+        FROM (
+            SELECT loan_id, SUM(amount_centavos) AS amount_centavos
+            FROM loan_payments
+            WHERE id > ?
+            GROUP BY loan_id
+        ) AS posted
+        WHERE loans.id = posted.loan_id
+    ''', (after_payment_id,))
+
+def _last_loan_payment_id(c):
+    c.execute('SELECT COALESCE(MAX(id), 0) FROM loan_payments')
+    return c.fetchone()[0]
+
+def settle_loan_deductions(c, period_start, period_end, after_payslip_id=0):
+    """
+    Posts the period's loan deductions for every employee whose payslip for
+    the period was saved after `after_payslip_id`, then updates the loan
+    balances. Uses the caller's cursor so it commits together with the
+    payslips. What is posted is the loan_deductions_centavos the payslip
+    deducted, spread over the employee's loans in the order they were taken,
+    each up to what it is due, so a loan added or paid after the payroll was
+    computed does not make the ledger differ from the payslip. A loan is
+    charged at most once per period, so settling the same period twice posts
+    nothing new, and at most once per calendar month (see
+    LOAN_CHARGED_THIS_MONTH). Returns the number of ledger entries posted.
+    """
+    last_id = _last_loan_payment_id(c)
+    c.execute(f'''
+        INSERT OR IGNORE INTO loan_payments
+            (loan_id, employee_id, pay_period_start, pay_period_end, amount_centavos, source)
+        SELECT loan_id, employee_id, ?, ?, amount_centavos, 'payroll'
+        FROM (
+            SELECT due.id AS loan_id, due.employee_id,
+                   MIN(due.centavos, MAX(COALESCE(p.loan_deductions_centavos, 0)
+                       - SUM(due.centavos) OVER (PARTITION BY due.employee_id ORDER BY due.id)
+                       + due.centavos, 0)) AS amount_centavos
+            FROM (
+                SELECT id, employee_id, {LOAN_DUE_CENTAVOS} AS centavos
+                FROM loans
+                WHERE is_active = 1 AND NOT {LOAN_CHARGED_THIS_MONTH}
+            ) AS due
+            JOIN payslips p ON p.employee_id = due.employee_id
+            WHERE p.pay_period_start = ? AND p.pay_period_end = ? AND p.id > ?
+        )
+        WHERE amount_centavos > 0
+    ''', (period_start, period_end, *_loan_month_params(period_start, period_end),
+          period_start, period_end, after_payslip_id))
+    posted = c.rowcount
+    _apply_loan_payments(c, last_id)
+    return posted
+
 def update_loan_payment(loan_id, payment_amount):
-    """Updates the amount paid on a loan and deactivates if fully paid."""
+    """Records a manual payment on a loan (capped at the balance) and deactivates it if fully paid."""
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT total_amount, amount_paid FROM loans WHERE id = ?', (loan_id,))
-    loan = c.fetchone()
-    
-    if loan:
-        new_amount_paid = loan['amount_paid'] + payment_amount
-        is_active = 1
-        if new_amount_paid >= loan['total_amount']:
-            is_active = 0
-            new_amount_paid = loan['total_amount'] # Don't overpay
-            
-        c.execute('''
-            UPDATE loans 
-            SET amount_paid = ?, is_active = ?
-            WHERE id = ?
-        ''', (new_amount_paid, is_active, loan_id))
-        conn.commit()
+    c.execute('SELECT amount_paid, is_active FROM loans WHERE id = ?', (loan_id,))
+    before = c.fetchone()
+    last_id = _last_loan_payment_id(c)
+    c.execute(f'''
+        INSERT INTO loan_payments
+            (loan_id, employee_id, pay_period_start, pay_period_end, amount_centavos, source)
+        SELECT id, employee_id, DATE('now'), DATE('now'),
+               MIN(?, {LOAN_TOTAL_CENTAVOS} - {LOAN_PAID_CENTAVOS}),
+               'manual'
+        FROM loans
+        WHERE id = ?
+    ''', (to_centavos(payment_amount), loan_id))
+    _apply_loan_payments(c, last_id)
+    c.execute('SELECT amount_paid, is_active FROM loans WHERE id = ?', (loan_id,))
+    after = c.fetchone()
+    conn.commit()
     conn.close()
+    if before is not None:
+        _audit('loans', loan_id, 'update', before, after)
+
+def get_loan_payments(employee_id):
+    """Returns an employee's loan payment history, newest first."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT p.*, l.loan_name
+        FROM loan_payments p
+        JOIN loans l ON l.id = p.loan_id
+        WHERE p.employee_id = ?
+        ORDER BY p.pay_period_end DESC, p.id DESC
+    ''', (employee_id,))
+    payments = c.fetchall()
+    conn.close()
+    return payments
 
 # --- Leave Functions ---
 def add_leave_request(employee_id, leave_type, start_date, end_date, reason):
@@ -352,54 +1422,794 @@ def add_leave_request(employee_id, leave_type, start_date, end_date, reason):
     conn.close()
 
 def get_leave_requests(employee_id=None, status='Pending'):
+    """Returns leave requests with the given status; status=None returns every request."""
     conn = get_db_connection()
     c = conn.cursor()
+    query = 'SELECT * FROM leave_requests WHERE 1 = 1'
+    params = []
     if employee_id:
-        c.execute('SELECT * FROM leave_requests WHERE employee_id = ? AND status = ?', (employee_id, status))
-    else:
-        c.execute('SELECT * FROM leave_requests WHERE status = ?', (status,))
+        query += ' AND employee_id = ?'
+        params.append(employee_id)
+    if status:
+        query += ' AND status = ?'
+        params.append(status)
+    c.execute(query + ' ORDER BY start_date DESC', params)
     requests = c.fetchall()
     conn.close()
     return requests
 
+def get_leave_requests_with_balances(status):
+    """Leave requests with the employee's name and current balance for the requested leave type."""
+    return list(iter_leave_requests_with_balances(status))
+
+def iter_leave_requests_with_balances(status):
+    """Like get_leave_requests_with_balances, but yields each request as it is read from the cursor."""
+    return _stream_rows('''
+        SELECT r.*, e.name AS employee_name, b.balance_hundredths
+        FROM leave_requests r
+        LEFT JOIN employees e ON e.id = r.employee_id
+        LEFT JOIN leave_balances b ON b.employee_id = r.employee_id AND b.leave_type = r.leave_type
+        WHERE r.status = ?
+        ORDER BY r.start_date
+    ''', (status,))
+
+def count_leave_requests(status):
+    conn = get_db_connection()
+    c = conn.cursor()
+    count = c.execute('SELECT COUNT(*) FROM leave_requests WHERE status = ?', (status,)).fetchone()[0]
+    conn.close()
+    return count
+
+def get_approved_leave(start_date, end_date, employee_id=None):
+    """
+    Approved leave overlapping [start_date, end_date] for every employee (or
+    one): the whole request (request_start, request_end), the part inside the
+    range (start_date, end_date), and available_hundredths, the employee's
+    balance of the leave type just before the request was approved (the
+    ledger entries before its consumption). Answered from
+    idx_leave_requests_approved and idx_leave_ledger_balance.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    query = '''
+        SELECT r.id, r.employee_id, r.leave_type,
+               r.start_date AS request_start, r.end_date AS request_end,
+               MAX(r.start_date, ?) AS start_date, MIN(r.end_date, ?) AS end_date,
+               (SELECT COALESCE(SUM(l.days_hundredths), 0) FROM leave_ledger l
+                WHERE l.employee_id = r.employee_id AND l.leave_type = r.leave_type
+                  AND l.id < IFNULL((SELECT MAX(id) FROM leave_ledger
+                                     WHERE leave_request_id = r.id AND kind = 'consumption'), l.id + 1)
+               ) AS available_hundredths
+        FROM leave_requests r
+        WHERE r.status = 'Approved' AND r.end_date >= ? AND r.start_date <= ?
+    '''
+    params = [start_date, end_date, start_date, end_date]
+    if employee_id:
+        query += ' AND r.employee_id = ?'
+        params.append(employee_id)
+    c.execute(query + ' ORDER BY r.start_date, r.id', params)
+    leave = c.fetchall()
+    conn.close()
+    return leave
+
+def get_worked_leave_dates(start_date, end_date, employee_id=None):
+    """
+    {(employee_id, date)} for the days of approved leave overlapping
+    [start_date, end_date] (whole requests) on which the employee also has
+    hours, in time_records or in a compacted summary's detail: those days
+    are paid as work, not as leave.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    query = '''
+        SELECT DISTINCT t.employee_id, t.date
+        FROM leave_requests r
+        JOIN time_records t ON t.employee_id = r.employee_id AND t.date BETWEEN r.start_date AND r.end_date
+        WHERE r.status = 'Approved' AND r.end_date >= ? AND r.start_date <= ? AND t.hours_worked > 0
+    '''
+    summary_query = '''
+        SELECT s.employee_id, s.detail, r.start_date, r.end_date
+        FROM leave_requests r
+        JOIN time_record_summaries s
+          ON s.employee_id = r.employee_id AND s.period_start <= r.end_date AND s.period_end >= r.start_date
+        WHERE r.status = 'Approved' AND r.end_date >= ? AND r.start_date <= ?
+    '''
+    params = [start_date, end_date]
+    if employee_id:
+        query += ' AND r.employee_id = ?'
+        summary_query += ' AND r.employee_id = ?'
+        params.append(employee_id)
+    worked = {(row[0], row[1]) for row in c.execute(query, params)}
+    for emp_id, detail, leave_start, leave_end in c.execute(summary_query, params).fetchall():
+        worked.update((emp_id, day) for day, regular, _ in _detail_hundredths(detail)
+                      if regular > 0 and leave_start <= day <= leave_end)
+    conn.close()
+    return worked
+
+def count_leave_days(start_date, end_date):
+    """Working days (Monday to Friday) from start_date to end_date inclusive."""
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    if end < start:
+        return 0
+    full_weeks, extra = divmod((end - start).days + 1, 7)
+    return full_weeks * 5 + sum(1 for i in range(extra) if (start.weekday() + i) % 7 < 5)
+
+def leave_dates(start_date, end_date):
+    """The working days (Monday to Friday) from start_date to end_date inclusive, as 'YYYY-MM-DD'."""
+    day = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    dates = []
+    while day <= end:
+        if day.weekday() < 5:
+            dates.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return dates
+
+def _leave_entry(c, request, kind, sign):
+    """Posts a consumption (sign=-1) or reversal (sign=+1) of an approved request."""
+    days = count_leave_days(request['start_date'], request['end_date'])
+    c.execute('''
+        INSERT INTO leave_ledger (employee_id, leave_type, entry_date, days_hundredths, kind, leave_request_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (request['employee_id'], request['leave_type'], request['start_date'],
+          sign * days * 100, kind, request['id']))
+
 def update_leave_status(leave_id, status):
+    """
+    Sets a leave request's status. Approving it deducts its working days from
+    the employee's balance; moving it out of 'Approved' gives them back.
+    """
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('UPDATE leave_requests SET status = ? WHERE id = ?', (status, leave_id))
-    conn.commit()
+    c.execute('SELECT * FROM leave_requests WHERE id = ?', (leave_id,))
+    request = c.fetchone()
+    if request:
+        c.execute('UPDATE leave_requests SET status = ? WHERE id = ?', (status, leave_id))
+        if status == 'Approved' and request['status'] != 'Approved':
+            _leave_entry(c, request, 'consumption', -1)
+        elif status != 'Approved' and request['status'] == 'Approved':
+            _leave_entry(c, request, 'reversal', 1)
+        conn.commit()
+    conn.close()
+    if request:
+        _audit('leave_requests', leave_id, 'update', {'status': request['status']}, {'status': status})
+
+def post_leave_accruals(c, entitlements, period_start=None, period_end=None):
+    """
+    Credits each employee paid in a month with that month's entitlement per
+    leave type ({leave_type: hundredths of a day}). Only payslips in
+    [period_start, period_end] are considered when given; on a
+    _history_connection, archived payslips count too. Each month is
+    credited once, so posting again is harmless. Returns the entries posted.
+    """
+    if not entitlements:
+        return 0
+    policy = ', '.join('(?, ?)' for _ in entitlements)
+    params = [value for item in entitlements.items() for value in item]
+    where = ''
+    if period_start and period_end:
+        where = 'WHERE p.pay_period_start >= ? AND p.pay_period_end <= ?'
+        params += [period_start, period_end]
+    c.execute(f'''
+        INSERT OR IGNORE INTO leave_ledger
+            (employee_id, leave_type, entry_date, days_hundredths, kind, accrual_period)
+        WITH policy (leave_type, days_hundredths) AS (VALUES {policy})
+        SELECT p.employee_id, policy.leave_type, MAX(p.pay_period_end), policy.days_hundredths,
+               'accrual', substr(p.pay_period_end, 1, 7)
+        FROM {_history_source(c.connection, 'payslips')} p CROSS JOIN policy
+        {where}
+        GROUP BY p.employee_id, policy.leave_type, substr(p.pay_period_end, 1, 7)
+    ''', params)
+    return c.rowcount
+
+def get_leave_balances(employee_id):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT leave_type, balance_hundredths FROM leave_balances
+        WHERE employee_id = ? ORDER BY leave_type
+    ''', (employee_id,))
+    balances = c.fetchall()
     conn.close()
+    return balances
+
+def rebuild_leave_ledger(entitlements):
+    """
+    Recomputes the leave ledger and balances from history: a monthly accrual
+    for every month an employee was paid, and a consumption for every
+    approved request. Returns (accruals, consumptions) posted.
+    """
+    conn = _history_connection()
+    c = conn.cursor()
+    try:
+        c.execute('DELETE FROM leave_ledger')
+        c.execute('DELETE FROM leave_balances')
+        accruals = post_leave_accruals(c, entitlements)
+        c.execute("SELECT * FROM leave_requests WHERE status = 'Approved' ORDER BY id")
+        approved = c.fetchall()
+        for request in approved:
+            _leave_entry(c, request, 'consumption', -1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return accruals, len(approved)
 
 # --- Payslip Functions ---
+PAYSLIP_INSERT = '''
+    INSERT INTO payslips (
+        employee_id, pay_period_start, pay_period_end,
+        gross_pay, overtime_pay, allowances,
+        sss_deduction, philhealth_deduction, pagibig_deduction,
+        tax_deduction, loan_deductions, total_deductions, net_pay,
+        gross_pay_centavos, overtime_pay_centavos, allowances_centavos,
+        sss_centavos, philhealth_centavos, pagibig_centavos,
+        tax_centavos, loan_deductions_centavos, total_deductions_centavos, net_pay_centavos
+    )
+'''
+PAYSLIP_PLACEHOLDERS = '?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?'
+
+def _payslip_values(employee_id, period_start, period_end, pay_details):
+    """Builds the PAYSLIP_INSERT values for a records.PayrollResult."""
+    amounts = [
+        pay_details.gross_pay_centavos, pay_details.overtime_pay_centavos,
+        None,  # allowances are not computed yet
+        pay_details.sss_centavos, pay_details.philhealth_centavos, pay_details.pagibig_centavos,
+        pay_details.tax_centavos, pay_details.loan_deductions_centavos,
+        pay_details.total_deductions_centavos, pay_details.net_salary_centavos,
+    ]
+    pesos = [None if amount is None else amount / 100 for amount in amounts]
+    return [employee_id, period_start, period_end] + pesos + amounts
+
 def create_payslip(employee_id, period_start, period_end, pay_details):
+    """
+    Saves a payslip from a records.PayrollResult. The centavo columns
+    are authoritative; the REAL columns are derived from them.
+    """
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('''
-        INSERT INTO payslips (
-            employee_id, pay_period_start, pay_period_end,
-            gross_pay, overtime_pay, allowances,
-            sss_deduction, philhealth_deduction, pagibig_deduction,
-            tax_deduction, loan_deductions, total_deductions, net_pay
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        employee_id, period_start, period_end,
-        pay_details.get('gross_pay'), pay_details.get('overtime_pay'), pay_details.get('allowances'),
-        pay_details.get('sss'), pay_details.get('philhealth'), pay_details.get('pagibig'),
-        pay_details.get('tax'), pay_details.get('loans'), pay_details.get('total_deductions'),
-        pay_details.get('net_pay')
-    ))
+    c.execute(f'{PAYSLIP_INSERT} VALUES ({PAYSLIP_PLACEHOLDERS})',
+              _payslip_values(employee_id, period_start, period_end, pay_details))
     conn.commit()
     conn.close()
 
-def get_payslips_by_employee(employee_id):
+def record_payroll_run(period_start, period_end, payrolls, leave_accruals=None):
+    """
+    Saves a whole payroll run in one transaction: a payslip per (employee_id,
+    pay_details) pair, then the period's loan deductions via
+    settle_loan_deductions and, if `leave_accruals` is given, the month's
+    leave entitlements via post_leave_accruals. Employees who already have a
+    payslip for the period, hot or archived, are skipped. Returns
+    (payslips_created, loan_payments_posted).
+    """
+    rows = [_payslip_values(emp_id, period_start, period_end, details) + [emp_id, period_start, period_end]
+            for emp_id, details in payrolls]
+    conn = _history_connection()
+    c = conn.cursor()
+    try:
+        c.execute('SELECT COALESCE(MAX(id), 0) FROM payslips')
+        last_payslip_id = c.fetchone()[0]
+        c.executemany(f'''
+            {PAYSLIP_INSERT}
+            SELECT {PAYSLIP_PLACEHOLDERS}
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {_history_source(conn, 'payslips')}
+                WHERE employee_id = ? AND pay_period_start = ? AND pay_period_end = ?
+            )
+        ''', rows)
+        # Counted by id: total_changes would include the payroll_ytd trigger's writes
+        c.execute('SELECT COUNT(*) FROM payslips WHERE id > ?', (last_payslip_id,))
+        created = c.fetchone()[0]
+        posted = settle_loan_deductions(c, period_start, period_end, last_payslip_id)
+        post_leave_accruals(c, leave_accruals, period_start, period_end)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return created, posted
+
+def iter_period_credits(period_start, period_end):
+    """
+    Yields each committed payslip of a period, hot or archived, with the
+    employee's name and bank account, in payslip order, as it is read from
+    the cursor.
+    """
+    return _stream_rows(lambda conn: f'''
+        SELECT p.id AS payslip_id, p.employee_id, e.name, e.bank_account_number, p.net_pay_centavos
+        FROM {_history_source(conn, 'payslips')} p
+        JOIN {_history_source(conn, 'employees')} e ON e.id = p.employee_id
+        WHERE p.pay_period_start = ? AND p.pay_period_end = ?
+        ORDER BY p.id
+    ''', (period_start, period_end))
+
+# employees column -> payslips column for each government remittance
+REMITTANCE_COLUMNS = {
+    'sss_number': 'sss_centavos',
+    'philhealth_number': 'philhealth_centavos',
+    'pagibig_number': 'pagibig_centavos',
+    'tin_number': 'tax_centavos',
+}
+
+# The longest pay period (a 31-day month) starts this many days before it ends
+PERIOD_SPAN_DAYS = 30
+
+def _ending_in(period_start, period_end, alias='p'):
+    """
+    (condition, params) selecting the payslips whose period ends in
+    [period_start, period_end]: periods belong to the month they end in.
+    Bounded on pay_period_start as well, so it stays a range of
+    idx_payslips_period.
+    """
+    earliest = datetime.date.fromisoformat(period_start) - datetime.timedelta(days=PERIOD_SPAN_DAYS)
+    prefix = f'{alias}.' if alias else ''
+    return (f'{prefix}pay_period_start BETWEEN ? AND ? AND {prefix}pay_period_end BETWEEN ? AND ?',
+            (earliest.isoformat(), period_end, period_start, period_end))
+
+def iter_remittance_rows(number_column, period_start, period_end):
+    """
+    Yields one row per employee paid in [period_start, period_end] (by pay
+    period end), ordered by statutory number: the number, the employee,
+    payslip count, total gross pay and total withheld for the agency.
+    A single GROUP BY over the period's payslips, hot and archived, read
+    from the idx_payslips_period index of each.
+    """
+    amount_column = REMITTANCE_COLUMNS[number_column]
+    ending_in, params = _ending_in(period_start, period_end)
+    return _stream_rows(lambda conn: f'''
+        SELECT e.{number_column} AS statutory_number, e.id AS employee_id, e.name,
+               COUNT(p.id) AS payslips,
+               SUM(p.gross_pay_centavos) AS gross_centavos,
+               SUM(p.{amount_column}) AS amount_centavos
+        FROM {_history_source(conn, 'payslips')} p
+        JOIN {_history_source(conn, 'employees')} e ON e.id = p.employee_id
+        WHERE {ending_in}
+        GROUP BY e.id
+        ORDER BY statutory_number, e.id
+    ''', params)
+
+def get_period_payslip_stamp(period_start, period_end):
+    """
+    (count, max id) of the payslips ending in a period, hot or archived:
+    changes when one is added or removed.
+    """
+    ending_in, params = _ending_in(period_start, period_end, alias=None)
+    conn = _history_connection()
+    c = conn.cursor()
+    stamp = tuple(c.execute(f'''
+        SELECT COUNT(*), MAX(id) FROM {_history_source(conn, 'payslips')} WHERE {ending_in}
+    ''', params).fetchone())
+    conn.close()
+    return stamp
+
+# payslips columns copied into the columnar store (services.payslip_store)
+STORE_PAYSLIP_COLUMNS = ('gross_pay_centavos', 'overtime_pay_centavos', 'sss_centavos', 'philhealth_centavos',
+                         'pagibig_centavos', 'tax_centavos', 'loan_deductions_centavos',
+                         'total_deductions_centavos', 'net_pay_centavos')
+
+def get_payslip_period_stamps(period_start=None, period_end=None):
+    """
+    One row per pay period with payslips, hot or archived (or only the given
+    period): the period, its payslip count, last id and gross and net totals.
+    A period's stamp changes when a payslip is added, removed or corrected.
+    """
+    conn = _history_connection()
+    c = conn.cursor()
+    where = 'WHERE pay_period_start = ? AND pay_period_end = ?' if period_start else ''
+    c.execute(f'''
+        SELECT pay_period_start, pay_period_end, COUNT(*) AS payslips, MAX(id) AS last_id,
+               SUM(gross_pay_centavos) AS gross_centavos, SUM(net_pay_centavos) AS net_centavos
+        FROM {_history_source(conn, 'payslips')}
+        {where}
+        GROUP BY pay_period_start, pay_period_end
+        ORDER BY pay_period_start, pay_period_end
+    ''', (period_start, period_end) if period_start else ())
+    stamps = c.fetchall()
+    conn.close()
+    return stamps
+
+def get_period_payslip_columns(period_start, period_end):
+    """
+    The payslips of one pay period, hot or archived, in id order, with the
+    employee's department: (id, employee_id, department, *STORE_PAYSLIP_COLUMNS) tuples.
+    """
+    conn = _history_connection()
+    c = conn.cursor()
+    c.row_factory = None
+    columns = ', '.join(f'p.{name}' for name in STORE_PAYSLIP_COLUMNS)
+    c.execute(f'''
+        SELECT p.id, p.employee_id, e.department, {columns}
+        FROM {_history_source(conn, 'payslips')} p
+        LEFT JOIN {_history_source(conn, 'employees')} e ON e.id = p.employee_id
+        WHERE p.pay_period_start = ? AND p.pay_period_end = ?
+        ORDER BY p.id
+    ''', (period_start, period_end))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+# --- Payroll cost reports (services.cost_reports) ---
+# payroll_costs holds one row per month, department and position, built by
+# one GROUP BY over the month's payslips. payroll_cost_months records what
+# each month was built from: its payslips' (count, max id), the highest
+# payslip id in the table then (seen_id: a later payslip for the month has
+# a higher one) and the payslips' data_versions counter, which deletes and
+# updates move.
+COST_COLUMNS = STORE_PAYSLIP_COLUMNS
+COST_DIMENSIONS = ('department', 'position')
+UNASSIGNED = 'Unassigned'
+
+def get_payroll_cost_months(first_month, last_month):
+    """{month: payroll_cost_months row} for the months built so far within [first_month, last_month]."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT * FROM payroll_cost_months WHERE month BETWEEN ? AND ?', (first_month, last_month))
+    months = {row['month']: row for row in c.fetchall()}
+    conn.close()
+    return months
+
+def get_payslip_month_stamps(first_month, last_month, after_id=None):
+    """
+    {month: (count, max id)} of the payslips in [first_month, last_month],
+    by month of pay_period_end; months without payslips are left out.
+    Either every payslip of the months, grouped on idx_payslips_period, or
+    only those with an id above `after_id`, read as a rowid range.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.row_factory = None
+    if after_id is None:
+        ending_in, params = _ending_in(f'{first_month}-01', f'{last_month}-31', alias=None)
+        c.execute(f'''
+            SELECT pay_period_end, COUNT(*), MAX(id) FROM payslips
+            WHERE {ending_in}
+            GROUP BY pay_period_start, pay_period_end
+        ''', params)
+    else:
+        # NOT INDEXED, or the planner scans idx_payslips_period whole to skip the GROUP BY sort
+        c.execute('''
+            SELECT pay_period_end, COUNT(*), MAX(id) FROM payslips NOT INDEXED
+            WHERE id > ? GROUP BY pay_period_start, pay_period_end
+        ''', (after_id,))
+    stamps = {}
+    # Grouped by period rather than substr(month): no sort, and periods per month are few
+    for period_end, count, last_id in c.fetchall():
+        month = period_end[:7]
+        if first_month <= month <= last_month:
+            total, highest = stamps.get(month, (0, 0))
+            stamps[month] = (total + count, max(highest, last_id))
+    conn.close()
+    return stamps
+
+def build_payroll_costs(month, closed, data_stamp=None):
+    """
+    Rebuilds one month of payroll_costs from the payslips ending in it,
+    hot and archived, grouped by the department and position their
+    employees have now, and records the stamp it was built from. One
+    transaction. Returns the number of groups written.
+    """
+    amounts = ', '.join(f'COALESCE(SUM(p.{name}), 0)' for name in COST_COLUMNS)
+    ending_in, bounds = _ending_in(f'{month}-01', f'{month}-31')
+    conn = _history_connection()
+    c = conn.cursor()
+    try:
+        c.execute('DELETE FROM payroll_costs WHERE month = ?', (month,))
+        c.execute(f'''
+            INSERT INTO payroll_costs (month, department, position, employees, payslips, {', '.join(COST_COLUMNS)})
+            SELECT ?, COALESCE(NULLIF(e.department, ''), ?), COALESCE(NULLIF(e.position, ''), ?),
+                   COUNT(DISTINCT p.employee_id), COUNT(*), {amounts}
+            FROM {_history_source(conn, 'payslips')} p
+            LEFT JOIN {_history_source(conn, 'employees')} e ON e.id = p.employee_id
+            WHERE {ending_in}
+            GROUP BY 2, 3
+        ''', (month, UNASSIGNED, UNASSIGNED, *bounds))
+        groups = c.rowcount
+        c.execute(f'''
+            INSERT OR REPLACE INTO payroll_cost_months (month, payslips, last_id, seen_id, payslip_version,
+                                                        closed, data_stamp, built_at)
+            SELECT ?, COUNT(*), COALESCE(MAX(id), 0), (SELECT COALESCE(MAX(id), 0) FROM payslips),
+                   (SELECT version FROM data_versions WHERE name = 'payslips'), ?, ?, CURRENT_TIMESTAMP
+            FROM payslips p WHERE {ending_in}
+        ''', (month, int(closed), data_stamp, *bounds))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return groups
+
+def mark_payroll_cost_months_checked(months, payslip_version):
+    """Records that `months` were found unchanged at `payslip_version`, so they are not checked again for it."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.executemany('UPDATE payroll_cost_months SET payslip_version = ? WHERE month = ?',
+                  [(payslip_version, month) for month in months])
+    conn.commit()
+    conn.close()
+
+def clear_payroll_costs():
+    """Forgets every built month, so the next report builds them again."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('DELETE FROM payroll_costs')
+    c.execute('DELETE FROM payroll_cost_months')
+    conn.commit()
+    conn.close()
+
+def get_payroll_cost_pivot(dimensions, column, first_month, last_month):
+    """
+    Monthly totals of `column` per group of `dimensions` (from
+    COST_DIMENSIONS; none for company totals) in [first_month, last_month],
+    read from payroll_costs:
+    dicts of the dimensions, month, employees, payslips and amount, plus the
+    group's previous month with payslips and its amount (LAG over the
+    group's months, looking one month back before the range).
+    """
+    keys = ', '.join(dimensions) or "''"  # one group for the whole company
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        WITH monthly AS (
+            SELECT {keys}, month, SUM(employees) AS employees, SUM(payslips) AS payslips,
+                   SUM({column}) AS amount
+            FROM payroll_costs
+            WHERE month BETWEEN strftime('%Y-%m', ? || '-01', '-1 month') AND ?
+            GROUP BY {keys}, month
+        ), changes AS (
+            SELECT *, LAG(month) OVER w AS previous_month, LAG(amount) OVER w AS previous_amount
+            FROM monthly
+            WINDOW w AS (PARTITION BY {keys} ORDER BY month)
+        )
+        SELECT * FROM changes WHERE month >= ? ORDER BY {keys}, month
+    ''', (first_month, last_month, first_month))
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+def rebuild_payroll_ytd():
+    """Recomputes payroll_ytd from every payslip, hot and archived. Returns the (employee, year) rows written."""
+    conn = _history_connection()
+    c = conn.cursor()
+    try:
+        rows = _rebuild_payroll_ytd(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return rows
+
+def get_ytd(employee_id, year):
+    """An employee's payroll_ytd row for `year` ('YYYY'), or None before their first payslip of the year."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    row = c.execute('SELECT * FROM payroll_ytd WHERE employee_id = ? AND year = ?',
+                    (employee_id, str(year))).fetchone()
+    conn.close()
+    return row
+
+def get_ytd_before(period_start, employee_id=None, year=None):
+    """
+    Year-to-date totals up to (not including) the period starting on
+    `period_start`, per employee of `year` (default the year of
+    period_start; pass the year the period ends in for a week that crosses
+    into the next): payroll_ytd less the payslips of this and later periods,
+    so recomputing a committed period does not count its own payslip. Reads
+    only those periods' payslips (a range of idx_payslips_period).
+    """
+    year = year or period_start[:4]
+    later = ', '.join(f'SUM({amount}) AS {column}' for amount, column in
+                      zip(_ytd_amounts('p'), YTD_AMOUNT_COLUMNS))
+    remaining = ', '.join(f'y.{column} - COALESCE(l.{column}, 0) AS {column}' for column in YTD_AMOUNT_COLUMNS)
+    params = [period_start, f'{year}-12-31', year, year]
+    where = ''
+    if employee_id is not None:
+        where = 'AND y.employee_id = ?'
+        params.append(employee_id)
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM payslips WHERE employee_id = ? ORDER BY pay_period_end DESC', (employee_id,))
+    rows = c.execute(f'''
+        SELECT y.employee_id, y.payslips - COALESCE(l.payslips, 0) AS payslips, {remaining}
+        FROM payroll_ytd y
+        LEFT JOIN (
+            SELECT p.employee_id, COUNT(*) AS payslips, {later}
+            FROM payslips p
+            WHERE p.pay_period_start BETWEEN ? AND ? AND substr(p.pay_period_end, 1, 4) = ?
+            GROUP BY p.employee_id
+        ) l ON l.employee_id = y.employee_id
+        WHERE y.year = ? {where}
+    ''', params).fetchall()
+    conn.close()
+    return rows
+
+# Statutory amounts the monthly tables apply to, summed over a month's payslips
+MONTH_TO_DATE_COLUMNS = ('gross_pay_centavos', 'sss_centavos', 'philhealth_centavos', 'pagibig_centavos',
+                         'tax_centavos')
+
+def get_month_to_date_before(period_start, period_end, employee_id=None):
+    """
+    Per employee, the MONTH_TO_DATE_COLUMNS totals of their payslips for
+    earlier periods ending in the same calendar month as `period_end` (by
+    period end, as loans are charged), so recomputing a committed period
+    does not count its own payslip. Empty for monthly pay. A range of
+    idx_payslips_period: periods ending in a month start at most six days
+    before it.
+    """
+    month_start = datetime.date.fromisoformat(period_end[:7] + '-01')
+    params = [(month_start - datetime.timedelta(days=7)).isoformat(), period_start,
+              month_start.isoformat(), f'{period_end[:7]}-31']
+    where = ''
+    if employee_id is not None:
+        where = 'AND employee_id = ?'
+        params.append(employee_id)
+    totals = ', '.join(f'COALESCE(SUM({column}), 0) AS {column}' for column in MONTH_TO_DATE_COLUMNS)
+    conn = get_db_connection()
+    c = conn.cursor()
+    rows = c.execute(f'''
+        SELECT employee_id, {totals} FROM payslips
+        WHERE pay_period_start >= ? AND pay_period_start < ? AND pay_period_end BETWEEN ? AND ? {where}
+        GROUP BY employee_id
+    ''', params).fetchall()
+    conn.close()
+    return rows
+
+def get_payslips_by_employee(employee_id):
+    conn = _history_connection()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT * FROM {_history_source(conn, 'payslips')}
+        WHERE employee_id = ? ORDER BY pay_period_end DESC
+    ''', (employee_id,))
     payslips = c.fetchall()
     conn.close()
     return payslips
 
 
+# --- JSON API reads ---
+# Keyset pages for web/api.py: each reader returns up to `limit` rows after
+# the previous page's last key, as plain tuples that start with the key and
+# go on with the requested `columns`. Column names come from API_FIELDS
+# (the API checks them before they reach SQL); id lists are bound as one
+# JSON array parameter, so a bulk fetch is one query of any length.
+API_FIELDS = {
+    'employees': tuple(EMPLOYEE_COLUMNS.split(', ')),
+    'time_records': ('id', 'employee_id', 'date', 'hours_worked', 'overtime_hours'),
+    'payslips': ('id', 'employee_id', 'pay_period_start', 'pay_period_end', 'created_at')
+                + tuple(PAYSLIP_CENTAVO_COLUMNS.values()),
+    'leave_requests': ('id', 'employee_id', 'leave_type', 'start_date', 'end_date', 'reason', 'status'),
+}
+
+def _id_filters(ids=None, employee_ids=None):
+    where, params = [], []
+    if ids is not None:
+        where.append('id IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(list(ids)))
+    if employee_ids is not None:
+        where.append('employee_id IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(list(employee_ids)))
+    return where, params
+
+def _read_page(conn, source, key, columns, where, params, after, limit):
+    c = conn.cursor()
+    c.row_factory = None
+    if after is not None:
+        where = where + [f'({key}) > ({", ".join("?" * len(after))})']
+        params = params + list(after)
+    c.execute(f'''
+        SELECT {key}, {', '.join(columns)} FROM {source}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {key} LIMIT ?
+    ''', params + [limit])
+    return c.fetchall()
+
+def get_employees_page(columns, ids=None, include_archived=False, after=None, limit=100):
+    """
+    Employees by id: (id, *columns) tuples. Inactive employees, and those
+    moved to the archive database, only with include_archived.
+    """
+    where, params = _id_filters(ids)
+    if include_archived:
+        conn = _history_connection()
+        source = _history_source(conn, 'employees')
+    else:
+        conn = get_db_connection()
+        source = 'employees'
+        where.append('is_active = 1')
+    rows = _read_page(conn, source, 'id', columns, where, params, after, limit)
+    conn.close()
+    return rows
+
+def get_payslips_page(columns, ids=None, employee_ids=None, start=None, end=None, after=None, limit=100):
+    """
+    Payslips by id, archived ones included: (id, *columns) tuples. start and
+    end select by pay_period_end, as the remittance reports do.
+    """
+    where, params = _id_filters(ids, employee_ids)
+    if start is not None:
+        where.append('pay_period_end >= ?')
+        params.append(start)
+    if end is not None:
+        where.append('pay_period_end <= ?')
+        params.append(end)
+    conn = _history_connection()
+    rows = _read_page(conn, _history_source(conn, 'payslips'), 'id', columns, where, params, after, limit)
+    conn.close()
+    return rows
+
+def get_leave_requests_page(columns, ids=None, employee_ids=None, status=None, after=None, limit=100):
+    """Leave requests by id: (id, *columns) tuples, optionally of one status."""
+    where, params = _id_filters(ids, employee_ids)
+    if status is not None:
+        where.append('status = ?')
+        params.append(status)
+    conn = get_db_connection()
+    rows = _read_page(conn, 'leave_requests', 'id', columns, where, params, after, limit)
+    conn.close()
+    return rows
+
+def get_time_records_page(columns, employee_ids=None, start=None, end=None, after=None, limit=100):
+    """
+    Time records by (employee_id, date, id), archived and compacted days
+    included: (employee_id, date, id, *columns) tuples. Compacted summaries
+    are walked in the same order and expanded only until the page is full,
+    so a page costs a few blobs however much history was compacted.
+    """
+    where, params = _id_filters(employee_ids=employee_ids)
+    if start is not None:
+        where.append('date >= ?')
+        params.append(start)
+    if end is not None:
+        where.append('date <= ?')
+        params.append(end)
+    conn = _history_connection()
+    rows = _read_page(conn, _history_source(conn, 'time_records'), 'employee_id, date, id', columns,
+                      where, params, after, limit)
+
+    summary_where, summary_params = _id_filters(employee_ids=employee_ids)
+    if start is not None:
+        summary_where.append('period_end >= ?')
+        summary_params.append(start)
+    if end is not None:
+        summary_where.append('period_start <= ?')
+        summary_params.append(end)
+    if after is not None:
+        summary_where.append('(employee_id, period_end) >= (?, ?)')
+        summary_params += list(after[:2])
+    c = conn.cursor()
+    c.row_factory = None
+    c.execute(f'''
+        SELECT employee_id, period_start, detail FROM time_record_summaries
+        {'WHERE ' + ' AND '.join(summary_where) if summary_where else ''}
+        ORDER BY employee_id, period_start
+    ''', summary_params)
+    for employee_id, period_start, detail in c:
+        if len(rows) >= limit and (employee_id, period_start) > tuple(rows[limit - 1][:2]):
+            break  # every later summary sorts after the page's last row
+        expanded = [(record['employee_id'], record['date'], record['id'], *(record[name] for name in columns))
+                    for record in _expand_detail(detail)
+                    if (start is None or record['date'] >= start) and (end is None or record['date'] <= end)]
+        rows = sorted(rows + [row for row in expanded if after is None or row[:3] > tuple(after)])[:limit]
+    conn.close()
+    return rows
+
+def get_existing_employee_ids(employee_ids):
+    """The subset of `employee_ids` that name an employee, archived or not."""
+    conn = _history_connection()
+    c = conn.cursor()
+    c.row_factory = None
+    c.execute(f'SELECT id FROM {_history_source(conn, "employees")} WHERE id IN (SELECT value FROM json_each(?))',
+              (json.dumps(list(employee_ids)),))
+    existing = {row[0] for row in c.fetchall()}
+    conn.close()
+    return existing
+
+
 if __name__ == '__main__':
     # This initializes the database when models.py is run directly
     print("Initializing database...")
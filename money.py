@@ -0,0 +1,85 @@
+"""
+Fixed-point money helpers.
+
+All payroll amounts are integers in centavos (1 peso = 100 centavos) and
+hours are integers in hundredths of an hour. Rates are exact Fractions.
+
+Rounding rules:
+- Converting a peso amount or an hour count to fixed point rounds half away
+  from zero on its decimal representation (1.005 -> 101 centavos).
+- Multiplying by a rate rounds half away from zero once, on the exact
+  product (no intermediate float), e.g. 4.5% of 1,234.57 -> 55.56.
+- Sums are never rounded: integers add exactly.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+CENTAVOS_PER_PESO = 100
+HOUR_SCALE = 100  # hours are stored as hundredths of an hour
+
+def _scaled(value, scale):
+    """Converts a number (float, str, Decimal or int) to an int of value * scale, half-up."""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * scale
+    if isinstance(value, float):
+        # Fast path: away from a .5 tie, float rounding already gives the half-up answer
+        approx = value * scale
+        nearest = round(approx)
+        if abs(approx - nearest) < 0.49:
+            return int(nearest)
+        value = repr(value)  # shortest round-tripping decimal, e.g. 1.005 -> '1.005'
+    exact = Decimal(value) * scale
+    return int(exact.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def to_centavos(amount):
+    """Converts a peso amount to integer centavos (None and '' count as zero)."""
+    return _scaled(amount, CENTAVOS_PER_PESO)
+
+def to_hundredths(hours):
+    """Converts an hour count to integer hundredths of an hour."""
+    return _scaled(hours, HOUR_SCALE)
+
+def to_pesos(centavos):
+    """Converts centavos to a float peso amount, for display and legacy REAL columns."""
+    return centavos / CENTAVOS_PER_PESO
+
+def rate(value):
+    """Returns value as an exact Fraction; floats are read as the decimal they print as."""
+    if isinstance(value, Fraction):
+        return value
+    if isinstance(value, float):
+        value = repr(value)
+    return Fraction(value)
+
+def div_round(numerator, denominator):
+    """Integer division rounded half away from zero. `denominator` must be positive."""
+    quotient = (2 * abs(numerator) + denominator) // (2 * denominator)
+    return quotient if numerator >= 0 else -quotient
+
+def apply_rate(centavos, rate_value):
+    """Multiplies an amount by a rate, rounding the exact product once."""
+    r = rate(rate_value)
+    return div_round(centavos * r.numerator, r.denominator)
+
+def format_centavos(centavos):
+    """Formats centavos as '1,234.56' without going through float."""
+    sign = '-' if centavos < 0 else ''
+    whole, cents = divmod(abs(int(centavos)), CENTAVOS_PER_PESO)
+    return f"{sign}{whole:,}.{cents:02d}"
+
+# --- NumPy counterparts (arrays of int64) ---
+# NumPy is imported on first use: their callers already hold arrays, and
+# everything else that imports money (the web app, the CLI) never loads it.
+
+def div_round_array(numerator, denominator):
+    """Vectorized div_round over int64 arrays (denominator may be an array too)."""
+    import numpy as np
+    quotient = (2 * np.abs(numerator) + denominator) // (2 * denominator)
+    return np.where(numerator >= 0, quotient, -quotient)
+
+def apply_rate_array(centavos, rate_value):
+    """Vectorized apply_rate for a single rate."""
+    r = rate(rate_value)
+    return div_round_array(centavos * r.numerator, r.denominator)
@@ -0,0 +1,370 @@
+"""
+Headless payroll command line, for scripted and cron-driven runs.
+
+    python -m payroll run --period 2026-10 --workers 8
+    python -m payroll pdf --period 2026-10 -o payslips/ --workers 8
+    python -m payroll export bank fixed --start 2026-10-01 --end 2026-10-31 -o credits.txt
+    python -m payroll export remittances 2026-10 -o reports/
+    python -m payroll import time-records october.csv
+    python -m payroll rebuild all
+
+`run` and `pdf` take --period YYYY-MM (a month-end run: every pay period of
+each frequency that ends in the month) or --date YYYY-MM-DD (each
+frequency's period containing the date); without either, today's periods.
+--workers spreads the payroll calculation, and the PDF rendering, over
+that many processes.
+
+Only models, utils and the services are loaded, never the web app.
+Progress goes to stderr (-q silences it). --json PATH (or - for stdout)
+writes a summary with the timing of every step. The exit code is 0 on
+success, 1 if the command failed and 2 for a usage error.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import models
+from services import bank_files, leave_accrual, pay_periods, remittances
+from utils import TAX_MODES, calculate_payroll_batch
+
+IMPORT_BATCH = 5000  # time records per transaction
+
+
+class CommandError(Exception):
+    """A failure to report on stderr and exit with status 1."""
+
+
+class Summary:
+    """Timing and counts of one command, for --json."""
+
+    def __init__(self, command, quiet=False):
+        self.command = command
+        self.quiet = quiet
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._started = time.perf_counter()
+        self.steps = []
+
+    def progress(self, message):
+        if not self.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    def step(self, name, seconds, **counts):
+        self.steps.append({'step': name, 'seconds': round(seconds, 3), **counts})
+
+    def as_dict(self, exit_code, error=None):
+        return {'command': self.command, 'ok': exit_code == 0, 'exit_code': exit_code, 'error': error,
+                'started_at': self.started_at, 'seconds': round(time.perf_counter() - self._started, 3),
+                'steps': self.steps}
+
+
+# --- Periods ---
+
+def _month(value):
+    try:
+        parsed = datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a month (YYYY-MM)')
+    return parsed.year, parsed.month
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a date (YYYY-MM-DD)')
+
+
+def _periods(args, frequency):
+    """The periods a run or PDF batch covers for one pay frequency."""
+    if args.period:
+        return pay_periods.periods_ending_in(*args.period, frequency)
+    return [pay_periods.current_period(frequency, args.date)]
+
+
+# --- Parallel calculation ---
+
+def _init_worker(database):
+    models.DATABASE = database
+
+
+def _calculate_chunk(chunk, start_date, end_date, tax_mode):
+    return calculate_payroll_batch(chunk, start_date, end_date, tax_mode=tax_mode)
+
+
+def _chunks(items, count):
+    size = -(-len(items) // count) or 1
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _calculator(pool, workers):
+    """calculate_payroll_batch, split over the pool's processes when there is more than one worker."""
+    if pool is None:
+        return calculate_payroll_batch
+
+    def calculate(employees, start_date, end_date, tax_mode='period'):
+        chunks = _chunks(employees, workers)
+        results = pool.map(_calculate_chunk, chunks, [start_date] * len(chunks), [end_date] * len(chunks),
+                           [tax_mode] * len(chunks))
+        return [payroll for chunk in results for payroll in chunk]
+    return calculate
+
+
+def _pool(workers):
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(models.DATABASE,))
+
+
+# --- Commands ---
+
+def cmd_run(args, summary):
+    pool = _pool(args.workers)
+    try:
+        def progress(run):
+            summary.progress(f'{run.period.frequency:<13}{run.period.start_date} to {run.period.end_date}: '
+                             f'{run.payslips_created}/{run.employees} payslips, '
+                             f'{run.loan_payments_posted} loan payments, {run.seconds:.2f}s')
+            summary.step(f'{run.period.frequency} {run.period.start_date}', run.seconds,
+                         employees=run.employees, payslips=run.payslips_created,
+                         loan_payments=run.loan_payments_posted)
+
+        runs = pay_periods.run_payroll(today=args.date, month=args.period, tax_mode=args.tax_mode,
+                                       leave_accruals=leave_accrual.MONTHLY_ENTITLEMENTS,
+                                       calculate=_calculator(pool, args.workers), progress=progress)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    created = sum(run.payslips_created for run in runs)
+    summary.progress(f'{created} payslips created in {len(runs)} batches')
+    if args.sync_store:
+        from services import payslip_store
+        if payslip_store.numpy_available():
+            started = time.perf_counter()
+            result = payslip_store.sync()
+            summary.step('payslip store', time.perf_counter() - started, **result)
+
+
+def _render_pdf(employee, payroll, start_date, end_date, path):
+    from services.pdf_generator import create_pdf_from_payroll_data  # loads ReportLab
+    pdf = create_pdf_from_payroll_data(employee, payroll, start_date, end_date)
+    with open(path, 'wb') as f:
+        f.write(pdf)
+    return len(pdf)
+
+
+def cmd_pdf(args, summary):
+    os.makedirs(args.output, exist_ok=True)
+    pool = _pool(args.workers)
+    try:
+        for frequency, members in pay_periods.group_by_frequency(models.get_employees()).items():
+            for period in _periods(args, frequency):
+                started = time.perf_counter()
+                payrolls = calculate_payroll_batch(members, period.start_date, period.end_date,
+                                                   tax_mode=args.tax_mode)
+                jobs = [(emp, payroll, period.start_date, period.end_date,
+                         os.path.join(args.output, f'payslip_{emp.id}_{period.start_date}_{period.end_date}.pdf'))
+                        for emp, payroll in zip(members, payrolls)]
+                if pool is None:
+                    sizes = [_render_pdf(*job) for job in jobs]
+                else:
+                    sizes = list(pool.map(_render_pdf, *zip(*jobs), chunksize=16))
+                seconds = time.perf_counter() - started
+                summary.progress(f'{frequency:<13}{period.start_date} to {period.end_date}: '
+                                 f'{len(sizes)} PDFs, {seconds:.2f}s')
+                summary.step(f'{frequency} {period.start_date}', seconds, pdfs=len(sizes), bytes=sum(sizes))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def cmd_export_bank(args, summary):
+    period = pay_periods.company_period()
+    start_date = args.start or period.start_date
+    end_date = args.end or period.end_date
+    totals = bank_files.ControlTotals()
+    started = time.perf_counter()
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        for line in bank_files.generate(args.format, start_date, end_date, totals):
+            out.write(line)
+    finally:
+        if args.output:
+            out.close()
+    summary.progress(f'{totals.count} credits, {totals.skipped} payslips skipped')
+    summary.step('bank file', time.perf_counter() - started, **totals.as_dict())
+    if not totals.count:
+        raise CommandError(f'No payslips to pay for {start_date} to {end_date}')
+
+
+def cmd_export_remittances(args, summary):
+    months = [args.period] if '-' in args.period else [f'{args.period}-{m:02d}' for m in range(1, 13)]
+    agencies = [args.agency] if args.agency else list(remittances.AGENCIES)
+    os.makedirs(args.output, exist_ok=True)
+    for month in months:
+        started = time.perf_counter()
+        size = 0
+        for agency in agencies:
+            path = os.path.join(args.output, remittances.filename(agency, month, args.fmt))
+            with open(path, 'wb') as f:
+                for chunk in remittances.report(agency, month, args.fmt):
+                    f.write(chunk)
+                    size += len(chunk)
+        seconds = time.perf_counter() - started
+        summary.progress(f'{month}: {len(agencies)} {args.fmt} reports, {size} bytes, {seconds:.2f}s')
+        summary.step(month, seconds, reports=len(agencies), bytes=size)
+
+
+def _read_time_records(path):
+    """Parses a CSV of employee_id,date,hours_worked[,overtime_hours]. Raises CommandError listing bad rows."""
+    records, errors = [], []
+    with open(path, newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            try:
+                record = (int(row['employee_id']), date.fromisoformat(row['date']).isoformat(),
+                          float(row['hours_worked']), float(row.get('overtime_hours') or 0))
+            except (KeyError, TypeError, ValueError):
+                errors.append(line)
+                continue
+            if record[2] < 0 or record[3] < 0:
+                errors.append(line)
+                continue
+            records.append(record)
+    if errors:
+        shown = ', '.join(map(str, errors[:10])) + (' ...' if len(errors) > 10 else '')
+        raise CommandError(f'{len(errors)} invalid rows in {path} (lines {shown}); nothing was imported')
+    return records
+
+
+def cmd_import_time_records(args, summary):
+    started = time.perf_counter()
+    records = _read_time_records(args.file)
+    summary.step('parse', time.perf_counter() - started, rows=len(records))
+    started = time.perf_counter()
+    imported = 0
+    for i in range(0, len(records), IMPORT_BATCH):
+        imported += len(models.add_time_records(records[i:i + IMPORT_BATCH]))
+        summary.progress(f'{imported}/{len(records)} time records imported')
+    summary.step('insert', time.perf_counter() - started, rows=imported)
+
+
+def _rebuild_payslip_store():
+    from services import payslip_store
+    if not payslip_store.numpy_available():
+        raise CommandError('The payslip store requires NumPy (pip install numpy).')
+    return payslip_store.sync()
+
+
+REBUILDS = {
+    'ytd': lambda: {'rows': models.rebuild_payroll_ytd()},
+    'leave': lambda: dict(zip(('accruals', 'consumptions'), leave_accrual.rebuild())),
+    'payslip-store': _rebuild_payslip_store,
+}
+
+
+def cmd_rebuild(args, summary):
+    for name in REBUILDS if args.what == 'all' else [args.what]:
+        started = time.perf_counter()
+        counts = REBUILDS[name]()
+        seconds = time.perf_counter() - started
+        summary.progress(f'{name} rebuilt in {seconds:.2f}s: {counts}')
+        summary.step(name, seconds, **counts)
+
+
+def cmd_init(args, summary):
+    started = time.perf_counter()
+    models.init_db()
+    summary.step('init_db', time.perf_counter() - started)
+    summary.progress(f'{models.DATABASE} is up to date')
+
+
+# --- Entry point ---
+
+def _add_period_options(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--period', type=_month, help='YYYY-MM: every pay period ending in the month')
+    group.add_argument('--date', type=_date, help="YYYY-MM-DD: each frequency's period containing the date")
+    parser.add_argument('--workers', type=int, default=1, help='Processes to spread the work over')
+    parser.add_argument('--tax-mode', choices=TAX_MODES, default='period')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m payroll', description='Run payroll jobs without the web app.')
+    parser.add_argument('--database', help=f'SQLite database (default: {models.DATABASE})')
+    parser.add_argument('--json', dest='json_path', help='Write a JSON summary to this path (- for stdout)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No progress output')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Process payroll, one batch per pay frequency')
+    _add_period_options(run)
+    run.add_argument('--sync-store', action='store_true', help='Update the columnar payslip store afterwards')
+    run.set_defaults(handler=cmd_run)
+
+    pdf = commands.add_parser('pdf', help='Write a payslip PDF per employee')
+    _add_period_options(pdf)
+    pdf.add_argument('-o', '--output', required=True, help='Folder for the PDFs')
+    pdf.set_defaults(handler=cmd_pdf)
+
+    export = commands.add_parser('export', help='Bank credit files and remittance reports')
+    exports = export.add_subparsers(dest='export', required=True)
+    bank = exports.add_parser('bank', help='Bank payroll-credit file for a pay period')
+    bank.add_argument('format', choices=sorted(bank_files.FORMATS))
+    bank.add_argument('--start', help='Period start (default: this month)')
+    bank.add_argument('--end', help='Period end (default: this month)')
+    bank.add_argument('-o', '--output', help='File to write (default: stdout)')
+    bank.set_defaults(handler=cmd_export_bank)
+    remit = exports.add_parser('remittances', help='Government remittance reports')
+    remit.add_argument('period', help='YYYY-MM, or YYYY for the whole year')
+    remit.add_argument('--agency', choices=sorted(remittances.AGENCIES), help='Default: every agency')
+    remit.add_argument('--format', dest='fmt', choices=sorted(remittances.FORMATS), default='csv')
+    remit.add_argument('-o', '--output', required=True, help='Folder for the reports')
+    remit.set_defaults(handler=cmd_export_remittances)
+
+    imports = commands.add_parser('import', help='Load data from files')
+    importers = imports.add_subparsers(dest='import_kind', required=True)
+    time_records = importers.add_parser('time-records', help='CSV: employee_id,date,hours_worked[,overtime_hours]')
+    time_records.add_argument('file')
+    time_records.set_defaults(handler=cmd_import_time_records)
+
+    rebuild = commands.add_parser('rebuild', help='Recompute derived tables')
+    rebuild.add_argument('what', choices=sorted(REBUILDS) + ['all'])
+    rebuild.set_defaults(handler=cmd_rebuild)
+
+    init = commands.add_parser('init', help='Create or migrate the database')
+    init.set_defaults(handler=cmd_init)
+    return parser
+
+
+def _write_summary(path, report):
+    if path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif path:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.database:
+        models.DATABASE = args.database
+    summary = Summary(' '.join(sys.argv[1:] if argv is None else argv), quiet=args.quiet)
+    exit_code, error = 0, None
+    try:
+        if args.handler is not cmd_init:
+            models.init_db()
+        args.handler(args, summary)
+    except (CommandError, ValueError, OSError, sqlite3.Error) as e:
+        exit_code, error = 1, str(e)
+        print(f'error: {e}', file=sys.stderr)
+    _write_summary(args.json_path, summary.as_dict(exit_code, error))
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Compact, immutable record types for employees and payroll results.
+
+Roster pages hold one Employee and one PayrollResult per employee, so both
+are slotted dataclasses: no per-instance __dict__, and payroll amounts are
+stored once, as integer centavos. Peso floats are computed on access.
+"""
+from dataclasses import dataclass, fields
+
+from money import to_pesos, HOUR_SCALE
+
+
+@dataclass(frozen=True, slots=True)
+class Employee:
+    id: int
+    name: str
+    position: str = None
+    department: str = None
+    salary: float = None
+    payroll_period: str = None
+    date_hired: str = None
+    photo: str = None
+    hourly_rate: float = None
+    contact_number: str = None
+    address: str = None
+    bank_account_number: str = None
+    sss_number: str = None
+    philhealth_number: str = None
+    pagibig_number: str = None
+    tin_number: str = None
+    date_resigned: str = None
+    is_active: int = 1
+
+    @staticmethod
+    def row_factory(cursor, row):
+        """sqlite3 row factory for queries that SELECT EMPLOYEE_COLUMNS, in order."""
+        return Employee(*row)
+
+
+# Column list for SELECTs read with Employee.row_factory. Named explicitly so
+# databases whose columns were added in a different order still line up.
+EMPLOYEE_COLUMNS = ', '.join(f.name for f in fields(Employee))
+
+
+def _pesos(centavo_field):
+    return property(lambda self: to_pesos(getattr(self, centavo_field)))
+
+
+@dataclass(frozen=True, slots=True)
+class PayrollResult:
+    """One employee's payroll for a period, as computed by utils.compute_payroll."""
+    gross_pay_centavos: int
+    regular_pay_centavos: int
+    overtime_pay_centavos: int
+    leave_pay_centavos: int
+    sss_centavos: int
+    philhealth_centavos: int
+    pagibig_centavos: int
+    tax_centavos: int
+    loan_deductions_centavos: int
+    total_deductions_centavos: int
+    net_salary_centavos: int
+    regular_hundredths: int = 0
+    overtime_hundredths: int = 0
+    paid_leave_days: int = 0
+    unpaid_leave_days: int = 0
+
+    # Peso amounts for display (float); the centavo fields are authoritative
+    gross_pay = _pesos('gross_pay_centavos')
+    salary = gross_pay
+    regular_pay = _pesos('regular_pay_centavos')
+    overtime_pay = _pesos('overtime_pay_centavos')
+    leave_pay = _pesos('leave_pay_centavos')
+    sss = _pesos('sss_centavos')
+    philhealth = _pesos('philhealth_centavos')
+    pagibig = _pesos('pagibig_centavos')
+    tax = _pesos('tax_centavos')
+    loan_deductions = _pesos('loan_deductions_centavos')
+    total_deductions = _pesos('total_deductions_centavos')
+    net_salary = _pesos('net_salary_centavos')
+
+    @property
+    def total_regular_hours(self):
+        return self.regular_hundredths / HOUR_SCALE
+
+    @property
+    def total_overtime_hours(self):
+        return self.overtime_hundredths / HOUR_SCALE
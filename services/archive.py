@@ -0,0 +1,126 @@
+"""
+Cold-data archival: moves old history out of the hot tables.
+
+archive() moves time records and payslips older than a cutoff, and
+employees who resigned before it, into the archive database beside
+DATABASE (models.archive_history). Payroll for open periods, the lists and
+every scan then only read recent rows; the history views (an employee's
+payslips and attendance, get_employee_by_id) read both databases through
+ATTACH and UNION ALL, so nothing disappears from them.
+
+The cutoff must be on or before the first day of the current month, so only
+closed periods move. A report of the hot database is taken before and after:
+
+    rows        per archived table
+    file_bytes  database file plus its write-ahead log
+    *_ms        median time of queries that read the hot tables
+
+From the command line:
+
+    python -m services.archive --before 2025-01-01 --vacuum
+    python -m services.archive --report
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+import models
+import utils
+
+LATENCY_RUNS = 5
+
+
+def default_cutoff(today=None):
+    """January 1st of last year: the current and previous year stay hot."""
+    return date((today or date.today()).year - 1, 1, 1).isoformat()
+
+
+def check_cutoff(before, today=None):
+    """Raises ValueError unless `before` is a date on or before the first day of this month."""
+    cutoff = date.fromisoformat(before)
+    if cutoff > (today or date.today()).replace(day=1):
+        raise ValueError(f'{before} is in an open period; the cutoff must be on or before the 1st of this month')
+    return cutoff.isoformat()
+
+
+def _file_bytes(path):
+    return sum(os.path.getsize(p) for p in (path, f'{path}-wal') if os.path.exists(p))
+
+
+def _median_ms(func):
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def measure(employee_id=None):
+    """Row counts, file size and query latencies of the hot database."""
+    today = date.today()
+    period = (today.replace(day=1).isoformat(), today.isoformat())
+    if employee_id is None:
+        employee_id = next(iter(models.get_employee_choices()), (None,))[0]
+    report = {'rows': models.count_rows(models.ARCHIVE_TABLES), 'file_bytes': _file_bytes(models.DATABASE)}
+    report['payroll_ms'] = _median_ms(lambda: utils.calculate_payroll_by_employee(*period))
+    report['all_hours_ms'] = _median_ms(lambda: models.get_period_hours('0000-01-01', '9999-12-31'))
+    if employee_id is not None:
+        report['history_ms'] = _median_ms(lambda: (models.get_payslips_by_employee(employee_id),
+                                                   models.get_time_records(employee_id, '0000-01-01', '9999-12-31')))
+    return report
+
+
+def archive(before, vacuum=False, today=None):
+    """Moves history older than `before` to the archive. Returns {'moved', 'before', 'after'}."""
+    before = check_cutoff(before, today)
+    employee_id = next(iter(models.get_employee_choices()), (None,))[0]
+    report = {'cutoff': before, 'before': measure(employee_id)}
+    report['moved'] = models.archive_history(before)
+    if vacuum:
+        models.vacuum()
+    report['after'] = measure(employee_id)
+    report['archive_bytes'] = _file_bytes(models.archive_path())
+    return report
+
+
+def _print_measurements(columns):
+    names = list(next(iter(columns.values())))
+    print(f"{'':<22}" + ''.join(f'{label:>14}' for label in columns))
+    for name in names:
+        values = [m.get(name) for m in columns.values()]
+        if name == 'rows':
+            for table in values[0]:
+                print(f"{table + ' rows':<22}" + ''.join(f'{v[table]:>14}' for v in values))
+        else:
+            print(f'{name:<22}' + ''.join(f"{'' if v is None else v:>14}" for v in values))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move old history into the archive database.')
+    parser.add_argument('--before', default=None, help='Cutoff date YYYY-MM-DD (default: Jan 1st of last year)')
+    parser.add_argument('--vacuum', action='store_true', help='Shrink the hot database file afterwards')
+    parser.add_argument('--report', action='store_true', help='Only report the hot database; move nothing')
+    args = parser.parse_args(argv)
+
+    models.init_db()
+    if args.report:
+        _print_measurements({'hot': measure()})
+        return 0
+    try:
+        report = archive(args.before or default_cutoff(), vacuum=args.vacuum)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    moved = ', '.join(f'{count} {table}' for table, count in report['moved'].items())
+    print(f"Archived rows before {report['cutoff']}: {moved} -> {models.archive_path()}")
+    _print_measurements({'before': report['before'], 'after': report['after']})
+    print(f"archive file: {report['archive_bytes']} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
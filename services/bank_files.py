@@ -0,0 +1,246 @@
+"""
+Bank payroll-credit (disbursement) files from committed payslips.
+
+generate() yields the lines of an upload file for one pay period: a header,
+one credit per payslip that has a bank account and something to pay, and a
+trailer with the control totals. Payslips stream from the database cursor
+and every line is yielded as soon as it is built, so memory stays flat
+however many employees are paid.
+
+Control totals, written in the trailer and collected in a ControlTotals:
+
+    count       credits in the file
+    total       sum of the amounts, in centavos
+    hash_total  sum of the account numbers, modulo 10**15. Banks recompute it
+                to catch an altered account number, which the amount total
+                alone would not reveal.
+    skipped     payslips left out (no bank account, or nothing to pay)
+
+Formats are templates in FORMATS: a FixedWidthFormat is a list of Fields
+per record type, a CsvFormat a list of columns. Add one with
+register_format(). Fixed-width text is transliterated to ASCII ('Peña' ->
+'Pena') before it is padded, so every column is as many bytes as
+characters. A value that does not fit its field raises ValueError; run
+validate() first wherever a partly written file cannot be taken back (a
+streamed download, the output file). From the command line:
+
+    python -m services.bank_files fixed 2026-10-01 2026-10-31 -o credits.txt
+"""
+import argparse
+import csv
+import io
+import sys
+import unicodedata
+from dataclasses import dataclass
+from datetime import date
+
+import models
+
+COMPANY_CODE = 'PAYROLL'
+HASH_MODULUS = 10 ** 15
+
+
+def _amount(centavos):
+    """Centavos as a plain decimal string, '1234.56': no separators, as banks expect."""
+    return f'{centavos // 100}.{centavos % 100:02d}'
+
+
+def account_digits(account_number):
+    """An account number with spaces, dashes and other punctuation removed."""
+    return ''.join(ch for ch in account_number or '' if '0' <= ch <= '9')
+
+
+def ascii_text(text):
+    """`text` in ASCII: accents dropped ('Ñ' -> 'N'), anything else without an ASCII form as '?'."""
+    return ''.join(ch if ch.isascii() else '?' for ch in unicodedata.normalize('NFKD', text)
+                   if ch.isascii() or not unicodedata.combining(ch))
+
+
+class ControlTotals:
+    """Running totals of the credits written to one file."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.hash_total = 0
+        self.skipped = 0
+
+    def add(self, account, amount):
+        self.count += 1
+        self.total += amount
+        self.hash_total = (self.hash_total + int(account)) % HASH_MODULUS
+
+    def as_dict(self):
+        return {'count': self.count, 'total': self.total, 'total_amount': _amount(self.total),
+                'hash_total': self.hash_total, 'skipped': self.skipped}
+
+
+# --- Fixed-width templates ---
+
+@dataclass(frozen=True)
+class Field:
+    """One fixed-width column: numeric fields are zero-filled on the left, text is space-padded on the right."""
+    name: str
+    width: int
+    numeric: bool = False
+    value: str = None  # constant text, e.g. the record type
+
+    def render(self, values):
+        if self.value is not None:
+            text = self.value
+        else:
+            value = values[self.name]
+            text = '' if value is None else str(value)
+        if self.numeric:
+            if len(text) > self.width:
+                raise ValueError(f'{self.name} {text} does not fit in {self.width} digits')
+            return text.rjust(self.width, '0')
+        return ascii_text(text)[:self.width].ljust(self.width)
+
+
+class FixedWidthFormat:
+    extension = 'txt'
+    mimetype = 'text/plain'
+
+    def __init__(self, header, detail, trailer, line_end='\r\n'):
+        self.header_fields = header
+        self.detail_fields = detail
+        self.trailer_fields = trailer
+        self.line_end = line_end
+
+    def _line(self, fields, values):
+        return ''.join(field.render(values) for field in fields) + self.line_end
+
+    def header(self, batch):
+        return self._line(self.header_fields, batch)
+
+    def detail(self, credit):
+        return self._line(self.detail_fields, credit)
+
+    def trailer(self, totals):
+        return self._line(self.trailer_fields, totals.as_dict())
+
+
+class CsvFormat:
+    extension = 'csv'
+    mimetype = 'text/csv'
+
+    def __init__(self, columns, trailer_label='TOTAL'):
+        self.columns = columns  # [(heading, credit field)]
+        self.trailer_label = trailer_label
+
+    def _row(self, values):
+        out = io.StringIO()
+        csv.writer(out).writerow(values)
+        return out.getvalue()
+
+    def header(self, batch):
+        return self._row([heading for heading, _ in self.columns])
+
+    def detail(self, credit):
+        return self._row([credit[name] for _, name in self.columns])
+
+    def trailer(self, totals):
+        return self._row([self.trailer_label, totals.count, _amount(totals.total), totals.hash_total])
+
+
+FORMATS = {
+    # 80-column records: H(eader), D(etail) per credit, T(railer) with control totals
+    'fixed': FixedWidthFormat(
+        header=[Field('record_type', 1, value='H'), Field('company_code', 10), Field('batch_date', 8, numeric=True),
+                Field('period_start', 8, numeric=True), Field('period_end', 8, numeric=True), Field('filler', 45, value='')],
+        detail=[Field('record_type', 1, value='D'), Field('sequence', 6, numeric=True),
+                Field('account', 16, numeric=True), Field('amount', 15, numeric=True),
+                Field('employee_id', 8, numeric=True), Field('name', 34)],
+        trailer=[Field('record_type', 1, value='T'), Field('count', 6, numeric=True),
+                 Field('total', 18, numeric=True), Field('hash_total', 15, numeric=True), Field('filler', 40, value='')],
+    ),
+    'csv': CsvFormat([('Sequence', 'sequence'), ('Account Number', 'account'), ('Account Name', 'name'),
+                      ('Amount', 'amount_pesos'), ('Employee ID', 'employee_id')]),
+}
+
+
+def register_format(name, bank_format):
+    """Adds an upload format: anything with extension, mimetype, header(), detail() and trailer()."""
+    FORMATS[name] = bank_format
+
+
+def generate(format_name, period_start, period_end, totals=None, batch_date=None, company_code=COMPANY_CODE):
+    """
+    Yields the lines of a `format_name` upload file for the payslips of
+    [period_start, period_end]. Pass a ControlTotals as `totals` to read the
+    counts once the file has been consumed.
+    """
+    bank_format = FORMATS[format_name]
+    totals = totals if totals is not None else ControlTotals()
+    batch_date = batch_date or date.today().isoformat()
+    yield bank_format.header({
+        'company_code': company_code,
+        'batch_date': batch_date.replace('-', ''),
+        'period_start': period_start.replace('-', ''),
+        'period_end': period_end.replace('-', ''),
+    })
+    for row in models.iter_period_credits(period_start, period_end):
+        account = account_digits(row['bank_account_number'])
+        amount = row['net_pay_centavos'] or 0
+        if not account or amount <= 0:
+            totals.skipped += 1
+            continue
+        totals.add(account, amount)
+        try:
+            line = bank_format.detail({
+                'sequence': totals.count,
+                'account': account,
+                'amount': amount,
+                'amount_pesos': _amount(amount),
+                'employee_id': row['employee_id'],
+                'name': row['name'],
+            })
+        except ValueError as e:
+            raise ValueError(f"{row['name']} (employee {row['employee_id']}): {e}") from e
+        yield line
+    yield bank_format.trailer(totals)
+
+
+def validate(format_name, period_start, period_end, batch_date=None, company_code=COMPANY_CODE):
+    """
+    Builds the whole file once and discards it, so a value that does not fit
+    the format raises ValueError before any of the file has been sent.
+    Returns the ControlTotals.
+    """
+    totals = ControlTotals()
+    for _ in generate(format_name, period_start, period_end, totals, batch_date, company_code):
+        pass
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a bank payroll-credit file for a pay period.')
+    parser.add_argument('format', choices=sorted(FORMATS))
+    parser.add_argument('period_start', help='YYYY-MM-DD')
+    parser.add_argument('period_end', help='YYYY-MM-DD')
+    parser.add_argument('-o', '--output', help='File to write (default: stdout)')
+    args = parser.parse_args(argv)
+
+    models.init_db()
+    try:
+        validate(args.format, args.period_start, args.period_end)
+    except ValueError as e:
+        print(f'Cannot write the bank file: {e}', file=sys.stderr)
+        return 1
+    totals = ControlTotals()
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        for line in generate(args.format, args.period_start, args.period_end, totals):
+            out.write(line)
+    finally:
+        if args.output:
+            out.close()
+    summary = totals.as_dict()
+    print(f"{summary['count']} credits, total {summary['total_amount']}, hash total {summary['hash_total']}, "
+          f"{summary['skipped']} payslips skipped", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Time record compaction for paid periods.
+
+Once a period's payroll is processed, its daily time records are only kept
+for audit. compact() collapses each paid period that ended before a cutoff
+into one time_record_summaries row per employee (models.compact_time_records):
+the hour totals payroll reads, plus the daily rows as zlib-compressed JSON.
+get_period_hours counts the summaries and get_time_records expands them, so
+payroll totals and the attendance views come out the same.
+
+The cutoff must be on or before the first day of the current month, as for
+services.archive. The report gives the rows and summaries written, the size
+of the daily rows as JSON against their compressed blobs, and the database
+file before and after.
+
+From the command line:
+
+    python -m services.compaction --before 2026-10-01 --vacuum
+    python -m services.compaction expand 12 2026-09-01 2026-09-30
+"""
+import argparse
+import json
+import sys
+import zlib
+
+import models
+from services.archive import _file_bytes, check_cutoff
+
+
+def detail_sizes():
+    """(raw JSON bytes, compressed bytes) of every summary's daily rows."""
+    conn = models.get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT detail FROM time_record_summaries')
+    raw = compressed = 0
+    for row in c:
+        raw += len(zlib.decompress(row['detail']))
+        compressed += len(row['detail'])
+    conn.close()
+    return raw, compressed
+
+
+def compact(before, vacuum=False, today=None):
+    """Compacts every paid period that ended before `before`. Returns a report dict."""
+    before = check_cutoff(before, today)
+    report = {'cutoff': before, 'periods': [], 'records': 0, 'summaries': 0,
+              'file_bytes_before': _file_bytes(models.DATABASE)}
+    for period_start, period_end in models.get_compactable_periods(before):
+        records, summaries = models.compact_time_records(period_start, period_end)
+        report['periods'].append((period_start, period_end))
+        report['records'] += records
+        report['summaries'] += summaries
+    if vacuum:
+        models.vacuum()
+    report['raw_bytes'], report['compressed_bytes'] = detail_sizes()
+    report['file_bytes_after'] = _file_bytes(models.DATABASE)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compact the daily time records of paid periods.')
+    parser.add_argument('--before', help='Compact paid periods that ended before this date (YYYY-MM-DD)')
+    parser.add_argument('--vacuum', action='store_true', help='Shrink the database file afterwards')
+    subparsers = parser.add_subparsers(dest='command')
+    expand = subparsers.add_parser('expand', help="Print an employee's compacted daily records as JSON")
+    expand.add_argument('employee_id', type=int)
+    expand.add_argument('start_date')
+    expand.add_argument('end_date')
+    args = parser.parse_args(argv)
+    if args.command is None and not args.before:
+        parser.error('--before is required')
+
+    models.init_db()
+    if args.command == 'expand':
+        records = models.get_compacted_time_records(args.employee_id, args.start_date, args.end_date)
+        json.dump(records, sys.stdout, indent=2)
+        print()
+        return 0
+    try:
+        report = compact(args.before, vacuum=args.vacuum)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"Compacted {len(report['periods'])} paid periods before {report['cutoff']}: "
+          f"{report['records']} time records -> {report['summaries']} summaries")
+    print(f"daily detail: {report['raw_bytes']} bytes as JSON, {report['compressed_bytes']} compressed")
+    print(f"database file: {report['file_bytes_before']} -> {report['file_bytes_after']} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
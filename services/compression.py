@@ -0,0 +1,105 @@
+"""
+Response compression for HTML, CSV, JSON and PDF responses.
+
+init_app(app) registers an after_request hook that compresses a response
+when the client accepts it: brotli when the brotli package is installed and
+the client prefers or allows it, otherwise gzip. Buffered responses are
+compressed only above MIN_SIZE bytes. Streamed responses (see
+web.common.stream_page) are always compressed chunk by chunk, with each chunk
+flushed as it is produced so the page still arrives progressively.
+
+Files sent with send_file (static files, photos) are left alone.
+
+A strong ETag on a compressed response gets the coding appended
+("<tag>-gzip", "<tag>-br"), since the compressed bytes are a different
+representation; http_cache matches them against the negotiated coding.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MIN_SIZE = 1024       # bytes; smaller buffered bodies aren't worth the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5    # brotli's 11 is for static assets; 4-6 suits per-request pages
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/csv', 'text/plain', 'text/css', 'text/javascript',
+    'application/json', 'application/javascript', 'application/pdf', 'image/svg+xml',
+})
+
+
+def choose_encoding(accept_encodings):
+    """'br', 'gzip' or None for a request's Accept-Encoding (werkzeug's parsed accept_encodings)."""
+    if brotli is not None and accept_encodings['br']:
+        if accept_encodings['br'] >= accept_encodings['gzip']:
+            return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)  # mtime=0: same body, same bytes
+
+
+def _compress_stream(chunks, encoding, source):
+    """Compresses an iterable of byte chunks, flushing after each so none is held back."""
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            for chunk in chunks:
+                data = compressor.process(chunk) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+            for chunk in chunks:
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+    finally:
+        # Closing the original body ends the request context of stream_with_context
+        if hasattr(source, 'close'):
+            source.close()
+
+
+def compress_response(response):
+    """Compresses `response` in place when the client and the content allow it."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        source = response.response
+        response.response = _compress_stream(response.iter_encoded(), encoding, source)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(_compress(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    tag, weak = response.get_etag()
+    if tag and not weak:
+        response.set_etag(f'{tag}-{encoding}')
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
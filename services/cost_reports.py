@@ -0,0 +1,214 @@
+"""
+Payroll cost reports: payslip totals by department, position, or both,
+month by month, with the change from the month before.
+
+The figures come from models.payroll_costs, one row per month, department
+and position, which build_payroll_costs fills with a single GROUP BY over
+the month's payslips (hot and archived; a payslip belongs to the month its
+period ends in, as for contributions and remittances). refresh() builds
+what a report needs before it is read:
+
+    closed months (ended before today) are built once and then kept; one
+    is built again only when a payslip is added to it (found by reading
+    the payslips with ids above what the month has seen) or removed from
+    it (checked only after a payslip delete or update moved the payslips'
+    data version)
+    the open month is built again whenever any employee or payslip
+    changed since it was last built
+
+so a report over two years reads the cached rows and, at most, rebuilds
+the current month. The month-over-month changes are LAG window functions
+over the cached rows (models.get_payroll_cost_pivot).
+
+Employees are grouped by the department and position they had when the
+month was built, which for closed months is when the month closed. After
+an update to a closed month's payslip amounts, which keeps its payslip
+count and ids, run `rebuild`.
+
+From the command line:
+
+    python -m services.cost_reports refresh --start 2025-01 --end 2026-12
+    python -m services.cost_reports report --by department --metric net_pay_centavos --start 2026-01
+    python -m services.cost_reports rebuild
+"""
+import argparse
+import sys
+from datetime import date
+
+import models
+from money import format_centavos
+from services import remittances
+
+# report -> the payroll_costs columns it groups by
+DIMENSIONS = {
+    'department': ('department',),
+    'position': ('position',),
+    'department_position': ('department', 'position'),
+}
+METRICS = models.COST_COLUMNS
+DEFAULT_METRIC = 'gross_pay_centavos'
+DEFAULT_MONTHS = 12
+
+
+# --- Months ---
+
+def parse_month(value):
+    """'2026-09' -> '2026-09'; raises ValueError for anything else."""
+    year, number = value.split('-')
+    return date(int(year), int(number), 1).strftime('%Y-%m')
+
+
+def add_months(month, count):
+    year, number = (int(part) for part in month.split('-'))
+    year, index = divmod(year * 12 + number - 1 + count, 12)
+    return f'{year:04d}-{index + 1:02d}'
+
+
+def months_between(first_month, last_month):
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def default_range(today=None):
+    """The DEFAULT_MONTHS months up to and including the current one."""
+    last_month = (today or date.today()).strftime('%Y-%m')
+    return add_months(last_month, 1 - DEFAULT_MONTHS), last_month
+
+
+# --- Cache ---
+
+def refresh(first_month, last_month, today=None):
+    """Builds the months in [first_month, last_month] that are missing or stale. Returns the months built."""
+    built = models.get_payroll_cost_months(first_month, last_month)
+    stamp = models.get_data_stamp(('employees', 'payslips'))
+    payslip_version, data_stamp = stamp[3], repr(stamp)
+    # Payslips added since the oldest build: a rowid range, empty unless payroll ran since
+    late = models.get_payslip_month_stamps(first_month, last_month,
+                                           after_id=min(row['seen_id'] for row in built.values())) if built else {}
+    # Deletes and updates move the payslips' version; then compare the closed months' payslips
+    recheck = any(row['closed'] and row['payslip_version'] != payslip_version for row in built.values())
+    current = models.get_payslip_month_stamps(first_month, last_month) if recheck else {}
+    rebuilt, unchanged = [], []
+    for month in months_between(first_month, last_month):
+        closed = remittances.is_closed(month, today)
+        row = built.get(month)
+        if row is not None and late.get(month, (0, 0))[1] <= row['seen_id']:
+            if row['closed']:
+                if row['payslip_version'] == payslip_version:
+                    continue
+                if current.get(month, (0, 0)) == (row['payslips'], row['last_id']):
+                    unchanged.append(month)
+                    continue
+            elif not closed and row['data_stamp'] == data_stamp:
+                continue
+        models.build_payroll_costs(month, closed, None if closed else data_stamp)
+        rebuilt.append(month)
+    if unchanged:
+        models.mark_payroll_cost_months_checked(unchanged, payslip_version)
+    return rebuilt
+
+
+def rebuild():
+    """Drops every cached month; the next refresh builds them from the payslips."""
+    models.clear_payroll_costs()
+
+
+# --- Reports ---
+
+def pivot(by='department', first_month=None, last_month=None, metric=DEFAULT_METRIC, today=None):
+    """
+    The `metric` (a payslip centavo column) per group and month:
+
+        {'by', 'metric', 'dimensions', 'months',
+         'rows': [{'labels', 'cells', 'changes', 'total'}],
+         'totals': {'cells', 'changes', 'total'}}
+
+    cells[month] is the group's total that month (absent when it had no
+    payslips) and changes[month] its difference from the calendar month
+    before, where a month without payslips counts as zero. `totals` is the
+    company as a whole.
+    """
+    if by not in DIMENSIONS:
+        raise ValueError(f'Unknown report: {by}; choose from {", ".join(DIMENSIONS)}')
+    if metric not in METRICS:
+        raise ValueError(f'Unknown metric: {metric}; choose from {", ".join(METRICS)}')
+    default_first, default_last = default_range(today)
+    first_month = parse_month(first_month) if first_month else default_first
+    last_month = parse_month(last_month) if last_month else default_last
+    if first_month > last_month:
+        raise ValueError('The first month is after the last.')
+
+    # One month more than shown, so the first month has a change too
+    refresh(add_months(first_month, -1), last_month, today)
+    dimensions = DIMENSIONS[by]
+    months = months_between(first_month, last_month)
+    rows = {}
+    for row in models.get_payroll_cost_pivot(dimensions, metric, first_month, last_month):
+        labels = tuple(row[name] for name in dimensions)
+        _add_cell(rows.setdefault(labels, {'labels': labels, 'cells': {}, 'changes': {}, 'total': 0}), row)
+    totals = {'cells': {}, 'changes': {}, 'total': 0}
+    for row in models.get_payroll_cost_pivot((), metric, first_month, last_month):
+        _add_cell(totals, row)
+    return {'by': by, 'metric': metric, 'dimensions': dimensions, 'months': months,
+            'rows': [rows[labels] for labels in sorted(rows)], 'totals': totals}
+
+
+def _add_cell(group, row):
+    month = row['month']
+    previous = row['previous_amount'] if row['previous_month'] == add_months(month, -1) else 0
+    group['cells'][month] = row['amount']
+    group['changes'][month] = row['amount'] - previous
+    group['total'] += row['amount']
+
+
+def metric_label(metric):
+    return metric[:-len('_centavos')].replace('_', ' ').title()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Payroll cost by department and position, month by month.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('refresh', 'Build the missing or stale months'),
+                            ('report', 'Print a pivot of one metric')):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('--start', help='First month (YYYY-MM; default: 11 months before --end)')
+        command.add_argument('--end', help='Last month (YYYY-MM; default: the current month)')
+        if name == 'report':
+            command.add_argument('--by', choices=sorted(DIMENSIONS), default='department')
+            command.add_argument('--metric', choices=METRICS, default=DEFAULT_METRIC)
+    subparsers.add_parser('rebuild', help='Drop every cached month (after correcting closed payslips)')
+    args = parser.parse_args(argv)
+
+    models.init_db()
+    if args.command == 'rebuild':
+        rebuild()
+        print('Payroll cost cache cleared.')
+        return 0
+    try:
+        last_month = parse_month(args.end) if args.end else default_range()[1]
+        first_month = parse_month(args.start) if args.start else add_months(last_month, 1 - DEFAULT_MONTHS)
+    except ValueError:
+        print('Months must be YYYY-MM.', file=sys.stderr)
+        return 2
+    if args.command == 'refresh':
+        built = refresh(first_month, last_month)
+        print(f'{len(built)} months built: {", ".join(built) or "none"}')
+        return 0
+
+    report = pivot(args.by, first_month, last_month, args.metric)
+    label_width = 24 * len(report['dimensions'])
+    print(f"{' / '.join(report['dimensions']):<{label_width}}"
+          + ''.join(f'{month:>16}' for month in report['months']) + f"{'total':>18}")
+    for row in report['rows'] + [dict(report['totals'], labels=('TOTAL',))]:
+        print(f"{' / '.join(row['labels']):<{label_width}}"
+              + ''.join(f"{format_centavos(row['cells'].get(month, 0)):>16}" for month in report['months'])
+              + f"{format_centavos(row['total']):>18}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Conditional GET for pages and exports built from database tables.
+
+The ETag of a response is derived from what the view reads, not from the
+body it renders:
+
+    the request     path, query string and the logged-in user
+    the day         views default to the current pay period
+    the code        BUILD_STAMP, a hash of the app's modules and templates
+    the data        models.get_data_stamp(tables) for the tables the view reads
+
+All of that is known before the view runs, so an unchanged reload is
+answered 304 Not Modified after one small query, without recomputing
+payroll or rendering anything. Usage:
+
+    @app.route('/employees')
+    @login_required
+    @http_cache.conditional('employees', 'time_records', 'loans', 'leave_requests')
+    def employee_list(): ...
+"""
+import functools
+import glob
+import hashlib
+import os
+from datetime import date
+
+from flask import request, session, make_response
+from flask_login import current_user
+
+import models
+from services import compression
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _build_stamp(root=APP_ROOT):
+    """Hash of every module and template, so a deploy changes every ETag."""
+    digest = hashlib.sha256()
+    patterns = ('*.py', os.path.join('services', '*.py'), os.path.join('web', '*.py'),
+                os.path.join('templates', '*.html'))
+    for path in sorted(p for pattern in patterns for p in glob.glob(os.path.join(root, pattern))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+BUILD_STAMP = _build_stamp()
+
+
+def etag_for(tables):
+    """The strong ETag the current request would get for a view reading `tables`."""
+    user = (current_user.get_id(), current_user.is_admin) if current_user.is_authenticated else None
+    key = repr((request.path, request.query_string, user, date.today().isoformat(), BUILD_STAMP,
+                models.get_data_stamp(tables)))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _matching_tag(tag):
+    """
+    The variant of `tag` named in If-None-Match, if any: the identity tag, or
+    the tag of the encoding this request would be sent with now. A copy in an
+    encoding the client no longer accepts doesn't count.
+    """
+    encoding = compression.choose_encoding(request.accept_encodings)
+    for variant in (tag, f'{tag}-{encoding}' if encoding else None):
+        if variant and request.if_none_match.contains(variant):
+            return variant
+    return None
+
+
+def _revalidate_each_time(response):
+    # Per-user pages: browsers may keep them but must ask before reusing them
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def conditional(*tables):
+    """
+    Decorates a GET view whose output depends only on the request, the
+    current user, the date and `tables`. Answers 304 when the client's
+    copy is current; otherwise runs the view and tags its 200 response.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            # A pending flash message makes the page differ from any earlier copy
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+            tag = etag_for(tables)
+            matched = _matching_tag(tag)
+            if matched:
+                response = make_response('', 304)
+                response.set_etag(matched)
+                return _revalidate_each_time(response)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(tag)
+                _revalidate_each_time(response)
+            return response
+        return wrapped
+    return decorator
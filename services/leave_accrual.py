@@ -0,0 +1,63 @@
+"""
+Leave accrual policy and balance helpers.
+
+Balances live in the leave ledger (models.leave_ledger): employees earn their
+monthly entitlement when payroll is processed for the month, and approved
+requests are deducted when they are approved (models.update_leave_status).
+Amounts are in hundredths of a day, like hours elsewhere in payroll.
+
+Rebuild every balance from payslip and leave history with:
+    python -m services.leave_accrual rebuild
+"""
+import sys
+
+import models
+
+# Company leave policy: days earned per month of employment, in hundredths of
+# a day (15 vacation and 15 sick days a year). Leave types without an
+# entitlement can still be requested and approved; they run a negative
+# balance, which marks them as unpaid.
+MONTHLY_ENTITLEMENTS = {
+    'Vacation': 125,
+    'Sick': 125,
+}
+
+# Approved leave of these types is paid, as far as the balance covers it
+# (utils.get_leave_days); any other type is unpaid.
+PAID_LEAVE_TYPES = frozenset(MONTHLY_ENTITLEMENTS)
+
+
+def format_days(hundredths):
+    """Formats hundredths of a day as '1.25'."""
+    return f'{(hundredths or 0) / 100:.2f}'
+
+
+def balances_for(employee_id):
+    """
+    Returns [(leave_type, balance_hundredths)] for an employee: every leave
+    type with an entitlement, plus any other type they have taken.
+    """
+    balances = {leave_type: 0 for leave_type in MONTHLY_ENTITLEMENTS}
+    for row in models.get_leave_balances(employee_id):
+        balances[row['leave_type']] = row['balance_hundredths']
+    return list(balances.items())
+
+
+def rebuild():
+    """Recomputes the whole ledger from history. Returns (accruals, consumptions) posted."""
+    return models.rebuild_leave_ledger(MONTHLY_ENTITLEMENTS)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ['rebuild']:
+        print('usage: python -m services.leave_accrual rebuild', file=sys.stderr)
+        return 2
+    models.init_db()
+    accruals, consumptions = rebuild()
+    print(f'Leave ledger rebuilt: {accruals} accruals, {consumptions} approved requests.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Pay period calendar and grouped payroll runs.
+
+Each employee is paid on their employees.payroll_period frequency:
+
+    Monthly       the calendar month
+    Semi-Monthly  the 1st to the 15th, and the 16th to the end of the month
+    Weekly        Monday to Sunday; a week belongs to the year it starts in
+
+A year's periods are computed once per frequency and cached
+(periods_for_year), so resolving the period that contains a date is a
+bisect over cached start dates rather than date arithmetic in every route.
+
+run_payroll() groups the active roster by frequency and runs each group as
+its own batch for its current period, or for a month-end run every period
+ending in the month: one calculation and one models.record_payroll_run
+transaction per group and period.
+
+The statutory tables in utils (contributions, withholding tax) are monthly.
+Weekly and semi-monthly periods apply them to the month's gross so far and
+withhold what is due less what the month's earlier payslips withheld, so a
+month of any frequency adds up to the monthly amounts. Periods belong to
+the month they end in, as for loans; run a month's periods in order.
+"""
+import bisect
+import calendar
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from fractions import Fraction
+from functools import lru_cache
+
+import models
+from utils import calculate_payroll_batch
+
+MONTHLY = 'Monthly'
+SEMI_MONTHLY = 'Semi-Monthly'
+WEEKLY = 'Weekly'
+FREQUENCIES = (MONTHLY, SEMI_MONTHLY, WEEKLY)
+DEFAULT_FREQUENCY = MONTHLY
+
+
+@dataclass(frozen=True, slots=True)
+class PayPeriod:
+    frequency: str
+    start: date
+    end: date
+
+    @property
+    def start_date(self):
+        return self.start.isoformat()
+
+    @property
+    def end_date(self):
+        return self.end.isoformat()
+
+    def __contains__(self, day):
+        return self.start <= day <= self.end
+
+
+def frequency_of(payroll_period):
+    """An employees.payroll_period value as one of FREQUENCIES; blank or unknown values pay monthly."""
+    return payroll_period if payroll_period in FREQUENCIES else DEFAULT_FREQUENCY
+
+
+def _month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+@lru_cache(maxsize=64)
+def periods_for_year(frequency, year):
+    """Every `frequency` period starting in `year`, in order, as a tuple of PayPeriods."""
+    if frequency == MONTHLY:
+        return tuple(PayPeriod(frequency, date(year, month, 1), _month_end(year, month)) for month in range(1, 13))
+    if frequency == SEMI_MONTHLY:
+        return tuple(period for month in range(1, 13) for period in (
+            PayPeriod(frequency, date(year, month, 1), date(year, month, 15)),
+            PayPeriod(frequency, date(year, month, 16), _month_end(year, month))))
+    if frequency == WEEKLY:
+        start = date(year, 1, 1)
+        start += timedelta(days=-start.weekday() % 7)  # the year's first Monday
+        periods = []
+        while start.year == year:
+            periods.append(PayPeriod(frequency, start, start + timedelta(days=6)))
+            start += timedelta(days=7)
+        return tuple(periods)
+    raise ValueError(f'Unknown pay frequency {frequency!r}; expected one of {FREQUENCIES}')
+
+
+@lru_cache(maxsize=64)
+def _period_starts(frequency, year):
+    return [period.start for period in periods_for_year(frequency, year)]
+
+
+def period_containing(day, frequency=DEFAULT_FREQUENCY):
+    """The `frequency` PayPeriod that `day` (a date) falls in."""
+    frequency = frequency_of(frequency)
+    starts = _period_starts(frequency, day.year)
+    index = bisect.bisect_right(starts, day) - 1
+    if index < 0:  # the days before a year's first Monday close the previous year's last week
+        return periods_for_year(frequency, day.year - 1)[-1]
+    return periods_for_year(frequency, day.year)[index]
+
+
+def current_period(frequency=DEFAULT_FREQUENCY, today=None):
+    """The `frequency` period containing today."""
+    return period_containing(today or date.today(), frequency)
+
+
+def company_period(today=None):
+    """The current monthly period: what company-wide figures (totals, exports, the simulator) cover."""
+    return current_period(MONTHLY, today)
+
+
+def periods_ending_in(year, month, frequency=DEFAULT_FREQUENCY):
+    """The `frequency` periods that end in the given month, in order (what a month-end run pays)."""
+    frequency = frequency_of(frequency)
+    candidates = periods_for_year(frequency, year) + (periods_for_year(frequency, year - 1)[-1:])
+    return sorted((period for period in candidates if (period.end.year, period.end.month) == (year, month)),
+                  key=lambda period: period.start)
+
+
+def previous_period(period):
+    """The period of the same frequency just before `period`."""
+    return period_containing(period.start - timedelta(days=1), period.frequency)
+
+
+def year_elapsed(start_date, end_date):
+    """
+    The fraction of its tax year (the year it ends in, as payroll_ytd counts
+    it) paid once the period [start_date, end_date] (ISO dates) is: for a
+    pay period, the periods of its frequency ending in that year up to and
+    including it, out of all of them; for any other range, the days of the
+    year up to its end. Exactly 1 only for the year's last period.
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    for frequency in FREQUENCIES:
+        period = period_containing(start, frequency)
+        if (period.start, period.end) == (start, end):
+            in_year = [p for p in periods_for_year(frequency, end.year - 1) + periods_for_year(frequency, end.year)
+                       if p.end.year == end.year]
+            return Fraction(in_year.index(period) + 1, len(in_year))
+    return Fraction(end.timetuple().tm_yday, 366 if calendar.isleap(end.year) else 365)
+
+
+def group_by_frequency(employees):
+    """{frequency: [employees]} for records.Employees, in FREQUENCIES order, leaving out empty groups."""
+    groups = {frequency: [] for frequency in FREQUENCIES}
+    for employee in employees:
+        groups[frequency_of(employee.payroll_period)].append(employee)
+    return {frequency: members for frequency, members in groups.items() if members}
+
+
+@dataclass(frozen=True, slots=True)
+class GroupRun:
+    period: PayPeriod
+    employees: int
+    payslips_created: int
+    loan_payments_posted: int
+    seconds: float = 0.0
+
+
+def run_payroll(today=None, tax_mode='period', leave_accruals=None, employees=None, month=None,
+                calculate=calculate_payroll_batch, progress=None):
+    """
+    Processes payroll for every active employee (or `employees`), one batch
+    per pay frequency: for that frequency's current period, or, given
+    `month` = (year, month), for every period of the frequency ending in that
+    month. A period already processed creates nothing. `calculate` has
+    calculate_payroll_batch's signature; `progress` is called with each
+    GroupRun as it completes. Returns the GroupRuns.
+    """
+    employees = models.get_employees() if employees is None else employees
+    runs = []
+    for frequency, members in group_by_frequency(employees).items():
+        periods = periods_ending_in(*month, frequency) if month else [current_period(frequency, today)]
+        for period in periods:
+            started = time.perf_counter()
+            payrolls = calculate(members, period.start_date, period.end_date, tax_mode=tax_mode)
+            created, posted = models.record_payroll_run(
+                period.start_date, period.end_date,
+                [(emp.id, payroll) for emp, payroll in zip(members, payrolls)],
+                leave_accruals=leave_accruals,
+            )
+            run = GroupRun(period, len(members), created, posted, time.perf_counter() - started)
+            runs.append(run)
+            if progress is not None:
+                progress(run)
+    return runs
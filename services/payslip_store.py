@@ -0,0 +1,293 @@
+"""
+Columnar payslip history for analytics.
+
+Committed payslips are copied into one partition per pay period under
+STORE_FOLDER: a folder with a NumPy .npy file per column (int64 centavos,
+the payslip and employee ids, and the employee's department as an int32
+code into the manifest's department list). manifest.json lists each
+partition with the payslip stamp it was built from.
+
+sync() writes the partitions of periods that are new or whose payslips
+changed since (a correction rewrites that period only), and leaves the
+others alone. The payroll run calls it for the period it just processed.
+Syncs take a lock file in STORE_FOLDER, so concurrent ones (two payroll
+runs, or a run and the CLI) apply their manifest updates one after the
+other instead of overwriting each other's.
+
+The aggregations below open the partitions memory-mapped and sum them in
+NumPy, so cost trends, department breakdowns and year-over-year totals over
+years of history never scan the payslips table. Periods are selected by
+pay_period_start, as the remittance reports do.
+
+NumPy is optional, as for the simulator. From the command line:
+
+    python -m services.payslip_store sync
+    python -m services.payslip_store report --by year
+    python -m services.payslip_store report --by department --start 2026-01-01 --end 2026-12-31
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import models
+from money import format_centavos
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the columnar store needs it
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: syncs are then serialized within the process only
+    fcntl = None
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_FOLDER = os.path.join(APP_ROOT, 'instance', 'payslip_store')
+MANIFEST = 'manifest.json'
+SYNC_LOCK = '.sync.lock'
+
+AMOUNT_COLUMNS = models.STORE_PAYSLIP_COLUMNS
+COLUMNS = ('id', 'employee_id', 'department') + AMOUNT_COLUMNS
+UNASSIGNED_DEPARTMENT = 'Unassigned'
+
+
+def numpy_available():
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('The payslip store requires NumPy (pip install numpy).')
+
+
+# --- Manifest ---
+
+def _read_manifest():
+    path = os.path.join(STORE_FOLDER, MANIFEST)
+    if not os.path.exists(path):
+        return {'departments': [], 'partitions': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest):
+    fd, temp_path = tempfile.mkstemp(dir=STORE_FOLDER, prefix=f'.{MANIFEST}.', suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, os.path.join(STORE_FOLDER, MANIFEST))
+
+
+_sync_lock = threading.Lock()
+
+
+@contextmanager
+def _locked():
+    """Holds the store's sync lock: a flock on SYNC_LOCK, across processes and threads alike."""
+    with _sync_lock:
+        with open(os.path.join(STORE_FOLDER, SYNC_LOCK), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _partition_name(period_start, period_end):
+    return f'{period_start}_{period_end}'
+
+
+def _stamp(row):
+    return [row['payslips'], row['last_id'], row['gross_centavos'], row['net_centavos']]
+
+
+# --- Writing ---
+
+def _write_partition(manifest, period_start, period_end):
+    """Writes one period's columns to a new folder, then swaps it in for the old one."""
+    rows = models.get_period_payslip_columns(period_start, period_end)
+    departments = manifest['departments']
+    codes = {name: code for code, name in enumerate(departments)}
+    columns = {name: np.empty(len(rows), dtype=np.int64) for name in ('id', 'employee_id') + AMOUNT_COLUMNS}
+    columns['department'] = np.empty(len(rows), dtype=np.int32)
+    for i, row in enumerate(rows):
+        payslip_id, employee_id, department = row[:3]
+        department = department or UNASSIGNED_DEPARTMENT
+        if department not in codes:
+            codes[department] = len(departments)
+            departments.append(department)
+        columns['id'][i] = payslip_id
+        columns['employee_id'][i] = employee_id
+        columns['department'][i] = codes[department]
+        for name, value in zip(AMOUNT_COLUMNS, row[3:]):
+            columns[name][i] = value or 0
+
+    name = _partition_name(period_start, period_end)
+    path = os.path.join(STORE_FOLDER, name)
+    temp_path = tempfile.mkdtemp(dir=STORE_FOLDER, prefix=f'.{name}.', suffix='.tmp')
+    for column, values in columns.items():
+        np.save(os.path.join(temp_path, f'{column}.npy'), values)
+    # Readers that already mapped the old files keep them until they close
+    old_folder = tempfile.mkdtemp(dir=STORE_FOLDER, prefix=f'.{name}.', suffix='.old')
+    if os.path.exists(path):
+        os.rename(path, os.path.join(old_folder, name))
+    os.rename(temp_path, path)
+    shutil.rmtree(old_folder, ignore_errors=True)
+    return len(rows)
+
+
+def sync(period_start=None, period_end=None):
+    """
+    Brings the store up to date with the payslips, for every period or only
+    the given one. Returns {'written': partitions rewritten, 'rows': payslips
+    written, 'removed': partitions of periods with no payslips left}.
+    """
+    _require_numpy()
+    os.makedirs(STORE_FOLDER, exist_ok=True)
+    with _locked():
+        return _sync(period_start, period_end)
+
+
+def _sync(period_start, period_end):
+    manifest = _read_manifest()
+    partitions = manifest['partitions']
+    report = {'written': 0, 'rows': 0, 'removed': 0}
+    current = set()
+    for row in models.get_payslip_period_stamps(period_start, period_end):
+        name = _partition_name(row['pay_period_start'], row['pay_period_end'])
+        current.add(name)
+        stamp = _stamp(row)
+        if partitions.get(name, {}).get('stamp') == stamp:
+            continue
+        count = _write_partition(manifest, row['pay_period_start'], row['pay_period_end'])
+        partitions[name] = {'period_start': row['pay_period_start'], 'period_end': row['pay_period_end'],
+                            'rows': count, 'stamp': stamp}
+        report['written'] += 1
+        report['rows'] += count
+    if period_start is None:
+        stale = set(partitions) - current
+    else:
+        name = _partition_name(period_start, period_end)
+        stale = {name} - current if name in partitions else set()
+    for name in stale:
+        del partitions[name]
+        shutil.rmtree(os.path.join(STORE_FOLDER, name), ignore_errors=True)
+        report['removed'] += 1
+    manifest['partitions'] = dict(sorted(partitions.items()))
+    _write_manifest(manifest)
+    return report
+
+
+# --- Reading ---
+
+def partitions(start=None, end=None):
+    """Manifest entries of the partitions whose period starts within [start, end]."""
+    return [entry for entry in _read_manifest()['partitions'].values()
+            if (start is None or entry['period_start'] >= start) and (end is None or entry['period_start'] <= end)]
+
+
+def open_partition(entry, columns=COLUMNS):
+    """{column: memory-mapped array} for one partition."""
+    _require_numpy()
+    path = os.path.join(STORE_FOLDER, _partition_name(entry['period_start'], entry['period_end']))
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in columns}
+
+
+def load(columns=COLUMNS, start=None, end=None):
+    """Every selected partition's `columns` concatenated into plain arrays."""
+    opened = [open_partition(entry, columns) for entry in partitions(start, end)]
+    return {name: np.concatenate([part[name] for part in opened]) if opened
+            else np.empty(0, dtype=np.int32 if name == 'department' else np.int64) for name in columns}
+
+
+def _sums(arrays, columns):
+    return {name: int(arrays[name].sum(dtype=np.int64)) for name in columns}
+
+
+def totals_by_period(columns=AMOUNT_COLUMNS, start=None, end=None):
+    """Per pay period: payslip count and the sum of each column, in centavos."""
+    rows = []
+    for entry in partitions(start, end):
+        row = {'period_start': entry['period_start'], 'period_end': entry['period_end'], 'payslips': entry['rows']}
+        row.update(_sums(open_partition(entry, columns), columns))
+        rows.append(row)
+    return rows
+
+
+def totals_by_year(columns=AMOUNT_COLUMNS, start=None, end=None):
+    """Per calendar year of pay_period_start, with each column's change from the year before (percent)."""
+    years = {}
+    for row in totals_by_period(columns, start, end):
+        year = years.setdefault(row['period_start'][:4], dict.fromkeys(('payslips',) + tuple(columns), 0))
+        for name in year:
+            year[name] += row[name]
+    rows, previous = [], None
+    for year, sums in sorted(years.items()):
+        row = {'year': year, **sums}
+        for name in columns:
+            before = previous[name] if previous else 0
+            row[f'{name}_change_pct'] = round((sums[name] - before) * 100 / before, 2) if before else None
+        rows.append(row)
+        previous = sums
+    return rows
+
+
+def totals_by_department(columns=AMOUNT_COLUMNS, start=None, end=None):
+    """Per department (as recorded when each period was stored): payslip count and column sums."""
+    _require_numpy()
+    departments = _read_manifest()['departments']
+    count = np.zeros(len(departments), dtype=np.int64)
+    sums = {name: np.zeros(len(departments), dtype=np.int64) for name in columns}
+    for entry in partitions(start, end):
+        part = open_partition(entry, ('department',) + tuple(columns))
+        codes = np.asarray(part['department'])
+        count += np.bincount(codes, minlength=len(departments))
+        for name in columns:
+            np.add.at(sums[name], codes, part[name])
+    return [{'department': name, 'payslips': int(count[i]), **{c: int(sums[c][i]) for c in columns}}
+            for i, name in enumerate(departments) if count[i]]
+
+
+REPORTS = {'period': totals_by_period, 'year': totals_by_year, 'department': totals_by_department}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar payslip history: sync it, or report from it.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('sync', help='Write partitions for new or changed pay periods')
+    report = subparsers.add_parser('report', help='Aggregate the stored history')
+    report.add_argument('--by', choices=sorted(REPORTS), default='year')
+    report.add_argument('--column', action='append', choices=AMOUNT_COLUMNS,
+                        help='Column to total (repeatable; default gross and net pay)')
+    report.add_argument('--start', help='First pay period start to include (YYYY-MM-DD)')
+    report.add_argument('--end', help='Last pay period start to include (YYYY-MM-DD)')
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print('The payslip store requires NumPy (pip install numpy).', file=sys.stderr)
+        return 2
+    models.init_db()
+    if args.command == 'sync':
+        result = sync()
+        print(f"{result['written']} partitions written ({result['rows']} payslips), "
+              f"{result['removed']} removed -> {STORE_FOLDER}")
+        return 0
+
+    columns = tuple(args.column or ('gross_pay_centavos', 'net_pay_centavos'))
+    rows = REPORTS[args.by](columns, args.start, args.end)
+    key = {'period': 'period_start', 'year': 'year', 'department': 'department'}[args.by]
+    print(f"{args.by:<22}{'payslips':>10}" + ''.join(f'{name[:-len("_centavos")]:>20}' for name in columns))
+    for row in rows:
+        print(f'{row[key]:<22}{row["payslips"]:>10}' + ''.join(f'{format_centavos(row[name]):>20}' for name in columns))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
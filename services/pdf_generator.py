@@ -25,10 +25,11 @@ class CustomCanvas(canvas.Canvas):
         self._set_metadata()
         super().save()
 
-def create_pdf_from_payroll_data(emp):
+def create_pdf_from_payroll_data(emp, payroll, pay_period_start, pay_period_end):
     """
     Generates a PDF using ReportLab based on calculated employee data.
-    'emp' must be the calculated payroll dict from utils.calculate_payroll.
+    'emp' is a records.Employee and 'payroll' its records.PayrollResult
+    from utils.calculate_payroll.
     """
     # 📄 PDF setup
     buffer = io.BytesIO()
@@ -42,10 +43,10 @@ def create_pdf_from_payroll_data(emp):
 
     # 👤 Employee Info Table
     info_data = [
-        ['Employee Name', emp['name']],
-        ['Position', emp['position']],
-        ['Department', emp['department']],
-        ['Pay Period', f"{emp['pay_period_start']} to {emp['pay_period_end']}"],
+        ['Employee Name', emp.name],
+        ['Position', emp.position],
+        ['Department', emp.department],
+        ['Pay Period', f"{pay_period_start} to {pay_period_end}"],
     ]
     info_table = Table(info_data, colWidths=[150, 300])
     info_table.setStyle(TableStyle([
@@ -57,35 +58,36 @@ def create_pdf_from_payroll_data(emp):
     elements.append(Spacer(1, 12))
 
     # 💸 Salary Breakdown Table
-    # NOTE: The data structure here must match the data passed from app.py/utils.py
+    # NOTE: The data structure here must match the data passed from web/reports.py/utils.py
     salary_data = [
         ['', 'Amount (PHP)'],
         ['Earnings', ''],
-        ['Base Salary', f"{emp['salary']:,.2f}"],
-        [f"Regular Pay ({emp['total_regular_hours']:,.2f} hrs)", f"{emp['regular_pay']:,.2f}"],
-        [f"Overtime Pay ({emp['total_overtime_hours']:,.2f} hrs)", f"{emp['overtime_pay']:,.2f}"],
+        ['Base Salary', f"{emp.salary or 0:,.2f}"],
+        [f"Regular Pay ({payroll.total_regular_hours:,.2f} hrs)", f"{payroll.regular_pay:,.2f}"],
+        [f"Overtime Pay ({payroll.total_overtime_hours:,.2f} hrs)", f"{payroll.overtime_pay:,.2f}"],
+        [f"Paid Leave ({payroll.paid_leave_days} days, {payroll.unpaid_leave_days} unpaid)", f"{payroll.leave_pay:,.2f}"],
         ['Deductions', ''],
-        ['SSS Contribution', f"({emp['sss']:,.2f})"],
-        ['PhilHealth Contribution', f"({emp['philhealth']:,.2f})"],
-        ['Pag-IBIG Contribution', f"({emp['pagibig']:,.2f})"],
-        ['Withholding Tax (EWT)', f"({emp['tax']:,.2f})"],
-        ['Loan Deductions', f"({emp['loan_deductions']:,.2f})"],
+        ['SSS Contribution', f"({payroll.sss:,.2f})"],
+        ['PhilHealth Contribution', f"({payroll.philhealth:,.2f})"],
+        ['Pag-IBIG Contribution', f"({payroll.pagibig:,.2f})"],
+        ['Withholding Tax (EWT)', f"({payroll.tax:,.2f})"],
+        ['Loan Deductions', f"({payroll.loan_deductions:,.2f})"],
         ['', ''],
-        ['Total Deductions', f"PHP ({emp['total_deductions']:,.2f})"],
-        ['NET PAY', f"PHP {emp['net_salary']:,.2f}"],
+        ['Total Deductions', f"PHP ({payroll.total_deductions:,.2f})"],
+        ['NET PAY', f"PHP {payroll.net_salary:,.2f}"],
     ]
     salary_table = Table(salary_data, colWidths=[200, 100])
     salary_table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
         ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
         ('SPAN', (0, 1), (1, 1)),
-        ('SPAN', (0, 5), (1, 5)),
+        ('SPAN', (0, 6), (1, 6)),
         ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        ('LINEBELOW', (0, 12), (-1, 12), 1, colors.black),
-        ('FONTNAME', (0, 13), (-1, 13), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, 13), (-1, 13), colors.yellowgreen),
-        ('LEFTPADDING', (0, 2), (0, 4), 20), # Indent earnings
-        ('LEFTPADDING', (0, 6), (0, 10), 20), # Indent deductions
+        ('LINEBELOW', (0, 13), (-1, 13), 1, colors.black),
+        ('FONTNAME', (0, 14), (-1, 14), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 14), (-1, 14), colors.yellowgreen),
+        ('LEFTPADDING', (0, 2), (0, 5), 20), # Indent earnings
+        ('LEFTPADDING', (0, 7), (0, 11), 20), # Indent deductions
     ]))
     elements.append(salary_table)
     elements.append(Spacer(1, 24))
@@ -101,6 +103,6 @@ def create_pdf_from_payroll_data(emp):
     # Return the byte stream
     return buffer.read()
 
-# NOTE: The name 'generate_pdf_from_html' is what app.py is looking for.
+# NOTE: The name 'generate_pdf_from_html' is what web/reports.py is looking for.
 # We map it to our new function that uses ReportLab's data structure.
 generate_pdf_from_html = create_pdf_from_payroll_data
@@ -0,0 +1,171 @@
+"""
+Employee photo storage: content-hashed originals plus fixed-size thumbnails.
+
+An upload is saved as static/uploads/<hash>.<ext>, where <hash> is the start
+of the SHA-256 of its bytes, and one square thumbnail per THUMBNAIL_SIZES
+entry is written alongside it as uploads/thumbs/<hash>-<px>.webp. A name
+only ever refers to one content, so the app serves these files with
+far-future cache headers.
+
+Templates pick the size they display with the `photo_url` filter:
+    {{ employee.photo|photo_url('sm') }}
+
+Photos uploaded before thumbnails existed keep their original names (and
+are served full size) until
+    python -m services.photos backfill
+hashes them, writes their thumbnails and updates employees.photo.
+
+Thumbnails need Pillow, imported by the first upload rather than with the
+app (the web pages only need photo_path and is_hashed). Without it, uploads are saved under their original
+names as before, and the backfill picks them up once Pillow is installed.
+"""
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import sys
+
+from werkzeug.utils import secure_filename
+
+import models
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'uploads')
+DEFAULT_PHOTO = 'default.png'
+
+# Square edge in pixels, twice the largest size each is displayed at:
+# 'sm' for the 36-40px avatars, 'md' for the 80px payslip photo and the
+# 100px preview on the edit form.
+THUMBNAIL_SIZES = {
+    'sm': 80,
+    'md': 200,
+}
+THUMBNAIL_QUALITY = 80
+CACHE_MAX_AGE = 365 * 24 * 60 * 60  # seconds; hashed names never change content
+
+HASH_LENGTH = 16
+HASHED_NAME = re.compile(rf'^[0-9a-f]{{{HASH_LENGTH}}}\.[a-z]+$')
+HASHED_STATIC_PATH = re.compile(rf'^uploads/(thumbs/)?[0-9a-f]{{{HASH_LENGTH}}}(-\d+\.webp|\.[a-z]+)$')
+
+
+def pillow_available():
+    # Pillow is optional; photos are served full size without it
+    return importlib.util.find_spec('PIL') is not None
+
+
+def is_hashed(filename):
+    """True for a static path (relative to static/) that names a hashed original or thumbnail."""
+    return bool(HASHED_STATIC_PATH.match(filename or ''))
+
+
+def photo_path(photo, size=None):
+    """
+    Path under static/ for an employee photo: the `size` thumbnail when the
+    photo has one, else the stored original, else the default avatar.
+    """
+    if not photo:
+        return f'uploads/{DEFAULT_PHOTO}'
+    if size and HASHED_NAME.match(photo):
+        stem = photo.rsplit('.', 1)[0]
+        return f'uploads/thumbs/{stem}-{THUMBNAIL_SIZES[size]}.webp'
+    return f'uploads/{photo}'
+
+
+def _thumbnail_file(folder, photo, px):
+    return os.path.join(folder, 'thumbs', f"{photo.rsplit('.', 1)[0]}-{px}.webp")
+
+
+def _write_thumbnails(data, digest, folder):
+    """Writes every THUMBNAIL_SIZES thumbnail for the image in `data`. Raises OSError if it isn't an image."""
+    from PIL import Image, ImageOps
+    os.makedirs(os.path.join(folder, 'thumbs'), exist_ok=True)
+    with Image.open(io.BytesIO(data)) as image:
+        largest = max(THUMBNAIL_SIZES.values())
+        image.draft('RGB', (largest, largest))  # JPEGs decode straight at a reduced scale
+        image = ImageOps.exif_transpose(image)  # phone photos are often stored sideways
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for px in THUMBNAIL_SIZES.values():
+            # Avatars are shown as cropped squares, so crop rather than letterbox
+            thumbnail = ImageOps.fit(image, (px, px), Image.Resampling.LANCZOS)
+            thumbnail.save(_thumbnail_file(folder, digest, px), 'WEBP', quality=THUMBNAIL_QUALITY)
+
+
+def _store(data, extension, folder):
+    """Saves `data` under its content hash with thumbnails. Returns the stored name."""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    _write_thumbnails(data, digest, folder)
+    name = f'{digest}.{extension}'
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):  # same content, same name: already stored
+        with open(path, 'wb') as f:
+            f.write(data)
+    return name
+
+
+def save_upload(file_storage, folder=UPLOAD_FOLDER):
+    """
+    Saves an uploaded photo (a werkzeug FileStorage) and returns the name to
+    store in employees.photo. Files Pillow can't read, or any file when
+    Pillow isn't installed, are saved under their original name as before.
+    """
+    filename = secure_filename(file_storage.filename)
+    if pillow_available():
+        data = file_storage.read()
+        try:
+            return _store(data, filename.rsplit('.', 1)[-1].lower(), folder)
+        except OSError:  # includes PIL.UnidentifiedImageError
+            file_storage.stream.seek(0)
+    file_storage.save(os.path.join(folder, filename))
+    return filename
+
+
+def backfill(folder=UPLOAD_FOLDER):
+    """
+    Gives every stored employee photo a hashed name and thumbnails, and
+    rewrites missing thumbnails of photos that already have one. Original
+    files are left in place. Returns (converted, missing): photos converted
+    or repaired, and photo names with no file on disk.
+    """
+    if not pillow_available():
+        raise RuntimeError('Photo thumbnails require Pillow (pip install Pillow).')
+    converted = missing = 0
+    for photo in models.get_employee_photos():
+        if photo == DEFAULT_PHOTO:
+            continue
+        if HASHED_NAME.match(photo) and all(os.path.exists(_thumbnail_file(folder, photo, px))
+                                            for px in THUMBNAIL_SIZES.values()):
+            continue
+        path = os.path.join(folder, photo)
+        if not os.path.isfile(path):
+            missing += 1
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            name = _store(data, photo.rsplit('.', 1)[-1].lower(), folder)
+        except OSError:  # includes PIL.UnidentifiedImageError
+            missing += 1
+            continue
+        if name != photo:
+            models.rename_employee_photo(photo, name)
+        converted += 1
+    return converted, missing
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ['backfill']:
+        print('usage: python -m services.photos backfill', file=sys.stderr)
+        return 2
+    models.init_db()
+    try:
+        converted, missing = backfill()
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f'Photos backfilled: {converted} converted, {missing} missing or unreadable.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
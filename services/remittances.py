@@ -0,0 +1,297 @@
+"""
+Monthly government remittance reports: SSS, PhilHealth, Pag-IBIG and BIR.
+
+Each report lists, per employee paid in the month, the statutory number,
+payslip count, compensation and the employee share withheld, sorted by
+statutory number, with a totals row. The figures come from one GROUP BY
+query over the month's payslips (models.iter_remittance_rows). Rows are
+written as they are read, as CSV or as an .xlsx workbook built with
+zipfile, so memory stays flat.
+
+Reports for closed months (ended before today) are cached on disk under
+CACHE_FOLDER. The cache key includes the month's payslip count and last
+id plus the employees' and payslips' version stamps, so a correction
+rebuilds the report, and an unchanged month is served from the file.
+
+From the command line, for one month or a whole year:
+
+    python -m services.remittances 2026-09 --agency sss --format xlsx -o reports/
+    python -m services.remittances 2026
+"""
+import argparse
+import calendar
+import csv
+import glob
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from collections import namedtuple
+from datetime import date
+from xml.sax.saxutils import escape
+
+import models
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FOLDER = os.path.join(APP_ROOT, 'instance', 'remittances')
+CHUNK_ROWS = 500  # rows per chunk yielded by the writers
+
+Agency = namedtuple('Agency', 'name number_column number_label')
+
+AGENCIES = {
+    'sss': Agency('SSS', 'sss_number', 'SSS No.'),
+    'philhealth': Agency('PhilHealth', 'philhealth_number', 'PhilHealth No.'),
+    'pagibig': Agency('Pag-IBIG', 'pagibig_number', 'Pag-IBIG MID No.'),
+    'bir': Agency('BIR', 'tin_number', 'TIN'),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def month_bounds(month):
+    """'2026-09' -> ('2026-09-01', '2026-09-30')."""
+    year, number = (int(part) for part in month.split('-'))
+    return date(year, number, 1).isoformat(), date(year, number, calendar.monthrange(year, number)[1]).isoformat()
+
+
+def is_closed(month, today=None):
+    return month_bounds(month)[1] < (today or date.today()).isoformat()
+
+
+def _pesos(centavos):
+    if not centavos:
+        return '0.00'
+    pesos, cents = divmod(abs(centavos), 100)
+    return f"{'-' if centavos < 0 else ''}{pesos}.{cents:02d}"
+
+
+def _rows(agency, month):
+    """(header, row iterator, totals row factory) for one report; rows are lists of cell values."""
+    period_start, period_end = month_bounds(month)
+    header = [agency.number_label, 'Employee ID', 'Employee Name', 'Payslips', 'Compensation', 'Employee Share']
+    totals = {'employees': 0, 'payslips': 0, 'gross': 0, 'amount': 0}
+
+    def rows():
+        for row in models.iter_remittance_rows(agency.number_column, period_start, period_end):
+            totals['employees'] += 1
+            totals['payslips'] += row['payslips']
+            totals['gross'] += row['gross_centavos'] or 0
+            totals['amount'] += row['amount_centavos'] or 0
+            yield [row['statutory_number'] or '', row['employee_id'], row['name'], row['payslips'],
+                   _pesos(row['gross_centavos']), _pesos(row['amount_centavos'])]
+
+    def total_row():
+        return ['TOTAL', '', f"{totals['employees']} employees", totals['payslips'],
+                _pesos(totals['gross']), _pesos(totals['amount'])]
+
+    return header, rows(), total_row
+
+
+# --- CSV ---
+
+def _write_csv(agency, month):
+    header, rows, total_row = _rows(agency, month)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CHUNK_ROWS == 0:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    writer.writerow(total_row())
+    yield out.getvalue().encode()
+
+
+# --- XLSX (SpreadsheetML written directly; no spreadsheet library needed) ---
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'),
+}
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+NUMERIC_COLUMNS = (1, 3, 4, 5)  # statutory numbers stay text to keep leading zeros
+
+
+def _xlsx_row(values, numeric=NUMERIC_COLUMNS):
+    cells = []
+    for index, value in enumerate(values):
+        if index in numeric and value != '':
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+class _Sink:
+    """Write-only, unseekable file for zipfile; drain() hands over what was written so far."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _write_xlsx(agency, month):
+    header, rows, total_row = _rows(agency, month)
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, xml in XLSX_PARTS.items():
+            workbook.writestr(name, xml)
+        workbook.writestr('xl/workbook.xml', WORKBOOK_XML.format(name=escape(f'{agency.name} {month}')))
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            sheet.write(_xlsx_row(header, numeric=()).encode())
+            pending = []
+            for row in rows:
+                pending.append(_xlsx_row(row))
+                if len(pending) >= CHUNK_ROWS:
+                    sheet.write(''.join(pending).encode())
+                    pending.clear()
+                    yield sink.drain()
+            pending.append(_xlsx_row(total_row(), numeric=(3, 4, 5)))
+            sheet.write(''.join(pending).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx}
+
+
+# --- Caching ---
+
+def _cache_path(agency_code, month, fmt):
+    period_start, period_end = month_bounds(month)
+    key = repr((models.get_period_payslip_stamp(period_start, period_end),
+                models.get_data_stamp(('employees',)), models.get_data_stamp(('payslips',))[1]))
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return os.path.join(CACHE_FOLDER, month, f'{agency_code}-{digest}.{fmt}')
+
+
+def _read_file(path, chunk_size=64 * 1024):
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _write_through(path, chunks, stale_pattern):
+    """
+    Yields `chunks` while saving them to `path`. The file only appears once
+    complete, and then replaces the files matching `stale_pattern`: the same
+    report built from older data.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A name of its own: two threads of one process can be building the same report
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    completed = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(temp_path, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(temp_path):
+            os.remove(temp_path)
+    for stale in glob.glob(stale_pattern):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass  # removed by a concurrent build of the same report
+
+
+def report(agency_code, month, fmt='csv', today=None):
+    """
+    Yields the bytes of one remittance report. Closed months are served
+    from, or saved to, the cache; the current month is always rebuilt.
+    """
+    agency = AGENCIES[agency_code]
+    writer = WRITERS[fmt]
+    if not is_closed(month, today):
+        return writer(agency, month)
+    path = _cache_path(agency_code, month, fmt)
+    if os.path.exists(path):
+        return _read_file(path)
+    stale_pattern = os.path.join(CACHE_FOLDER, month, f'{agency_code}-*.{fmt}')
+    return _write_through(path, writer(agency, month), stale_pattern)
+
+
+def filename(agency_code, month, fmt):
+    return f'{agency_code}_remittance_{month}.{fmt}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build government remittance reports.')
+    parser.add_argument('period', help='YYYY-MM for one month, or YYYY for every month of a year')
+    parser.add_argument('--agency', choices=sorted(AGENCIES), help='Default: every agency')
+    parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('-o', '--output', help='Folder to copy the reports to (default: only fill the cache)')
+    args = parser.parse_args(argv)
+
+    models.init_db()
+    months = [args.period] if '-' in args.period else [f'{args.period}-{m:02d}' for m in range(1, 13)]
+    agencies = [args.agency] if args.agency else list(AGENCIES)
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    for month in months:
+        for agency_code in agencies:
+            chunks = report(agency_code, month, args.fmt)
+            if args.output:
+                with open(os.path.join(args.output, filename(agency_code, month, args.fmt)), 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            else:
+                for _ in chunks:
+                    pass
+    print(f'{len(months) * len(agencies)} {args.fmt} reports built.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
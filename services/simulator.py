@@ -0,0 +1,204 @@
+"""
+Vectorized what-if payroll simulator.
+
+Loads the active roster and its period totals into NumPy arrays once, then
+evaluates gross pay, contributions, withholding tax and net pay for the whole
+company in a single array pass per scenario. Nothing is written back to the
+database, so HR can try raises or new contribution tables safely.
+
+Arrays hold int64 centavos (hours in hundredths) and follow the same rounding
+rules as utils.calculate_payroll, so the baseline matches it to the centavo.
+"""
+import money
+import models
+import utils
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the simulator needs it
+    np = None
+
+UNASSIGNED_DEPARTMENT = 'Unassigned'
+
+# Every parameter a scenario may change, with the values payroll uses today.
+# Scenarios are given in pesos and plain rates, the way HR enters them.
+SCENARIO_DEFAULTS = {
+    'salary_pct': 0.0,           # % change to the monthly base salary
+    'hourly_rate_pct': 0.0,      # % change to the hourly rate (drives gross pay)
+    'overtime_multiplier': float(utils.OVERTIME_MULTIPLIER),
+    'sss_rate': float(utils.SSS_RATE),
+    'sss_min_salary': money.to_pesos(utils.SSS_MIN_SALARY),
+    'sss_max_salary': money.to_pesos(utils.SSS_MAX_SALARY),
+    'sss_min_share': money.to_pesos(utils.SSS_MIN_SHARE),
+    'sss_max_share': money.to_pesos(utils.SSS_MAX_SHARE),
+    'philhealth_rate': float(utils.PHILHEALTH_RATE),
+    'philhealth_floor': money.to_pesos(utils.PHILHEALTH_FLOOR),
+    'philhealth_ceiling': money.to_pesos(utils.PHILHEALTH_CEILING),
+    'pagibig_rate': float(utils.PAGIBIG_RATE),
+    'pagibig_cap': money.to_pesos(utils.PAGIBIG_CAP),
+}
+RATE_PARAMETERS = {'salary_pct', 'hourly_rate_pct', 'overtime_multiplier',
+                   'sss_rate', 'philhealth_rate', 'pagibig_rate'}
+
+RESULT_FIELDS = ['base_salary', 'gross_pay', 'sss', 'philhealth', 'pagibig', 'tax',
+                 'loan_deductions', 'total_deductions', 'net_pay']
+
+
+def numpy_available():
+    return np is not None
+
+
+class Roster:
+    """Column arrays (int64 centavos / hundredths of an hour) for every active employee."""
+
+    def __init__(self, ids, departments, salary, hourly_rate, regular_hours, overtime_hours, loan_deductions,
+                 paid_leave_days):
+        self.ids = ids
+        self.salary = salary
+        self.hourly_rate = hourly_rate
+        self.regular_hours = regular_hours
+        self.overtime_hours = overtime_hours
+        self.loan_deductions = loan_deductions
+        self.paid_leave_days = paid_leave_days
+        # Departments are stored as integer codes into department_names
+        self.department_names, self.department_codes = np.unique(departments, return_inverse=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_roster(start_date, end_date):
+    """Reads the active roster and its period totals into a Roster (four queries in total)."""
+    if np is None:
+        raise RuntimeError('The payroll simulator requires NumPy (pip install numpy).')
+
+    employees = models.get_employees()
+    hours = {row['employee_id']: row for row in models.get_period_hours(start_date, end_date)}
+    loans = {row['employee_id']: row['loan_deductions_centavos']
+             for row in models.get_loan_deduction_totals(start_date, end_date)}
+    leave = utils.get_leave_days(start_date, end_date)
+
+    count = len(employees)
+    ids = np.empty(count, dtype=np.int64)
+    salary = np.zeros(count, dtype=np.int64)
+    hourly_rate = np.zeros(count, dtype=np.int64)
+    regular_hours = np.zeros(count, dtype=np.int64)
+    overtime_hours = np.zeros(count, dtype=np.int64)
+    loan_deductions = np.zeros(count, dtype=np.int64)
+    paid_leave_days = np.zeros(count, dtype=np.int64)
+    departments = []
+    for i, emp in enumerate(employees):
+        ids[i] = emp.id
+        salary[i] = money.to_centavos(emp.salary)
+        hourly_rate[i] = money.to_centavos(emp.hourly_rate)
+        row = hours.get(emp.id)
+        if row:
+            regular_hours[i] = row['regular_hundredths'] or 0
+            overtime_hours[i] = row['overtime_hundredths'] or 0
+        loan_deductions[i] = loans.get(emp.id, 0)
+        paid_leave_days[i] = leave.get(emp.id, (0, 0))[0]
+        departments.append(emp.department or UNASSIGNED_DEPARTMENT)
+
+    return Roster(ids, np.array(departments, dtype=object).astype(str), salary, hourly_rate,
+                  regular_hours, overtime_hours, loan_deductions, paid_leave_days)
+
+
+def _withholding_tax(taxable_income):
+    """Vectorized utils.calculate_withholding_tax over an array of taxable incomes."""
+    brackets = utils.TAX_BRACKETS
+    upper_bounds = np.array([b[0] for b in brackets[:-1]], dtype=np.int64)
+    base_tax = np.array([b[1] for b in brackets], dtype=np.int64)
+    excess_over = np.array([b[2] for b in brackets], dtype=np.int64)
+    numerators = np.array([b[3].numerator for b in brackets], dtype=np.int64)
+    denominators = np.array([b[3].denominator for b in brackets], dtype=np.int64)
+    # side='left' picks the first bracket whose upper bound is >= income;
+    # incomes above every bound land on the open-ended last bracket.
+    bracket = np.searchsorted(upper_bounds, taxable_income, side='left')
+    excess = taxable_income - excess_over[bracket]
+    return base_tax[bracket] + money.div_round_array(excess * numerators[bracket], denominators[bracket])
+
+
+def simulate(roster, scenario=None):
+    """
+    Evaluates payroll for every employee in the roster under a scenario.
+    `scenario` overrides any of SCENARIO_DEFAULTS; unknown keys raise ValueError.
+    Returns a dict of int64 centavo arrays keyed by RESULT_FIELDS.
+    """
+    params = dict(SCENARIO_DEFAULTS)
+    for key, value in (scenario or {}).items():
+        if key not in SCENARIO_DEFAULTS:
+            raise ValueError(f'Unknown scenario parameter: {key}')
+        params[key] = float(value)
+    # Rates become exact fractions and peso amounts become centavos
+    p = {key: money.rate(value) if key in RATE_PARAMETERS else money.to_centavos(value)
+         for key, value in params.items()}
+
+    base_salary = money.apply_rate_array(roster.salary, 1 + p['salary_pct'] / 100)
+    hourly_rate = money.apply_rate_array(roster.hourly_rate, 1 + p['hourly_rate_pct'] / 100)
+    regular_pay = money.apply_rate_array(roster.regular_hours * hourly_rate, money.rate(1) / money.HOUR_SCALE)
+    overtime_pay = money.apply_rate_array(roster.overtime_hours * hourly_rate,
+                                          p['overtime_multiplier'] / money.HOUR_SCALE)
+    leave_pay = roster.paid_leave_days * utils.HOURS_PER_LEAVE_DAY * hourly_rate
+    gross = regular_pay + overtime_pay + leave_pay
+
+    sss = np.where(gross >= p['sss_max_salary'], p['sss_max_share'],
+                   np.where(gross < p['sss_min_salary'], p['sss_min_share'],
+                            money.apply_rate_array(gross, p['sss_rate'])))
+    philhealth = money.apply_rate_array(np.clip(gross, p['philhealth_floor'], p['philhealth_ceiling']),
+                                        p['philhealth_rate'] / 2)
+    pagibig = np.minimum(money.apply_rate_array(gross, p['pagibig_rate']), p['pagibig_cap'])
+    tax = _withholding_tax(gross - (sss + philhealth + pagibig))
+
+    total_deductions = sss + philhealth + pagibig + tax + roster.loan_deductions
+    return {
+        'base_salary': base_salary,
+        'gross_pay': gross,
+        'sss': sss,
+        'philhealth': philhealth,
+        'pagibig': pagibig,
+        'tax': tax,
+        'loan_deductions': roster.loan_deductions,
+        'total_deductions': total_deductions,
+        'net_pay': gross - total_deductions,
+    }
+
+
+def by_department(roster, result):
+    """Sums each result array per department in exact integers. Returns (rows, company_totals)."""
+    n_departments = len(roster.department_names)
+    sums = {}
+    for field in RESULT_FIELDS:
+        # np.add.at keeps int64 (bincount would sum through float64)
+        sums[field] = np.zeros(n_departments, dtype=np.int64)
+        np.add.at(sums[field], roster.department_codes, result[field])
+    headcount = np.bincount(roster.department_codes, minlength=n_departments)
+
+    rows = []
+    for i, name in enumerate(roster.department_names):
+        row = {'department': str(name), 'headcount': int(headcount[i])}
+        row.update({field: int(sums[field][i]) for field in RESULT_FIELDS})
+        rows.append(row)
+    totals = {'department': 'Total', 'headcount': len(roster)}
+    totals.update({field: int(result[field].sum()) for field in RESULT_FIELDS})
+    return rows, totals
+
+
+def compare(roster, scenario):
+    """
+    Runs the current rules and the scenario over the same roster and returns
+    per-department baseline, scenario and delta figures, in centavos.
+    """
+    baseline_rows, baseline_totals = by_department(roster, simulate(roster))
+    scenario_rows, scenario_totals = by_department(roster, simulate(roster, scenario))
+
+    def with_deltas(base, new):
+        row = {'department': base['department'], 'headcount': base['headcount'],
+               'baseline': {f: base[f] for f in RESULT_FIELDS},
+               'scenario': {f: new[f] for f in RESULT_FIELDS}}
+        row['delta'] = {f: new[f] - base[f] for f in RESULT_FIELDS}
+        return row
+
+    return {
+        'departments': [with_deltas(b, s) for b, s in zip(baseline_rows, scenario_rows)],
+        'total': with_deltas(baseline_totals, scenario_totals),
+    }
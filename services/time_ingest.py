@@ -0,0 +1,142 @@
+"""
+Group-commit writer for high-rate time-record ingestion.
+
+Clock-in terminals post one record at a time. Writing each with
+models.add_time_record costs a connection, a write lock and an fsync per
+record, and concurrent posters queue up behind SQLite's single writer.
+
+Instead, posters hand records to an in-process queue and wait. One writer
+thread takes everything queued, up to `max_batch` rows or `flush_interval`
+seconds after the first one arrived, inserts the batch in a single
+transaction and only then acknowledges each poster. A poster is never told a
+record was saved before the commit that saved it. When a batch fails, its
+rows are written again one at a time, so one bad row (or a lost connection)
+only fails the posters it belongs to, and the writer keeps running.
+
+A poster that stops waiting (add() raising TimeoutError) has not lost its
+record: it stays queued and is still written, so callers report it as
+accepted, not failed, and must not post it again.
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import models
+
+FLUSH_INTERVAL = 0.005  # seconds to wait for more rows after the first one
+MAX_BATCH = 500         # rows per transaction
+SUBMIT_TIMEOUT = 30     # seconds a poster waits for its commit
+
+_STOP = object()
+
+
+class TimeRecordWriter:
+    """Owns the queue and the writer thread. Use get_writer() for the shared instance."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='time-ingest-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, employee_id, date, hours_worked, overtime_hours):
+        """Queues one record. Returns a Future resolved with its row id once committed."""
+        future = Future()
+        self._queue.put(((employee_id, date, hours_worked, overtime_hours), future))
+        return future
+
+    def add(self, employee_id, date, hours_worked, overtime_hours, timeout=SUBMIT_TIMEOUT):
+        """
+        Queues one record and blocks until it is committed. Returns its row id.
+        Raises TimeoutError if the commit takes longer than `timeout`; the
+        record is still queued and will be written.
+        """
+        return self.submit(employee_id, date, hours_worked, overtime_hours).result(timeout)
+
+    def close(self):
+        """Writes everything still queued, then stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _collect(self):
+        """Blocks for the first item, then gathers more until the batch is full or the interval ends."""
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return [], True
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            ids = self._insert([record for record, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Retry row by row: only the rows that fail on their own are refused
+            for item in batch:
+                self._flush([item])
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), row_id in zip(batch, ids):
+            future.set_result(row_id)
+
+    def _insert(self, records):
+        """Inserts `records` in one transaction. Returns their row ids; raises (nothing written) on any error."""
+        conn = None
+        try:
+            conn = models.get_db_connection()
+            c = conn.cursor()
+            ids = []
+            for record in records:
+                c.execute('''
+                    INSERT INTO time_records (employee_id, date, hours_worked, overtime_hours)
+                    VALUES (?, ?, ?, ?)
+                ''', record)
+                ids.append(c.lastrowid)
+            conn.commit()
+            return ids
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Returns the process-wide writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TimeRecordWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,82 @@
+import models
+import utils
+from services import archive, compaction
+
+
+def _pages(client, url):
+    """Every record of a paginated API list, following next_cursor."""
+    records, cursor = [], None
+    while True:
+        body = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        records += body['data']
+        cursor = body['next_cursor']
+        if cursor is None:
+            return records
+
+
+def test_bulk_time_records_are_all_or_nothing_and_page_with_fields(admin_client, add_employee):
+    ana, ben = add_employee('Ana Cruz'), add_employee('Ben Reyes')
+    posted = [{'employee_id': emp, 'date': f'2026-09-{day:02d}', 'hours_worked': 8, 'overtime_hours': day % 2}
+              for day in range(1, 11) for emp in (ben, ana)]
+
+    bad = posted + [{'employee_id': 999, 'date': '2026-09-01', 'hours_worked': 8}]
+    response = admin_client.post('/api/v1/time-records', json=bad)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 20, 'error': 'no employee with id 999'}]
+    assert models.count_rows(('time_records',)) == {'time_records': 0}
+
+    response = admin_client.post('/api/v1/time-records', json=posted)
+    assert response.status_code == 201
+    ids = response.get_json()['ids']
+    assert [models.get_time_records(r['employee_id'], r['date'], r['date'])[0]['id'] for r in posted] == ids
+
+    records = _pages(admin_client, '/api/v1/time-records?fields=employee_id,date,overtime_hours&limit=3')
+    assert records == [{'employee_id': emp, 'date': f'2026-09-{day:02d}', 'overtime_hours': day % 2}
+                       for emp in (ana, ben) for day in range(1, 11)]
+
+    response = admin_client.get('/api/v1/employees?fields=name,salary_secret')
+    assert response.status_code == 400
+    body = admin_client.get(f'/api/v1/employees?ids={ben},404,{ana}&fields=id,name').get_json()
+    assert body['data'] == [{'id': ana, 'name': 'Ana Cruz'}, {'id': ben, 'name': 'Ben Reyes'}]
+    assert body['missing'] == [404]
+
+
+def test_time_records_page_through_compacted_periods_and_payslips_by_period(admin_client, add_employee, today):
+    emps = [add_employee(f'Employee {i}') for i in range(3)]
+    for day in range(1, 31):
+        for emp in emps:
+            models.add_time_record(emp, f'2026-09-{day:02d}', 8.0, 0.0)
+    models.add_time_record(emps[1], '2026-10-01', 4.0, 0.0)
+    expected = _pages(admin_client, '/api/v1/time-records?limit=1000')
+    payrolls = utils.calculate_payroll_by_employee('2026-09-01', '2026-09-30')
+    models.record_payroll_run('2026-09-01', '2026-09-30', list(payrolls.items()))
+    compaction.compact('2026-10-01', today=today)
+    assert models.count_rows(('time_records',)) == {'time_records': 1}
+
+    assert _pages(admin_client, '/api/v1/time-records?limit=7') == expected
+    ranged = _pages(admin_client, f'/api/v1/time-records?employee_ids={emps[1]}&start=2026-09-29&limit=2')
+    assert [(r['employee_id'], r['date']) for r in ranged] == [(emps[1], '2026-09-29'), (emps[1], '2026-09-30'),
+                                                              (emps[1], '2026-10-01')]
+
+    payslips = _pages(admin_client, '/api/v1/payslips?start=2026-09-01&end=2026-09-30'
+                                    '&fields=employee_id,net_pay_centavos&limit=2')
+    assert payslips == [{'employee_id': emp, 'net_pay_centavos': payrolls[emp].net_salary_centavos} for emp in emps]
+    assert admin_client.get('/api/v1/payslips?start=2026-10-01').get_json()['data'] == []
+
+
+def test_archived_employees_are_listed_and_take_time_records(admin_client, add_employee, pay_run, today):
+    active, resigned = add_employee('Ana Cruz'), add_employee('Ben Reyes')
+    pay_run('2024-03-01', '2024-03-31', [resigned])
+    models.archive_employee(resigned, '2024-04-30')
+    archive.archive('2025-01-01', today=today)
+    assert models.count_rows(('employees',)) == {'employees': 1}
+
+    assert [r['id'] for r in _pages(admin_client, '/api/v1/employees?fields=id&limit=1')] == [active]
+    listed = _pages(admin_client, '/api/v1/employees?fields=id,name&include_archived=1&limit=1')
+    assert listed == [{'id': active, 'name': 'Ana Cruz'}, {'id': resigned, 'name': 'Ben Reyes'}]
+    body = admin_client.get(f'/api/v1/employees?ids={resigned}&include_archived=1&fields=name').get_json()
+    assert (body['data'], body['missing']) == ([{'name': 'Ben Reyes'}], [])
+
+    response = admin_client.post('/api/v1/time-records',
+                                 json=[{'employee_id': resigned, 'date': '2024-04-30', 'hours_worked': 8}])
+    assert response.status_code == 201
@@ -0,0 +1,62 @@
+import csv
+import io
+
+import models
+
+
+def test_employee_list_and_csv_export(admin_client, add_employee):
+    emp_id = add_employee()
+    models.add_time_record(emp_id, '2026-10-01', 8.0, 1.0)
+
+    response = admin_client.get('/employees')
+    assert response.status_code == 200
+    assert b'Juan Santos' in response.data
+
+    response = admin_client.get('/export/csv')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/csv')
+    assert b'Juan Santos' in response.data
+    rows = list(csv.reader(io.StringIO(response.data.decode())))
+    assert [len(row) for row in rows] == [10, 10]
+    assert response.headers['X-Snapshot-Time']
+    again = admin_client.get('/export/csv', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_process_payroll_saves_payslips_and_loan_history(admin_client, add_employee):
+    emp_id = add_employee()
+    models.add_loan(emp_id, 'Company Loan', 1000.0, 250.0)
+
+    response = admin_client.post('/payroll/process', follow_redirects=True)
+    assert b'Payroll processed successfully for 1 employees' in response.data
+    payslip = models.get_payslips_by_employee(emp_id)[0]
+    assert payslip['loan_deductions_centavos'] == 25000
+
+    response = admin_client.get(f'/loans/{emp_id}')
+    assert response.status_code == 200
+    assert b'250.00' in response.data
+
+
+def test_list_pages_stream_rows_after_the_summary(admin_client, add_employee):
+    emp_id = add_employee()
+    models.add_leave_request(emp_id, 'Vacation', '2026-10-05', '2026-10-06', 'Family trip')
+    with admin_client.session_transaction() as session:
+        session['_flashes'] = [('success', 'Employee updated!')]
+
+    response = admin_client.get('/employees')
+    assert response.is_streamed
+    body = response.get_data()
+    assert body.index(b'Total Net Pay') < body.index(b'Juan Santos')
+    assert b'Employee updated!' in body
+    # The flash was popped before streaming began, so the session no longer holds it
+    assert b'Employee updated!' not in admin_client.get('/employees').data
+
+    response = admin_client.get('/leave')
+    assert response.is_streamed
+    assert b'Pending Requests (1)' in response.data
+    assert b'Family trip' in response.data
+
+    response = admin_client.get('/users')
+    assert response.is_streamed
+    assert b'All System Users (1)' in response.data
+    assert b'Juan Santos (ID: %d)' % emp_id in response.data
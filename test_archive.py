@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+import models
+from services import archive
+
+
+def test_archived_history_still_shows_in_history_views(add_employee, pay_run, today):
+    active = add_employee('Ana Cruz')
+    resigned = add_employee('Ben Reyes')
+    models.add_time_record(active, '2024-03-04', 8.0, 0.0)
+    models.add_time_record(active, '2026-10-01', 8.0, 0.0)
+    payroll = pay_run('2024-03-01', '2024-03-31', [active, resigned])
+    models.archive_employee(resigned, '2024-04-30')
+    ytd = dict(models.get_ytd(active, 2024))
+
+    report = archive.archive('2025-01-01', vacuum=True, today=today)
+    assert report['moved'] == {'time_records': 1, 'payslips': 2, 'employees': 1}
+    assert report['after']['rows'] == {'employees': 1, 'time_records': 1, 'payslips': 0}
+
+    assert [r['date'] for r in models.get_time_records(active, '2024-01-01', '2026-12-31')] == ['2024-03-04',
+                                                                                                 '2026-10-01']
+    assert len(models.get_payslips_by_employee(resigned)) == 1
+    assert dict(models.get_ytd(active, 2024)) == ytd
+    # Re-running an archived period finds its payslips in the archive
+    assert models.record_payroll_run('2024-03-01', '2024-03-31', [(active, payroll)]) == (0, 0)
+    assert len(models.get_payslips_by_employee(active)) == 1
+    # Period reports read the archived payslips too
+    assert [row['name'] for row in models.iter_period_credits('2024-03-01', '2024-03-31')] == ['Ana Cruz',
+                                                                                              'Ben Reyes']
+    assert len(list(models.iter_remittance_rows('sss_number', '2024-03-01', '2024-03-31'))) == 2
+    assert models.get_period_payslip_stamp('2024-03-01', '2024-03-31')[0] == 2
+    # Rebuilding the derived tables counts the archived payslips
+    models.rebuild_payroll_ytd()
+    assert dict(models.get_ytd(active, 2024)) == ytd
+    assert models.rebuild_leave_ledger({'Vacation': 125}) == (2, 0)
+    with models.snapshot():
+        # Archive writes after the snapshot began are not seen, even before its first archive read
+        writer = sqlite3.connect(models.archive_path(), timeout=0)
+        writer.execute("UPDATE employees SET name = 'Ben Santos' WHERE id = ?", (resigned,))
+        writer.commit()
+        writer.close()
+        assert models.get_employee_by_id(resigned).name == 'Ben Reyes'
+    assert models.get_employee_by_id(resigned).name == 'Ben Santos'
+
+    with pytest.raises(ValueError):
+        archive.archive('2026-10-02', today=today)
@@ -0,0 +1,56 @@
+import csv
+import io
+
+import pytest
+
+import models
+from services import bank_files
+
+PERIOD = ('2026-10-01', '2026-10-31')
+
+
+def test_fixed_width_file_has_control_and_hash_totals(add_employee, pay_run):
+    paid = add_employee('Ana Peña')
+    unpaid = add_employee('Ben Reyes')  # no bank account: left out of the file
+    conn = models.get_db_connection()
+    conn.execute("UPDATE employees SET bank_account_number = '' WHERE id = ?", (unpaid,))
+    conn.commit()
+    conn.close()
+    net = pay_run(*PERIOD, [paid, unpaid]).net_salary_centavos
+
+    totals = bank_files.ControlTotals()
+    lines = list(bank_files.generate('fixed', *PERIOD, totals, batch_date='2026-10-31'))
+    assert [line[0] for line in lines] == ['H', 'D', 'T']
+    assert all(len(line) == 82 for line in lines)  # 80 columns + CRLF
+    assert lines[0].startswith('HPAYROLL   202610312026100120261031')
+    assert lines[1][7:23] == '0000123456789012' and int(lines[1][23:38]) == net
+    assert lines[1][46:80] == 'Ana Pena'.ljust(34)  # ASCII, so 80 bytes as well as 80 characters
+    assert all(len(line.encode()) == 82 for line in lines)
+    assert (totals.count, totals.total, totals.hash_total, totals.skipped) == (1, net, 123456789012, 1)
+    assert lines[2][:40] == 'T000001' + f'{net:018d}' + f'{123456789012:015d}'
+
+
+def test_bank_file_route_streams_csv(admin_client, add_employee, pay_run):
+    emp_id = add_employee()
+    net = pay_run(*PERIOD, [emp_id]).net_salary_centavos
+
+    response = admin_client.get(f'/payroll/bank-file?format=csv&start={PERIOD[0]}&end={PERIOD[1]}')
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'].endswith('bank_credits_2026-10-01_2026-10-31.csv')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[1] == ['1', '123456789012', 'Juan Santos', f'{net // 100}.{net % 100:02d}', str(emp_id)]
+    assert rows[2][:2] == ['TOTAL', '1']
+
+
+def test_bank_file_that_cannot_be_built_is_refused_before_streaming(admin_client, add_employee, pay_run):
+    emp_id = add_employee()
+    conn = models.get_db_connection()
+    conn.execute("UPDATE employees SET bank_account_number = '12345678901234567' WHERE id = ?", (emp_id,))
+    conn.commit()
+    conn.close()
+    pay_run(*PERIOD, [emp_id])
+
+    response = admin_client.get(f'/payroll/bank-file?format=fixed&start={PERIOD[0]}&end={PERIOD[1]}')
+    assert response.status_code == 302
+    with pytest.raises(ValueError, match='Juan Santos'):
+        bank_files.validate('fixed', *PERIOD)
@@ -0,0 +1,32 @@
+import sqlite3
+import threading
+import time
+
+import models
+from benchmarks import loadtest
+
+
+def test_percentile_nearest_rank():
+    values = sorted(range(1, 101))
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([], 95) is None
+
+
+def test_instrumented_connections_count_lock_waits(db):
+    stats = loadtest.LockStats()
+    connect = loadtest.instrumented_connection_factory(stats)
+
+    writer = sqlite3.connect(db, check_same_thread=False)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("INSERT INTO time_records (employee_id, date) VALUES (1, '2026-10-01')")
+    threading.Timer(0.05, writer.commit).start()
+
+    other = connect()
+    other.cursor().execute("INSERT INTO time_records (employee_id, date) VALUES (2, '2026-10-01')")
+    other.commit()
+    time.sleep(0.01)
+
+    assert stats.waits >= 1
+    assert stats.timeouts == 0
+    assert models.get_db_connection().execute('SELECT COUNT(*) FROM time_records').fetchone()[0] == 2
@@ -0,0 +1,55 @@
+import pytest
+
+import models
+import utils
+from money import to_hundredths
+from services import compaction, leave_accrual
+
+
+def test_compacted_periods_keep_payroll_totals_and_expand(add_employee, today):
+    ana = add_employee('Ana Cruz')
+    ben = add_employee('Ben Reyes')
+    for day in range(1, 16):
+        models.add_time_record(ana, f'2026-09-{day:02d}', 8.0, 1.25)
+        models.add_time_record(ben, f'2026-09-{day:02d}', 7.5, 0.285)  # 0.285 * 100 = 28.4999...
+    models.add_time_record(ana, '2026-10-01', 8.0, 0.0)
+    before = utils.calculate_payroll_by_employee('2026-09-01', '2026-09-15')
+    records = [dict(r) for r in models.get_time_records(ana, '2026-09-01', '2026-10-31')]
+    with pytest.raises(ValueError):
+        models.compact_time_records('2026-09-01', '2026-09-15')
+    models.record_payroll_run('2026-09-01', '2026-09-15', list(before.items()))
+
+    report = compaction.compact('2026-10-01', today=today)
+    assert (report['records'], report['summaries']) == (30, 2)
+    assert models.count_rows(('time_records',)) == {'time_records': 1}
+    assert report['compressed_bytes'] < report['raw_bytes']
+
+    assert utils.calculate_payroll_by_employee('2026-09-01', '2026-09-15') == before
+    assert utils.calculate_payroll(models.get_employee_by_id(ana), '2026-09-01', '2026-09-15') == before[ana]
+    # a range cutting through the compacted period still counts only its days
+    hours = {row['employee_id']: dict(row) for row in models.get_period_hours('2026-09-10', '2026-10-31')}
+    assert hours[ana]['regular_hundredths'] == 7 * 800
+    assert hours[ben]['overtime_hundredths'] == 6 * 29 == sum(
+        to_hundredths(r['overtime_hours']) for r in models.get_time_records(ben, '2026-09-10', '2026-10-31'))
+    assert [dict(r) for r in models.get_time_records(ana, '2026-09-01', '2026-10-31')] == records
+
+
+def test_compacted_hours_still_keep_worked_days_off_leave(add_employee, today):
+    emp_id = add_employee(hourly_rate=100.0)
+    for start, end in (('2026-06-01', '2026-06-30'), ('2026-07-01', '2026-07-31'), ('2026-08-01', '2026-08-31')):
+        models.record_payroll_run(start, end, [(emp_id, utils.compute_payroll(0, 0, 0, 0))],
+                                  leave_accrual.MONTHLY_ENTITLEMENTS)
+    models.add_leave_request(emp_id, 'Vacation', '2026-09-01', '2026-09-02', None)
+    models.update_leave_status(models.get_leave_requests(emp_id)[0]['id'], 'Approved')
+    models.add_time_record(emp_id, '2026-09-01', 8.0, 0.0)  # worked the first day of the leave
+    before = utils.calculate_payroll_by_employee('2026-09-01', '2026-09-30')
+    assert before[emp_id].gross_pay_centavos == 160000
+    assert utils.get_leave_days('2026-09-01', '2026-09-30') == {emp_id: (1, 0)}
+    models.record_payroll_run('2026-09-01', '2026-09-30', list(before.items()))
+
+    compaction.compact('2026-10-01', today=today)
+    assert models.count_rows(('time_records',)) == {'time_records': 0}
+    assert models.get_worked_leave_dates('2026-09-01', '2026-09-30') == {(emp_id, '2026-09-01')}
+    assert utils.get_leave_days('2026-09-01', '2026-09-30') == {emp_id: (1, 0)}
+    assert utils.calculate_payroll_by_employee('2026-09-01', '2026-09-30') == before
+    assert utils.calculate_payroll(models.get_employee_by_id(emp_id), '2026-09-01', '2026-09-30') == before[emp_id]
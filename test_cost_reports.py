@@ -0,0 +1,80 @@
+import models
+from services import cost_reports, remittances
+
+
+def test_pivot_groups_by_department_with_month_over_month_changes(add_employee, pay_run, today):
+    it, finance = add_employee('Ana Cruz'), add_employee('Ben Reyes', department='Finance', position='Analyst')
+    july = pay_run(*remittances.month_bounds('2026-07'), [it]).gross_pay_centavos
+    august = pay_run(*remittances.month_bounds('2026-08'), [it, finance], regular_hours=17600).gross_pay_centavos
+    september = pay_run(*remittances.month_bounds('2026-09'), [it]).gross_pay_centavos
+
+    report = cost_reports.pivot('department', '2026-08', '2026-09', today=today)
+    assert report['months'] == ['2026-08', '2026-09']
+    finance_row, it_row = report['rows']
+    assert finance_row['labels'] == ('Finance',)
+    assert finance_row['cells'] == {'2026-08': august}
+    assert finance_row['changes'] == {'2026-08': august}
+    assert it_row['cells'] == {'2026-08': august, '2026-09': september}
+    assert it_row['changes'] == {'2026-08': august - july, '2026-09': september - august}
+    assert report['totals']['cells'] == {'2026-08': 2 * august, '2026-09': september}
+    assert report['totals']['changes'] == {'2026-08': 2 * august - july, '2026-09': september - 2 * august}
+    assert report['totals']['total'] == 2 * august + september
+
+    by_position = cost_reports.pivot('department_position', '2026-08', '2026-08', 'tax_centavos', today=today)
+    assert [row['labels'] for row in by_position['rows']] == [('Finance', 'Analyst'), ('IT', 'Developer')]
+
+
+def test_a_period_is_costed_in_the_month_it_ends(add_employee, pay_run, today):
+    ana = add_employee('Ana Cruz')
+    september = pay_run(*remittances.month_bounds('2026-09'), [ana]).gross_pay_centavos
+    weekly = pay_run('2026-09-28', '2026-10-04', [ana], regular_hours=4000).gross_pay_centavos
+
+    report = cost_reports.pivot('department', '2026-09', '2026-10', today=today)
+    assert report['totals']['cells'] == {'2026-09': september, '2026-10': weekly}
+    assert models.get_payslip_month_stamps('2026-09', '2026-10') == {'2026-09': (1, 1), '2026-10': (1, 2)}
+
+
+def test_closed_months_are_cached_and_the_open_month_refreshed(add_employee, pay_run, today):
+    ana = add_employee('Ana Cruz')
+    pay_run(*remittances.month_bounds('2026-08'), [ana])
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-08', '2026-09', '2026-10']
+    assert cost_reports.refresh('2026-08', '2026-10', today) == []
+
+    # A new employee only rebuilds the open month; a late payslip rebuilds its closed month
+    ben = add_employee('Ben Reyes', department='Finance', position='Analyst')
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-10']
+    pay_run(*remittances.month_bounds('2026-08'), [ben])
+    pay_run(*remittances.month_bounds('2026-10'), [ana])
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-08', '2026-10']
+    report = cost_reports.pivot('department', '2026-08', '2026-10', today=today)
+    assert [(row['labels'], sorted(row['cells'])) for row in report['rows']] == [
+        (('Finance',), ['2026-08']), (('IT',), ['2026-08', '2026-10'])]
+
+    # Deleting a closed month's payslip rebuilds that month alone
+    conn = models.get_db_connection()
+    conn.execute('DELETE FROM payslips WHERE employee_id = ?', (ben,))
+    conn.commit()
+    conn.close()
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-08', '2026-10']
+    assert cost_reports.refresh('2026-08', '2026-10', today) == []
+
+    # Once closed, a month is kept even when employees change
+    models.update_employee(ben, 'Ben Reyes', 'Analyst', 'Audit', 17600.0, 'Monthly', '2024-01-15', 'default.png',
+                           100.0, '09171234567', 'Davao City', '123456789012',
+                           '34-1234567-8', '123456789012', '123456789012', '123-456-789-000')
+    pay_run(*remittances.month_bounds('2026-09'), [ben])
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-09', '2026-10']
+    assert cost_reports.pivot('department', '2026-09', '2026-09', today=today)['rows'][0]['labels'] == ('Audit',)
+    models.update_employee(ben, 'Ben Reyes', 'Analyst', 'Finance', 17600.0, 'Monthly', '2024-01-15', 'default.png',
+                           100.0, '09171234567', 'Davao City', '123456789012',
+                           '34-1234567-8', '123456789012', '123456789012', '123-456-789-000')
+    assert cost_reports.refresh('2026-08', '2026-10', today) == ['2026-10']
+
+
+def test_cost_report_page_links_remittances(admin_client, add_employee, pay_run):
+    pay_run(*remittances.month_bounds('2026-09'), [add_employee('Ana Cruz')])
+
+    page = admin_client.get('/reports?by=position&start=2026-09&end=2026-10').get_data(as_text=True)
+    assert 'Developer' in page and '2026-09' in page
+    assert '/reports/remittances/sss/2026-09.xlsx' in page
+    assert 'Invalid report' in admin_client.get('/reports?metric=salary', follow_redirects=True).get_data(as_text=True)
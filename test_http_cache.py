@@ -0,0 +1,40 @@
+import gzip
+
+from web import admin
+import models
+
+
+def test_list_page_is_gzipped_as_it_streams(admin_client, add_employee):
+    for i in range(30):
+        add_employee(f'Employee {i:02d}')
+
+    plain = admin_client.get('/employees').get_data()
+    response = admin_client.get('/employees', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'].endswith('-gzip"')
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_unchanged_reload_is_304_without_running_the_view(admin_client, monkeypatch, add_employee):
+    emp_id = add_employee()
+    response = admin_client.get('/employees')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    def fail(*args, **kwargs):
+        raise AssertionError('payroll was recomputed')
+    with monkeypatch.context() as patch:
+        patch.setattr(admin, 'calculate_payroll_by_employee', fail)
+        response = admin_client.get('/employees', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    # Inserts move MAX(rowid); updates and deletes bump data_versions
+    models.add_time_record(emp_id, '2026-10-01', 8.0, 0.0)
+    response = admin_client.get('/employees', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    models.archive_employee(emp_id)
+    assert admin_client.get('/employees', headers={'If-None-Match': etag}).status_code == 200
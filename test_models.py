@@ -1,4 +1,171 @@
-from models import init_user_db
+import json
+import sqlite3
 
-init_user_db()
-print("init_user_db ran successfully.")
\ No newline at end of file
+import pytest
+
+import models
+import utils
+from benchmarks import datagen
+
+
+def test_add_and_archive_employee(add_employee):
+    emp_id = add_employee()
+    assert models.get_employee_by_id(emp_id).name == 'Juan Santos'
+
+    models.archive_employee(emp_id, '2026-01-31')
+    assert models.get_employees() == []
+    assert models.get_employee_by_id(emp_id).date_resigned == '2026-01-31'
+
+
+def test_update_loan_payment_caps_at_total(add_employee):
+    emp_id = add_employee()
+    models.add_loan(emp_id, 'Company Loan', 1000.0, 600.0)
+    loan = models.get_active_loans(emp_id)[0]
+
+    models.update_loan_payment(loan['id'], 600.0)
+    models.update_loan_payment(loan['id'], 600.0)
+
+    assert models.get_active_loans(emp_id) == []
+
+
+def test_payroll_run_settles_loans_once_per_period(add_employee):
+    emp_id = add_employee()
+    models.add_loan(emp_id, 'Company Loan', 1000.0, 600.0)
+    models.add_loan(emp_id, 'Cash Advance', 300.0, 100.0)
+    payroll = utils.compute_payroll(0, 0, 0, 70000)
+
+    assert models.record_payroll_run('2026-09-01', '2026-09-30', [(emp_id, payroll)]) == (1, 2)
+    # Re-running the period neither duplicates the payslip nor charges the loans again
+    assert models.record_payroll_run('2026-09-01', '2026-09-30', [(emp_id, payroll)]) == (0, 0)
+    models.record_payroll_run('2026-10-01', '2026-10-31', [(emp_id, payroll)])
+
+    loans = {loan['loan_name']: loan for loan in models.get_active_loans(emp_id)}
+    assert list(loans) == ['Cash Advance']
+    assert loans['Cash Advance']['amount_paid'] == 200.0
+    payments = models.get_loan_payments(emp_id)
+    # The second Company Loan deduction is capped at the 400.00 balance
+    assert [(p['loan_name'], p['amount_centavos']) for p in payments if p['loan_name'] == 'Company Loan'] == \
+        [('Company Loan', 40000), ('Company Loan', 60000)]
+    assert len(models.get_payslips_by_employee(emp_id)) == 2
+
+    # A loan taken after the payroll was computed waits for the next payroll
+    models.add_loan(emp_id, 'Emergency Loan', 500.0, 500.0)
+    models.record_payroll_run('2026-11-01', '2026-11-30', [(emp_id, utils.compute_payroll(0, 0, 0, 10000))])
+    payments = models.get_loan_payments(emp_id)
+    assert sum(p['amount_centavos'] for p in payments if p['pay_period_end'] == '2026-11-30') == 10000
+    assert 'Emergency Loan' not in {p['loan_name'] for p in payments}
+
+
+def test_leave_ledger_accrues_consumes_and_rebuilds(add_employee):
+    from services import leave_accrual
+    emp_id = add_employee()
+    payroll = utils.compute_payroll(0, 0, 0, 0)
+    for start, end in (('2026-08-01', '2026-08-31'), ('2026-09-01', '2026-09-30')):
+        models.record_payroll_run(start, end, [(emp_id, payroll)], leave_accrual.MONTHLY_ENTITLEMENTS)
+
+    # Friday to the next Tuesday is three working days
+    models.add_leave_request(emp_id, 'Vacation', '2026-10-02', '2026-10-06', 'Trip')
+    leave_id = models.get_leave_requests(emp_id)[0]['id']
+    models.update_leave_status(leave_id, 'Approved')
+    models.update_leave_status(leave_id, 'Approved')  # no double deduction
+    assert leave_accrual.balances_for(emp_id) == [('Vacation', -50), ('Sick', 250)]
+
+    models.update_leave_status(leave_id, 'Rejected')
+    assert dict(leave_accrual.balances_for(emp_id))['Vacation'] == 250
+    models.update_leave_status(leave_id, 'Approved')
+    incremental = leave_accrual.balances_for(emp_id)
+
+    assert leave_accrual.rebuild() == (4, 1)
+    assert leave_accrual.balances_for(emp_id) == incremental
+    assert models.get_leave_requests(emp_id, status=None)[0]['status'] == 'Approved'
+
+
+def test_datagen_is_deterministic(tmp_path):
+    first = str(tmp_path / 'a.db')
+    second = str(tmp_path / 'b.db')
+    summary = datagen.generate(first, employees=50, days=14, start_date='2026-10-01', users=3)
+    datagen.generate(second, employees=50, days=14, start_date='2026-10-01', users=3)
+
+    assert summary['employees'] == 50
+    assert summary['users'] == 4
+    dumps = []
+    for path in (first, second):
+        conn = sqlite3.connect(path)
+        dumps.append([tuple(row) for table in ('employees', 'time_records', 'loans', 'leave_requests')
+                      for row in conn.execute(f'SELECT * FROM {table} ORDER BY id')])
+        conn.close()
+    assert dumps[0] == dumps[1]
+
+
+def test_datagen_refuses_live_database():
+    with pytest.raises(ValueError, match='live database.db'):
+        datagen.generate('database.db', employees=1)
+
+
+def test_payroll_ytd_follows_payslips(add_employee, pay_run):
+    emp_id = add_employee()
+    for month in ('01', '02', '03'):
+        payroll = pay_run(f'2026-{month}-01', f'2026-{month}-28', [emp_id])
+
+    ytd = models.get_ytd(emp_id, 2026)
+    contributions = payroll.sss_centavos + payroll.philhealth_centavos + payroll.pagibig_centavos
+    assert (ytd['payslips'], ytd['gross_centavos'], ytd['contributions_centavos'], ytd['tax_centavos']) == (
+        3, 3 * payroll.gross_pay_centavos, 3 * contributions, 3 * payroll.tax_centavos)
+    assert ytd['taxable_centavos'] == ytd['gross_centavos'] - ytd['contributions_centavos']
+
+    # Recomputing February only counts January
+    before, = models.get_ytd_before('2026-02-01', emp_id)
+    assert (before['payslips'], before['tax_centavos']) == (1, payroll.tax_centavos)
+
+    conn = models.get_db_connection()
+    conn.execute("UPDATE payslips SET tax_centavos = 0 WHERE pay_period_start = '2026-03-01'")
+    conn.execute("DELETE FROM payslips WHERE pay_period_start = '2026-01-01'")
+    conn.commit()
+    conn.close()
+    ytd = dict(models.get_ytd(emp_id, 2026))
+    assert (ytd['payslips'], ytd['tax_centavos']) == (2, payroll.tax_centavos)
+    models.rebuild_payroll_ytd()
+    assert dict(models.get_ytd(emp_id, 2026)) == ytd
+
+
+def test_snapshot_reads_do_not_see_or_block_writes(db, add_employee):
+    add_employee('Ana Cruz')
+    with models.snapshot() as snapshot:
+        assert [e.name for e in models.get_employees()] == ['Ana Cruz']
+        # Another connection commits meanwhile (WAL: no waiting on the open read)
+        writer = sqlite3.connect(db, timeout=0)
+        writer.execute("UPDATE employees SET name = 'Ana Reyes'")
+        writer.commit()
+        writer.close()
+        assert [e.name for e in models.get_employees()] == ['Ana Cruz']
+        assert snapshot.taken_at
+        with pytest.raises(sqlite3.OperationalError):  # snapshots are read-only
+            models.archive_employee(models.get_employees()[0].id)
+    assert [e.name for e in models.get_employees()] == ['Ana Reyes']
+
+
+def test_audit_log_records_batched_diffs(add_employee):
+    emp_id = add_employee()
+    employee = models.get_employee_by_id(emp_id)
+    token = models.set_audit_actor('hr-admin')
+    try:
+        # Form strings, as the edit page posts them: only real changes are recorded, as stored
+        for salary, hourly_rate in (('19000', '110'), ('19000.00', '110')):
+            models.update_employee(emp_id, employee.name, employee.position, employee.department, salary,
+                                   employee.payroll_period, employee.date_hired, employee.photo, hourly_rate,
+                                   employee.contact_number, employee.address, employee.bank_account_number,
+                                   employee.sss_number, employee.philhealth_number, employee.pagibig_number,
+                                   employee.tin_number)
+        models.add_loan(emp_id, 'Salary loan', 5000.0, 500.0)
+    finally:
+        models._audit_actor.reset(token)
+
+    update, = models.get_audit_log('employees', emp_id)
+    assert update['actor'] == 'hr-admin'
+    assert json.loads(update['changes']) == {'salary': [17600.0, 19000.0], 'hourly_rate': [100.0, 110.0]}
+    assert models.get_audit_log('loans')[0]['action'] == 'insert'
+
+    conn = models.get_db_connection()
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute('DELETE FROM audit_log')
+    conn.close()
@@ -0,0 +1,67 @@
+from dataclasses import replace
+from datetime import date
+
+import models
+import utils
+from services import pay_periods
+
+
+def test_periods_cover_each_frequency_including_year_ends():
+    december = pay_periods.current_period(today=date(2026, 12, 20))
+    assert (december.start_date, december.end_date) == ('2026-12-01', '2026-12-31')
+    second_half = pay_periods.current_period('Semi-Monthly', date(2024, 2, 16))
+    assert (second_half.start_date, second_half.end_date) == ('2024-02-16', '2024-02-29')
+    # 2027-01-01 is a Friday: it belongs to the week that started on Monday 2026-12-28
+    week = pay_periods.current_period('Weekly', date(2027, 1, 1))
+    assert (week.start_date, week.end_date) == ('2026-12-28', '2027-01-03')
+    assert pay_periods.previous_period(week).end_date == '2026-12-27'
+    assert pay_periods.current_period('Fortnightly', date(2026, 10, 18)).frequency == 'Monthly'
+    for frequency in pay_periods.FREQUENCIES:
+        periods = pay_periods.periods_for_year(frequency, 2026)
+        assert all((b.start - a.end).days == 1 for a, b in zip(periods, periods[1:]))
+
+
+def test_run_payroll_processes_each_frequency_for_its_own_period(add_employee):
+    monthly = add_employee('Ana Cruz')
+    weekly = add_employee('Ben Reyes')
+    models.add_time_record(weekly, '2026-10-13', 8.0, 0.0)
+    employees = [emp if emp.id == monthly else replace(emp, payroll_period='Weekly')
+                 for emp in models.get_employees()]
+
+    runs = pay_periods.run_payroll(today=date(2026, 10, 14), employees=employees)
+    assert [(r.period.frequency, r.period.start_date, r.period.end_date, r.payslips_created) for r in runs] == [
+        ('Monthly', '2026-10-01', '2026-10-31', 1), ('Weekly', '2026-10-12', '2026-10-18', 1)]
+    assert models.get_payslips_by_employee(weekly)[0]['pay_period_start'] == '2026-10-12'
+    assert [r.payslips_created for r in pay_periods.run_payroll(today=date(2026, 10, 15), employees=employees)] == [0, 0]
+
+
+def test_weekly_pay_charges_a_loan_once_a_month(add_employee):
+    emp_id = add_employee()
+    models.add_loan(emp_id, 'Salary loan', 5000.0, 500.0)
+    employees = [replace(emp, payroll_period='Weekly') for emp in models.get_employees()]
+
+    runs = pay_periods.run_payroll(month=(2026, 9), employees=employees)
+    assert [r.loan_payments_posted for r in runs] == [1, 0, 0, 0]
+    first_week = runs[0].period
+    payroll = utils.calculate_payroll(employees[0], first_week.start_date, first_week.end_date)
+    assert payroll.loan_deductions_centavos == 50000  # the period that charged it still shows it
+    assert utils.calculate_payroll(employees[0], '2026-09-07', '2026-09-13').loan_deductions_centavos == 0
+
+
+def test_weekly_pay_adds_up_to_the_monthly_contributions_and_tax(add_employee):
+    emp_id = add_employee(hourly_rate=150.0)
+    for day in range(1, 31):
+        models.add_time_record(emp_id, f'2026-09-{day:02d}', 8.0, 0.0)
+    employees = [replace(emp, payroll_period='Weekly') for emp in models.get_employees()]
+
+    pay_periods.run_payroll(month=(2026, 9), employees=employees)
+    payslips = models.get_payslips_by_employee(emp_id)
+    assert len(payslips) == 4
+    totals = {column: sum(p[column] for p in payslips) for column in models.MONTH_TO_DATE_COLUMNS}
+    gross = totals['gross_pay_centavos']
+    assert totals['sss_centavos'] == utils.calculate_sss(gross)
+    assert totals['philhealth_centavos'] == utils.calculate_philhealth(gross)
+    assert totals['pagibig_centavos'] == utils.PAGIBIG_CAP
+    assert totals['tax_centavos'] == utils.calculate_withholding_tax(
+        gross, totals['sss_centavos'], totals['philhealth_centavos'], totals['pagibig_centavos'])
+    assert totals['tax_centavos'] > 0
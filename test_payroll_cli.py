@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+import models
+import payroll
+
+
+def test_run_is_scripted_with_json_summary_and_exit_codes(tmp_path, add_employee):
+    emp_id = add_employee()
+    records = tmp_path / 'october.csv'
+    records.write_text('employee_id,date,hours_worked,overtime_hours\n'
+                       f'{emp_id},2026-10-05,8,1.5\n{emp_id},2026-10-06,8,0\n')
+    assert payroll.main(['-q', 'import', 'time-records', str(records)]) == 0
+
+    summary_path = tmp_path / 'run.json'
+    assert payroll.main(['-q', '--json', str(summary_path), 'run', '--period', '2026-10', '--workers', '2']) == 0
+    summary = json.loads(summary_path.read_text())
+    assert summary['ok'] and summary['steps'][0]['payslips'] == 1
+    payslip, = models.get_payslips_by_employee(emp_id)
+    assert (payslip['pay_period_start'], payslip['pay_period_end']) == ('2026-10-01', '2026-10-31')
+    assert payslip['gross_pay_centavos'] == 182500  # 16 h at 100 + 1.5 h overtime at 125
+
+    records.write_text('employee_id,date,hours_worked\n1,2026-10-07,8\n1,not-a-date,8\n')
+    assert payroll.main(['-q', '--json', str(summary_path), 'import', 'time-records', str(records)]) == 1
+    assert json.loads(summary_path.read_text())['error'].startswith('1 invalid rows')
+    assert models.count_rows(('time_records',)) == {'time_records': 2}
+
+
+def test_cli_does_not_load_the_web_app():
+    loaded = subprocess.run([sys.executable, '-c', 'import sys, payroll; print("flask" in sys.modules)'],
+                            capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == 'False'
@@ -0,0 +1,51 @@
+import os
+import threading
+
+import pytest
+
+from services import payslip_store
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(payslip_store, 'STORE_FOLDER', str(tmp_path / 'store'))
+
+
+def test_store_totals_match_payslips_and_follow_corrections(store, add_employee, pay_run):
+    ana = add_employee('Ana Cruz')
+    ben = add_employee('Ben Reyes')
+    first = pay_run('2025-01-01', '2025-01-31', [ana, ben], 16000)
+    second = pay_run('2026-01-01', '2026-01-31', [ana, ben], 17600)
+    assert payslip_store.sync() == {'written': 2, 'rows': 4, 'removed': 0}
+    assert payslip_store.sync() == {'written': 0, 'rows': 0, 'removed': 0}
+
+    years = payslip_store.totals_by_year(('gross_pay_centavos',))
+    assert [(y['year'], y['payslips'], y['gross_pay_centavos']) for y in years] == [
+        ('2025', 2, 2 * first.gross_pay_centavos), ('2026', 2, 2 * second.gross_pay_centavos)]
+    assert years[1]['gross_pay_centavos_change_pct'] == 10.0
+    assert payslip_store.totals_by_department(('net_pay_centavos',), start='2026-01-01') == [
+        {'department': 'IT', 'payslips': 2, 'net_pay_centavos': 2 * second.net_salary_centavos}]
+
+    # a new payslip in a stored period rewrites that partition only
+    cy = add_employee('Cy Lim')
+    pay_run('2026-01-01', '2026-01-31', [cy], 17600)
+    assert payslip_store.sync('2026-01-01', '2026-01-31') == {'written': 1, 'rows': 3, 'removed': 0}
+    columns = payslip_store.load(('employee_id',), start='2026-01-01')
+    assert sorted(columns['employee_id'].tolist()) == [ana, ben, cy]
+
+
+def test_concurrent_syncs_keep_every_partition(store, add_employee, pay_run):
+    emp_id = add_employee()
+    months = [f'2026-{month:02d}' for month in range(1, 9)]
+    for month in months:
+        pay_run(f'{month}-01', f'{month}-28', [emp_id])
+    threads = [threading.Thread(target=payslip_store.sync, args=(f'{month}-01', f'{month}-28')) for month in months]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(payslip_store.partitions()) == len(months)
+    assert not [name for name in os.listdir(payslip_store.STORE_FOLDER) if name.endswith(('.tmp', '.old'))]
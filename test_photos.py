@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+
+import models
+from services import photos
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _jpeg(size=(640, 480), color=(200, 120, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def static_folder(tmp_path, monkeypatch):
+    """Serves static files from, and saves uploads to, a scratch folder."""
+    from app import app
+    uploads = tmp_path / 'static' / 'uploads'
+    uploads.mkdir(parents=True)
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path / 'static'))
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(uploads))
+    return uploads
+
+
+def test_upload_stores_hashed_original_and_thumbnails(admin_client, static_folder, add_employee):
+    emp_id = add_employee()
+    employee = models.get_employee_by_id(emp_id)
+    form = {'name': employee.name, 'position': employee.position, 'department': employee.department,
+            'date_hired': employee.date_hired, 'salary': '30000', 'payroll_period': 'Monthly',
+            'photo': (io.BytesIO(_jpeg()), 'My Photo.JPG')}
+    admin_client.post(f'/edit/{emp_id}', data=form, content_type='multipart/form-data')
+
+    photo = models.get_employee_by_id(emp_id).photo
+    assert photos.HASHED_NAME.match(photo)
+    stem = photo.rsplit('.', 1)[0]
+    for px in photos.THUMBNAIL_SIZES.values():
+        with Image.open(static_folder / 'thumbs' / f'{stem}-{px}.webp') as thumbnail:
+            assert thumbnail.size == (px, px)
+
+    html = admin_client.get('/employees').data.decode()
+    thumbnail_url = f'/static/uploads/thumbs/{stem}-{photos.THUMBNAIL_SIZES["sm"]}.webp'
+    assert thumbnail_url in html
+    response = admin_client.get(thumbnail_url)
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    response.close()
+
+
+def test_backfill_renames_legacy_uploads(tmp_path, add_employee):
+    emp_id = add_employee()
+    (tmp_path / 'juan.jpg').write_bytes(_jpeg())
+    conn = models.get_db_connection()
+    conn.execute("UPDATE employees SET photo = 'juan.jpg' WHERE id = ?", (emp_id,))
+    conn.commit()
+    conn.close()
+
+    assert photos.backfill(str(tmp_path)) == (1, 0)
+    photo = models.get_employee_by_id(emp_id).photo
+    assert photos.HASHED_NAME.match(photo)
+    assert os.path.exists(tmp_path / photo) and os.path.exists(tmp_path / 'juan.jpg')
+    assert photos.backfill(str(tmp_path)) == (0, 0)
+    assert photos.photo_path(None, 'sm') == 'uploads/default.png'
@@ -0,0 +1,73 @@
+import csv
+import io
+import os
+import zipfile
+
+import pytest
+
+from services import remittances
+
+MONTH = '2026-09'
+
+
+@pytest.fixture
+def cache_folder(tmp_path, monkeypatch):
+    folder = str(tmp_path / 'remittances')
+    monkeypatch.setattr(remittances, 'CACHE_FOLDER', folder)
+    return folder
+
+
+def test_closed_month_report_is_cached_until_payslips_change(cache_folder, add_employee, pay_run, today):
+    payroll = pay_run(*remittances.month_bounds(MONTH), [add_employee('Ana Cruz'), add_employee('Ben Reyes')])
+
+    rows = list(csv.reader(io.StringIO(b''.join(remittances.report('sss', MONTH, today=today)).decode())))
+    assert rows[0][0] == 'SSS No.'
+    assert [row[2] for row in rows[1:3]] == ['Ana Cruz', 'Ben Reyes']
+    assert rows[1][5] == remittances._pesos(payroll.sss_centavos)
+    assert rows[3][:4] == ['TOTAL', '', '2 employees', '2']
+    cached = os.listdir(os.path.join(cache_folder, MONTH))
+    assert len(cached) == 1
+
+    # Served from the file until a payslip is added to the month
+    assert b''.join(remittances.report('sss', MONTH, today=today)).decode().count('\n') == 4
+    pay_run(*remittances.month_bounds(MONTH), [add_employee('Carla Diaz')])
+    assert b''.join(remittances.report('sss', MONTH, today=today)).decode().count('\n') == 5
+    assert os.listdir(os.path.join(cache_folder, MONTH)) != cached
+    assert len(os.listdir(os.path.join(cache_folder, MONTH))) == 1
+
+    # Two requests building the same report at once each write their own temporary file
+    pay_run(*remittances.month_bounds(MONTH), [add_employee('Dan Uy')])
+    first, second = remittances.report('sss', MONTH, today=today), remittances.report('sss', MONTH, today=today)
+    chunks = [next(first), next(second)]
+    expected = chunks[0] + b''.join(first)
+    assert chunks[1] + b''.join(second) == expected
+    cached, = os.listdir(os.path.join(cache_folder, MONTH))
+    with open(os.path.join(cache_folder, MONTH, cached), 'rb') as f:
+        assert f.read() == expected
+
+
+def test_a_period_is_remitted_in_the_month_it_ends(cache_folder, add_employee, pay_run, today):
+    ana = add_employee('Ana Cruz')
+    pay_run(*remittances.month_bounds(MONTH), [ana])
+    weekly = pay_run('2026-09-28', '2026-10-04', [ana], regular_hours=4000)
+
+    def report(month):
+        return list(csv.reader(io.StringIO(b''.join(remittances.report('sss', month, today=today)).decode())))
+
+    # The week is charged with October's contributions, so it is remitted in October
+    assert report(MONTH)[1][3] == '1'
+    october = report('2026-10')
+    assert october[1][2:6] == ['Ana Cruz', '1', remittances._pesos(weekly.gross_pay_centavos),
+                               remittances._pesos(weekly.sss_centavos)]
+
+
+def test_remittance_route_streams_xlsx(admin_client, cache_folder, add_employee, pay_run):
+    pay_run(*remittances.month_bounds(MONTH), [add_employee('Ana Cruz')])
+
+    response = admin_client.get(f'/reports/remittances/bir/{MONTH}.xlsx')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].endswith(f'bir_remittance_{MONTH}.xlsx')
+    with zipfile.ZipFile(io.BytesIO(response.get_data())) as workbook:
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+    assert '<t>TIN</t>' in sheet and '<t>Ana Cruz</t>' in sheet and '<t>TOTAL</t>' in sheet
+    assert admin_client.get('/reports/remittances/nhs/2026-09.csv').status_code == 302
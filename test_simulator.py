@@ -0,0 +1,55 @@
+import pytest
+
+import models
+import utils
+from benchmarks import datagen
+from services import simulator
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def roster_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'sim.db')
+    datagen.generate(path, employees=200, days=30, start_date='2026-10-01', users=0)
+    monkeypatch.setattr(models, 'DATABASE', path)
+    return path
+
+
+def test_baseline_matches_calculate_payroll(roster_db):
+    roster = simulator.load_roster('2026-10-01', '2026-10-31')
+    result = simulator.simulate(roster)
+
+    for i, emp in enumerate(models.get_employees()):
+        expected = utils.calculate_payroll(emp, '2026-10-01', '2026-10-31')
+        assert roster.ids[i] == emp.id
+        assert result['gross_pay'][i] == expected.gross_pay_centavos
+        assert result['sss'][i] == expected.sss_centavos
+        assert result['philhealth'][i] == expected.philhealth_centavos
+        assert result['tax'][i] == expected.tax_centavos
+        assert result['net_pay'][i] == expected.net_salary_centavos
+
+
+def test_raise_scenario_by_department(roster_db):
+    roster = simulator.load_roster('2026-10-01', '2026-10-31')
+    comparison = simulator.compare(roster, {'hourly_rate_pct': 6})
+
+    total = comparison['total']
+    assert total['scenario']['gross_pay'] == pytest.approx(total['baseline']['gross_pay'] * 1.06, rel=1e-4)
+    assert sum(d['headcount'] for d in comparison['departments']) == total['headcount']
+    assert sum(d['delta']['net_pay'] for d in comparison['departments']) == total['delta']['net_pay']
+
+    with pytest.raises(ValueError):
+        simulator.simulate(roster, {'bogus': 1})
+
+
+def test_simulator_route_does_not_write(admin_client):
+    models.add_employee('Ana Cruz', 'Cashier', 'Finance', 17600.0, 'Monthly', '2024-01-15', None, 100.0,
+                        None, None, None, None, None, None, None)
+    response = admin_client.post('/simulator/run', json={'hourly_rate_pct': 6})
+    assert response.status_code == 200
+    assert response.get_json()['total']['headcount'] == 1
+    assert models.get_employees()[0].hourly_rate == 100.0
+
+    assert admin_client.post('/simulator', data={'salary_pct': '6'}).status_code == 200
+    assert admin_client.post('/simulator/run', json={'nope': 1}).status_code == 400
@@ -0,0 +1,18 @@
+from benchmarks.bench_startup import HEAVY_MODULES, IMPORT_BUDGET_MS, cumulative_ms, heavy_imports, measure_import
+
+
+def test_app_import_stays_light_and_within_budget():
+    # Best of three cold imports, so a busy machine doesn't fail the budget on one slow run
+    timings = []
+    for _ in range(3):
+        rows, _, _ = measure_import('app')
+        assert heavy_imports(rows) == [], f'{HEAVY_MODULES} must be imported on first use, not at startup'
+        timings.append(cumulative_ms(rows, 'app'))
+    assert min(timings) < IMPORT_BUDGET_MS
+
+
+def test_pdf_view_loads_reportlab_on_first_use(admin_client, add_employee):
+    emp_id = add_employee()
+    response = admin_client.get(f'/download/pdf/{emp_id}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
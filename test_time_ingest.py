@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+import models
+from services import time_ingest
+
+
+def test_writer_batches_concurrent_posts(add_employee):
+    emp_id = add_employee()
+    writer = time_ingest.TimeRecordWriter(flush_interval=0.05, max_batch=100)
+    futures = []
+    threads = [threading.Thread(target=lambda: futures.append(writer.submit(emp_id, '2026-10-01', 8.0, 0.0)))
+               for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [future.result(timeout=5) for future in futures]
+    writer.close()
+
+    assert len(set(ids)) == 40
+    assert writer.rows == 40 and writer.batches < 40
+    assert len(models.get_time_records(emp_id, '2026-10-01', '2026-10-01')) == 40
+
+
+def test_writer_reports_failed_commits(db):
+    writer = time_ingest.TimeRecordWriter(flush_interval=0)
+    future = writer.submit(None, '2026-10-01', 8.0, 0.0)  # employee_id is NOT NULL
+    try:
+        with pytest.raises(models.sqlite3.IntegrityError, match='NOT NULL'):
+            future.result(timeout=5)
+    finally:
+        writer.close()
+
+
+def test_failed_batch_is_retried_row_by_row(add_employee, monkeypatch):
+    emp_id = add_employee()
+    writer = time_ingest.TimeRecordWriter(flush_interval=0.05, max_batch=3)
+    futures = [writer.submit(emp_id, '2026-10-01', 8.0, 0.0), writer.submit(None, '2026-10-02', 8.0, 0.0),
+               writer.submit(emp_id, '2026-10-03', 8.0, 0.0)]
+    assert futures[0].result(timeout=5) and futures[2].result(timeout=5)
+    assert isinstance(futures[1].exception(timeout=5), models.sqlite3.IntegrityError)
+
+    # A connection that cannot be opened fails its rows, not the writer thread
+    connect = models.get_db_connection
+    monkeypatch.setattr(models, 'get_db_connection', lambda: (_ for _ in ()).throw(models.sqlite3.OperationalError))
+    assert isinstance(writer.submit(emp_id, '2026-10-04', 8.0, 0.0).exception(timeout=5),
+                      models.sqlite3.OperationalError)
+    monkeypatch.setattr(models, 'get_db_connection', connect)
+    assert writer.add(emp_id, '2026-10-05', 8.0, 0.0, timeout=5)
+    writer.close()
+    assert [r['date'] for r in models.get_time_records(emp_id, '2026-10-01', '2026-10-31')] == [
+        '2026-10-01', '2026-10-03', '2026-10-05']
+
+
+def test_ingest_endpoint(admin_client, add_employee, monkeypatch):
+    emp_id = add_employee()
+    response = admin_client.post('/attendance/ingest', json={
+        'employee_id': emp_id, 'date': '2026-10-01', 'hours_worked': 8, 'overtime_hours': 1.5})
+    assert response.status_code == 201
+    record = models.get_time_records(emp_id, '2026-10-01', '2026-10-01')[0]
+    assert response.get_json()['id'] == record['id']
+    assert record['overtime_hours'] == 1.5
+
+    response = admin_client.post('/attendance/ingest', json={'employee_id': emp_id, 'date': '10/01/2026'})
+    assert response.status_code == 400
+
+    # Still queued when the wait ends: accepted, not failed
+    class SlowWriter:
+        def add(self, *record):
+            raise TimeoutError
+    monkeypatch.setattr(time_ingest, 'get_writer', SlowWriter)
+    response = admin_client.post('/attendance/ingest', json={
+        'employee_id': emp_id, 'date': '2026-10-02', 'hours_worked': 8})
+    assert response.status_code == 202 and response.get_json()['status'] == 'queued'
@@ -0,0 +1,131 @@
+from fractions import Fraction
+
+import models
+import utils
+from benchmarks import datagen
+from services import leave_accrual, pay_periods
+from money import to_centavos, to_hundredths, apply_rate, div_round, format_centavos
+
+
+def test_rounding_rules():
+    assert to_centavos(1.005) == 101
+    assert to_centavos('0.1') == 10
+    assert to_centavos(0.1 + 0.2) == 30
+    assert to_centavos(None) == 0
+    assert to_centavos(-2.345) == -235
+    assert to_hundredths(7.5) == 750
+    assert div_round(5, 2) == 3
+    assert div_round(-5, 2) == -3
+    assert apply_rate(123457, Fraction('0.045')) == 5556
+    assert format_centavos(123456789) == '1,234,567.89'
+    assert format_centavos(-5) == '-0.05'
+
+
+def test_sql_rounds_hours_and_loans_like_money(add_employee):
+    # 0.285 * 100 is 28.4999... in binary: ROUND() alone would give 28
+    emp_id = add_employee()
+    models.add_time_record(emp_id, '2026-10-01', 0.285, 1.005)
+    models.add_loan(emp_id, 'Cash Advance', 100.0, 2.675)
+    hours, = models.get_period_hours('2026-10-01', '2026-10-31')
+    assert (hours['regular_hundredths'], hours['overtime_hundredths']) == (to_hundredths(0.285), to_hundredths(1.005))
+    assert (hours['regular_hundredths'], hours['overtime_hundredths']) == (29, 101)
+    loan, = models.get_loan_deduction_totals()
+    assert loan['loan_deductions_centavos'] == to_centavos(2.675) == 268
+    payroll = utils.calculate_payroll(models.get_employee_by_id(emp_id), '2026-10-01', '2026-10-31')
+    assert payroll == utils.calculate_payroll_batch([models.get_employee_by_id(emp_id)], '2026-10-01', '2026-10-31')[0]
+
+
+def test_contributions_in_centavos():
+    assert utils.calculate_sss(to_centavos(50000)) == utils.SSS_MAX_SHARE
+    assert utils.calculate_sss(to_centavos(20000)) == to_centavos(900)
+    assert utils.calculate_philhealth(to_centavos(5000)) == to_centavos(250)
+    assert utils.calculate_pagibig(to_centavos(1000)) == to_centavos(20)
+    # 40,000 taxable falls in the 20% bracket: 1,875 + (40,000 - 33,333) * 0.20
+    assert utils.calculate_withholding_tax(to_centavos(40000), 0, 0, 0) == to_centavos(3208.40)
+
+
+def test_batch_matches_single_and_totals_are_exact(tmp_path, monkeypatch):
+    path = str(tmp_path / 'batch.db')
+    datagen.generate(path, employees=300, days=30, start_date='2026-10-01', users=0)
+    monkeypatch.setattr(models, 'DATABASE', path)
+    employees = models.get_employees()
+
+    batch = utils.calculate_payroll_batch(employees, '2026-10-01', '2026-10-31')
+    for emp, payroll in zip(employees, batch):
+        assert payroll == utils.calculate_payroll(emp, '2026-10-01', '2026-10-31')
+
+    # Roster records are slotted: no per-instance __dict__
+    assert not hasattr(employees[0], '__dict__') and not hasattr(batch[0], '__dict__')
+    assert batch[0].net_salary == batch[0].net_salary_centavos / 100
+
+    totals = utils.get_payroll_totals(employees, '2026-10-01', '2026-10-31', payrolls=batch)
+    assert totals['net_total_centavos'] == sum(p.net_salary_centavos for p in batch)
+    assert totals['net_total'] == format_centavos(totals['net_total_centavos'])
+
+
+def test_payslip_centavo_columns(db):
+    models.add_employee('Ana Cruz', 'Cashier', 'Finance', 17600.0, 'Monthly', '2024-01-15', None, 100.0,
+                        None, None, None, None, None, None, None)
+    emp = models.get_employees()[0]
+    models.add_time_record(emp.id, '2026-10-01', 8.0, 1.5)
+    payroll = utils.calculate_payroll(emp, '2026-10-01', '2026-10-31')
+    models.create_payslip(emp.id, '2026-10-01', '2026-10-31', payroll)
+
+    slip = models.get_payslips_by_employee(emp.id)[0]
+    assert slip['gross_pay_centavos'] == 80000 + 22500
+    assert slip['net_pay_centavos'] == payroll.net_salary_centavos
+    assert slip['net_pay'] == payroll.net_salary
+
+
+def test_approved_leave_is_clipped_to_the_period_and_capped_at_the_balance(add_employee):
+    emp_id = add_employee(hourly_rate=100.0)
+    # Three months of accruals: 3.75 Vacation days, so three whole days are paid
+    for start, end in (('2026-06-01', '2026-06-30'), ('2026-07-01', '2026-07-31'), ('2026-08-01', '2026-08-31')):
+        models.record_payroll_run(start, end, [(emp_id, utils.compute_payroll(0, 0, 0, 0))],
+                                  leave_accrual.MONTHLY_ENTITLEMENTS)
+    # Sep 29 - Oct 2 (Tue - Fri) overlaps October on Thu and Fri only
+    models.add_leave_request(emp_id, 'Vacation', '2026-09-29', '2026-10-02', None)
+    models.add_leave_request(emp_id, 'Personal', '2026-10-05', '2026-10-06', None)
+    models.add_leave_request(emp_id, 'Sick', '2026-10-07', '2026-10-07', None)  # still pending
+    for request in models.get_leave_requests(emp_id)[1:]:
+        models.update_leave_status(request['id'], 'Approved')
+
+    # Sep 29, 30 and Oct 1 are paid; Oct 2 is beyond the balance
+    assert utils.get_leave_days('2026-10-01', '2026-10-31') == {emp_id: (1, 3)}
+    payroll = utils.calculate_payroll(models.get_employee_by_id(emp_id), '2026-10-01', '2026-10-31')
+    assert payroll.leave_pay_centavos == to_centavos(8 * 100)
+    assert payroll.gross_pay_centavos == payroll.leave_pay_centavos
+    assert payroll.unpaid_leave_days == 3
+
+    # Working Oct 1 anyway: it is paid as hours, and the balance pays Oct 2 instead
+    models.add_time_record(emp_id, '2026-10-01', 8.0, 0.0)
+    assert utils.get_leave_days('2026-10-01', '2026-10-31') == {emp_id: (1, 2)}
+    payroll = utils.calculate_payroll(models.get_employee_by_id(emp_id), '2026-10-01', '2026-10-31')
+    assert payroll.gross_pay_centavos == 2 * to_centavos(8 * 100)
+
+
+def test_annualized_tax_trues_up_in_the_last_period():
+    # Steady pay: withholding matches the monthly table, and the year adds up to the annual tax
+    taxable = 4_000_000
+    withheld = 0
+    for month in range(1, 13):
+        tax = utils.calculate_annualized_tax(taxable, Fraction(month, 12), (month - 1) * taxable, withheld)
+        withheld += tax
+    assert withheld == utils._bracket_tax(12 * taxable, utils.ANNUAL_TAX_BRACKETS)
+    assert abs(tax - utils._bracket_tax(taxable, utils.TAX_BRACKETS)) <= 100
+
+    # Over-withheld: refunded in December, never negative before then
+    assert utils.calculate_annualized_tax(0, Fraction(1), 11 * taxable, 11 * 1_000_000) < 0
+    assert utils.calculate_annualized_tax(0, Fraction(6, 12), 5 * taxable, 5 * 1_000_000) == 0
+
+    # Weekly pay projects over the year's weeks, and only the last week of December settles the year
+    assert pay_periods.year_elapsed('2026-09-01', '2026-09-30') == Fraction(9, 12)
+    first_week = pay_periods.year_elapsed('2025-12-29', '2026-01-04')
+    assert first_week == Fraction(1, 52)
+    weekly = taxable // 4
+    assert utils.calculate_annualized_tax(weekly, first_week, 0, 0) == apply_rate(
+        utils._bracket_tax(52 * weekly, utils.ANNUAL_TAX_BRACKETS), Fraction(1, 52))
+    mid_december = pay_periods.year_elapsed('2026-12-14', '2026-12-20')
+    assert mid_december == Fraction(51, 52)
+    assert utils.calculate_annualized_tax(0, mid_december, 50 * weekly, 50 * 1_000_000) == 0
+    assert pay_periods.year_elapsed('2026-12-21', '2026-12-27') == 1
@@ -1,23 +1,84 @@
 """
 Utility functions for payroll calculations.
+
+All money is computed in integer centavos and all hours in integer
+hundredths of an hour (see money.py for the rounding rules), so totals are
+exact no matter how many employees are summed.
 """
+from fractions import Fraction
+
 import models
+from records import PayrollResult
+from services.leave_accrual import PAID_LEAVE_TYPES
+from money import to_centavos, to_hundredths, apply_rate, format_centavos, HOUR_SCALE
 from datetime import date
 
+# --- Contribution and Tax Tables ---
+# Shared by the per-employee functions below and the vectorized what-if
+# simulator (services/simulator.py), so both always agree.
+# Amounts are in centavos; rates are exact fractions.
+
+OVERTIME_MULTIPLIER = Fraction('1.5')  # Common overtime rate
+HOURS_PER_LEAVE_DAY = 8                # Paid leave is credited as a regular working day
+
+SSS_RATE = Fraction('0.045')
+SSS_MIN_SALARY = 425_000       # PHP 4,250.00
+SSS_MAX_SALARY = 3_000_000     # PHP 30,000.00
+SSS_MIN_SHARE = 18_000         # PHP 180.00
+SSS_MAX_SHARE = 135_000        # PHP 1,350.00
+
+PHILHEALTH_RATE = Fraction('0.05')  # Total premium; the employee pays half
+PHILHEALTH_FLOOR = 1_000_000        # PHP 10,000.00
+PHILHEALTH_CEILING = 10_000_000     # PHP 100,000.00
+
+PAGIBIG_RATE = Fraction('0.02')
+PAGIBIG_CAP = 10_000                # PHP 100.00
+
+# Monthly withholding tax brackets: (upper bound of taxable income, base tax,
+# amount the rate applies above, rate). The last bracket has no upper bound.
+TAX_BRACKETS = [
+    (2_083_300, 0, 0, Fraction(0)),
+    (3_333_200, 0, 2_083_300, Fraction('0.15')),
+    (6_666_600, 187_500, 3_333_300, Fraction('0.20')),
+    (16_666_600, 854_167, 6_666_700, Fraction('0.25')),
+    (66_666_600, 3_354_167, 16_666_700, Fraction('0.30')),
+    (None, 18_354_167, 66_666_700, Fraction('0.35')),
+]
+
+# Annual tax table, same layout, for the annualized withholding mode
+ANNUAL_TAX_BRACKETS = [
+    (25_000_000, 0, 0, Fraction(0)),
+    (40_000_000, 0, 25_000_000, Fraction('0.15')),
+    (80_000_000, 2_250_000, 40_000_000, Fraction('0.20')),
+    (200_000_000, 10_250_000, 80_000_000, Fraction('0.25')),
+    (800_000_000, 40_250_000, 200_000_000, Fraction('0.30')),
+    (None, 220_250_000, 800_000_000, Fraction('0.35')),
+]
+
+# 'period' taxes each pay period on its own (TAX_BRACKETS); 'annualized'
+# withholds against the year-to-date totals in payroll_ytd (ANNUAL_TAX_BRACKETS)
+TAX_MODES = ('period', 'annualized')
+
+# Money attributes of calculate_payroll's PayrollResult. Each is available both
+# as '<name>_centavos' (int, authoritative) and '<name>' (float pesos, for display).
+MONEY_FIELDS = ['gross_pay', 'regular_pay', 'overtime_pay', 'leave_pay', 'sss', 'philhealth', 'pagibig',
+                'tax', 'loan_deductions', 'total_deductions', 'net_salary']
+
 # --- Deduction Functions (Updated) ---
+# Each takes and returns centavos.
 
 def calculate_sss(salary):
     """
     Simplified SSS contribution calculation based on 2024 tables.
     Capped at 30,000 salary credit.
     """
-    if salary >= 30000:
-        employee_share = 1350.00
-    elif salary < 4250:
-        employee_share = 180.00
+    if salary >= SSS_MAX_SALARY:
+        employee_share = SSS_MAX_SHARE
+    elif salary < SSS_MIN_SALARY:
+        employee_share = SSS_MIN_SHARE
     else:
         # Simplified: 4.5% of salary
-        employee_share = salary * 0.045
+        employee_share = apply_rate(salary, SSS_RATE)
     return employee_share
 
 def calculate_philhealth(salary):
@@ -25,136 +86,260 @@ def calculate_philhealth(salary):
     Simplified PhilHealth contribution calculation (5% in 2024).
     Floor 10,000, Ceiling 100,000.
     """
-    if salary > 100000:
-        salary_credit = 100000
-    elif salary < 10000:
-        salary_credit = 10000
+    if salary > PHILHEALTH_CEILING:
+        salary_credit = PHILHEALTH_CEILING
+    elif salary < PHILHEALTH_FLOOR:
+        salary_credit = PHILHEALTH_FLOOR
     else:
         salary_credit = salary
     
-    total_premium = salary_credit * 0.05
-    employee_share = total_premium / 2
-    return employee_share
+    # Employee share is half the total premium, rounded once
+    return apply_rate(salary_credit, PHILHEALTH_RATE / 2)
 
 def calculate_pagibig(salary):
     """
     Simplified Pag-IBIG contribution calculation.
     """
     # 2% of salary, capped at 100
-    employee_share = salary * 0.02
-    if employee_share > 100:
-        return 100.00
+    employee_share = apply_rate(salary, PAGIBIG_RATE)
+    if employee_share > PAGIBIG_CAP:
+        return PAGIBIG_CAP
     return employee_share
 
+def _bracket_tax(taxable_income, brackets):
+    # Calculate Tax using the first bracket the income falls into
+    for upper_bound, base_tax, excess_over, rate in brackets:
+        if upper_bound is None or taxable_income <= upper_bound:
+            return base_tax + apply_rate(taxable_income - excess_over, rate)
+
 def calculate_withholding_tax(salary, sss, philhealth, pagibig):
     """
     Calculates monthly withholding tax based on 2023-2025 BIR tables.
     """
     # Taxable income = Gross Income - SSS - PhilHealth - Pag-IBIG
     taxable_income = salary - (sss + philhealth + pagibig)
+    return _bracket_tax(taxable_income, TAX_BRACKETS)
 
-    # Calculate Tax
-    tax = 0.0
-    if taxable_income <= 20833:
-        tax = 0.0
-    elif taxable_income <= 33332:
-        tax = (taxable_income - 20833) * 0.15
-    elif taxable_income <= 66666:
-        tax = 1875 + (taxable_income - 33333) * 0.20
-    elif taxable_income <= 166666:
-        tax = 8541.67 + (taxable_income - 66667) * 0.25
-    elif taxable_income <= 666666:
-        tax = 33541.67 + (taxable_income - 166667) * 0.30
-    else:
-        tax = 183541.67 + (taxable_income - 666667) * 0.35
-    
-    return tax
+def calculate_annualized_tax(taxable_income, elapsed, ytd_taxable, ytd_tax):
+    """
+    Cumulative (annualized) withholding for a period that brings the year to
+    `elapsed` (a Fraction in (0, 1]: see pay_periods.year_elapsed).
+    Projects the year's taxable income from everything earned so far, takes
+    the annual tax on it, and withholds the part due by this period less the
+    tax already withheld this year. In the year's last period the projection
+    is the actual year, so the year's withholding comes to exactly the
+    annual tax, and a negative result refunds what was over-withheld.
+    """
+    taxable_to_date = ytd_taxable + taxable_income
+    annual_tax = _bracket_tax(apply_rate(taxable_to_date, 1 / elapsed), ANNUAL_TAX_BRACKETS)
+    tax = apply_rate(annual_tax, elapsed) - ytd_tax
+    return tax if elapsed == 1 else max(tax, 0)
 
 # --- Main Payroll Calculation (HEAVILY UPDATED) ---
 
-def calculate_payroll(employee_data, start_date, end_date):
+def compute_payroll(hourly_rate, regular_hours, overtime_hours, loan_deductions,
+                    paid_leave_days=0, unpaid_leave_days=0, ytd=None, month_to_date=None):
     """
-    Calculates all deductions for a single employee based on time records.
-    Accepts an employee's data (as a dict or sqlite3.Row) and a date range.
+    Pure payroll arithmetic for one employee, returned as a records.PayrollResult.
+    hourly_rate and loan_deductions are centavos; hours are hundredths of an hour.
+    Paid leave days are paid as HOURS_PER_LEAVE_DAY regular hours each; unpaid
+    leave days earn nothing and are only reported.
+    Pass `ytd` = (fraction of the year elapsed, taxable so far, tax withheld
+    so far) to withhold tax with calculate_annualized_tax instead of on the
+    period alone.
+    The contribution and tax tables are monthly. For weekly and semi-monthly
+    pay, pass `month_to_date` = the gross, SSS, PhilHealth, Pag-IBIG and tax
+    of the month's earlier payslips (models.MONTH_TO_DATE_COLUMNS): the tables
+    then apply to the month's gross so far, and the period withholds what is
+    due less what those payslips already did, so the month adds up to the
+    monthly amounts.
     """
-    # Get base data
-    hourly_rate = float(employee_data.get('hourly_rate') or 0.0)
-    overtime_rate = hourly_rate * 1.5  # Common overtime rate
-    
-    # --- 1. Calculate Gross Pay from Time Records ---
-    time_records = models.get_time_records(employee_data['id'], start_date, end_date)
-    
-    total_regular_hours = sum(r['hours_worked'] for r in time_records)
-    total_overtime_hours = sum(r['overtime_hours'] for r in time_records)
-    
-    regular_pay = total_regular_hours * hourly_rate
-    overtime_pay = total_overtime_hours * overtime_rate
-    gross_pay = regular_pay + overtime_pay
-    
-    # --- 2. Calculate Deductions based on Gross Pay ---
-    sss = calculate_sss(gross_pay)
-    philhealth = calculate_philhealth(gross_pay)
-    pagibig = calculate_pagibig(gross_pay)
-    
-    # Calculate withholding tax
-    tax = calculate_withholding_tax(gross_pay, sss, philhealth, pagibig)
-    
-    # --- 3. Get Loan Deductions ---
-    active_loans = models.get_active_loans(employee_data['id'])
-    loan_deductions = 0.0
-    # Note: This logic assumes loans are deducted monthly.
-    # A real system would check if a deduction is due this pay period.
-    for loan in active_loans:
-        loan_deductions += loan['monthly_deduction']
-
-    # --- 4. Final Calculation ---
+    # --- 1. Gross Pay (each product is rounded once) ---
+    regular_pay = apply_rate(regular_hours * hourly_rate, Fraction(1, HOUR_SCALE))
+    overtime_pay = apply_rate(overtime_hours * hourly_rate, OVERTIME_MULTIPLIER / HOUR_SCALE)
+    leave_pay = paid_leave_days * HOURS_PER_LEAVE_DAY * hourly_rate
+    gross_pay = regular_pay + overtime_pay + leave_pay
+
+    # --- 2. Deductions based on the month's Gross Pay ---
+    mtd_gross, mtd_sss, mtd_philhealth, mtd_pagibig, mtd_tax = month_to_date or (0, 0, 0, 0, 0)
+    month_gross = mtd_gross + gross_pay
+    sss = max(calculate_sss(month_gross) - mtd_sss, 0)
+    philhealth = max(calculate_philhealth(month_gross) - mtd_philhealth, 0)
+    pagibig = max(calculate_pagibig(month_gross) - mtd_pagibig, 0)
+    if ytd is None:
+        tax = max(calculate_withholding_tax(month_gross, mtd_sss + sss, mtd_philhealth + philhealth,
+                                            mtd_pagibig + pagibig) - mtd_tax, 0)
+    else:
+        tax = calculate_annualized_tax(gross_pay - (sss + philhealth + pagibig), *ytd)
+
+    # --- 3. Final Calculation ---
     total_deductions = sss + philhealth + pagibig + tax + loan_deductions
     net_pay = gross_pay - total_deductions
 
-    return {
-        'salary': gross_pay,  # Rename 'salary' to 'gross_pay' for clarity
-        'gross_pay': gross_pay,
-        'regular_pay': regular_pay,
-        'overtime_pay': overtime_pay,
-        'total_regular_hours': total_regular_hours,
-        'total_overtime_hours': total_overtime_hours,
-        'sss': sss,
-        'philhealth': philhealth,
-        'pagibig': pagibig,
-        'tax': tax,
-        'loan_deductions': loan_deductions,
-        'total_deductions': total_deductions,
-        'net_salary': net_pay
-    }
+    return PayrollResult(
+        gross_pay_centavos=gross_pay,
+        regular_pay_centavos=regular_pay,
+        overtime_pay_centavos=overtime_pay,
+        leave_pay_centavos=leave_pay,
+        sss_centavos=sss,
+        philhealth_centavos=philhealth,
+        pagibig_centavos=pagibig,
+        tax_centavos=tax,
+        loan_deductions_centavos=loan_deductions,
+        total_deductions_centavos=total_deductions,
+        net_salary_centavos=net_pay,
+        regular_hundredths=regular_hours,
+        overtime_hundredths=overtime_hours,
+        paid_leave_days=paid_leave_days,
+        unpaid_leave_days=unpaid_leave_days,
+    )
 
-def get_payroll_totals(employees, start_date, end_date):
+def get_leave_days(start_date, end_date, employee_id=None):
+    """
+    Approved leave working days inside [start_date, end_date], per employee:
+    {employee_id: (paid_days, unpaid_days)}. Days with hours, daily or
+    compacted, are left out (they are paid as work). Of a request of a PAID_LEAVE_TYPE,
+    only as many whole days as the balance covered when it was approved are
+    paid, its earliest days first; the rest, and every day of other leave
+    types, are unpaid. Two indexed queries for the whole roster (or one
+    employee).
+    """
+    worked = models.get_worked_leave_dates(start_date, end_date, employee_id)
+    days = {}
+    for row in models.get_approved_leave(start_date, end_date, employee_id):
+        emp_id = row['employee_id']
+        paid, unpaid = days.get(emp_id, (0, 0))
+        covered = max(row['available_hundredths'], 0) // 100 if row['leave_type'] in PAID_LEAVE_TYPES else 0
+        dates = [day for day in models.leave_dates(row['request_start'], row['request_end'])
+                 if (emp_id, day) not in worked]
+        for index, day in enumerate(dates):
+            if row['start_date'] <= day <= row['end_date']:
+                if index < covered:
+                    paid += 1
+                else:
+                    unpaid += 1
+        days[emp_id] = (paid, unpaid)
+    return days
+
+def _month_to_date_lookup(start_date, end_date, employee_id=None):
+    """
+    Returns a function employee_id -> compute_payroll's `month_to_date`
+    argument for the period, read once (models.get_month_to_date_before).
+    """
+    totals = {row['employee_id']: tuple(row[column] for column in models.MONTH_TO_DATE_COLUMNS)
+              for row in models.get_month_to_date_before(start_date, end_date, employee_id)}
+    return totals.get
+
+def _ytd_lookup(start_date, end_date, tax_mode, employee_id=None):
+    """
+    Returns a function employee_id -> compute_payroll's `ytd` argument for the
+    period: always None in 'period' mode; in 'annualized' mode the totals
+    of the tax year (the year of end_date) before the period, read once from
+    payroll_ytd (models.get_ytd_before).
+    """
+    if tax_mode not in TAX_MODES:
+        raise ValueError(f'Unknown tax mode {tax_mode!r}; expected one of {TAX_MODES}')
+    if tax_mode == 'period':
+        return lambda emp_id: None
+    from services.pay_periods import year_elapsed  # pay_periods imports this module
+    elapsed = year_elapsed(start_date, end_date)
+    totals = {row['employee_id']: (elapsed, row['taxable_centavos'], row['tax_centavos'])
+              for row in models.get_ytd_before(start_date, employee_id, year=end_date[:4])}
+    return lambda emp_id: totals.get(emp_id, (elapsed, 0, 0))
+
+def calculate_payroll(employee_data, start_date, end_date, tax_mode='period'):
+    """
+    Calculates all deductions for a single employee based on time records.
+    Accepts a records.Employee and a date range; returns a records.PayrollResult.
+    `tax_mode` is one of TAX_MODES.
+    """
+    # --- 1. Hours from Time Records ---
+    time_records = models.get_time_records(employee_data.id, start_date, end_date)
+    regular_hours = sum(to_hundredths(r['hours_worked']) for r in time_records)
+    overtime_hours = sum(to_hundredths(r['overtime_hours']) for r in time_records)
+
+    # --- 2. Get Loan Deductions ---
+    # Loans deduct monthly: only in the first period ending in a month, and never
+    # more than the remaining balance (see models.LOAN_DUE_CENTAVOS).
+    loan_deductions = sum(row['loan_deductions_centavos'] for row in models.get_loan_deduction_totals(
+        start_date, end_date, employee_data.id))
+
+    # --- 3. Approved Leave in the Period ---
+    paid_leave, unpaid_leave = get_leave_days(start_date, end_date, employee_data.id).get(
+        employee_data.id, (0, 0))
+
+    ytd = _ytd_lookup(start_date, end_date, tax_mode, employee_data.id)(employee_data.id)
+    month_to_date = _month_to_date_lookup(start_date, end_date, employee_data.id)(employee_data.id)
+    return compute_payroll(to_centavos(employee_data.hourly_rate),
+                           regular_hours, overtime_hours, loan_deductions, paid_leave, unpaid_leave, ytd,
+                           month_to_date)
+
+def _period_calculator(start_date, end_date, tax_mode='period'):
+    """
+    Fetches hours, loans, approved leave and the month's earlier payslips
+    (and, when annualizing, the year-to-date totals) for the whole roster
+    with one query each and returns
+    a function (employee_id, hourly_rate) -> PayrollResult.
+    """
+    hours = {row['employee_id']: row for row in models.get_period_hours(start_date, end_date)}
+    loans = {row['employee_id']: row['loan_deductions_centavos']
+             for row in models.get_loan_deduction_totals(start_date, end_date)}
+    leave = get_leave_days(start_date, end_date)
+    ytd_for = _ytd_lookup(start_date, end_date, tax_mode)
+    month_to_date_for = _month_to_date_lookup(start_date, end_date)
+
+    def payroll_for(emp_id, hourly_rate):
+        row = hours.get(emp_id)
+        return compute_payroll(
+            to_centavos(hourly_rate),
+            row['regular_hundredths'] if row else 0,
+            row['overtime_hundredths'] if row else 0,
+            loans.get(emp_id, 0),
+            *leave.get(emp_id, (0, 0)),
+            ytd=ytd_for(emp_id),
+            month_to_date=month_to_date_for(emp_id),
+        )
+    return payroll_for
+
+def calculate_payroll_batch(employees, start_date, end_date, tax_mode='period'):
+    """
+    Same result as calling calculate_payroll for each employee, but fetches
+    its inputs for the whole roster with one query each (_period_calculator).
+    Returns a list of PayrollResults aligned with `employees`.
+    """
+    payroll_for = _period_calculator(start_date, end_date, tax_mode)
+    return [payroll_for(emp.id, emp.hourly_rate) for emp in employees]
+
+def calculate_payroll_by_employee(start_date, end_date, tax_mode='period'):
+    """
+    PayrollResults for every active employee, keyed by employee id. Reads only
+    ids and hourly rates, so no Employee records are held while computing;
+    streamed pages look each row's result up as the row is rendered.
+    """
+    payroll_for = _period_calculator(start_date, end_date, tax_mode)
+    return {emp_id: payroll_for(emp_id, rate) for emp_id, rate in models.get_employee_rates()}
+
+def get_payroll_totals(employees, start_date, end_date, payrolls=None, tax_mode='period'):
     """
     Calculates the total payroll amounts for all employees for a given period.
-    Accepts a list of sqlite3.Row objects and a date range.
-    """
-    total_salary = 0.0
-    total_sss = 0.0
-    total_philhealth = 0.0
-    total_pagibig = 0.0
-    total_tax = 0.0
-    total_net = 0.0
-
-    for emp in employees:
-        # calculate_payroll now needs the full employee row and dates
-        payroll = calculate_payroll(emp, start_date, end_date)
-        
-        total_salary += payroll['gross_pay']
-        total_sss += payroll['sss']
-        total_philhealth += payroll['philhealth']
-        total_pagibig += payroll['pagibig']
-        total_tax += payroll['tax']
-        total_net += payroll['net_salary']
-
-    return {
-        'total_salary': f"{total_salary:,.2f}",
-        'total_sss': f"{total_sss:,.2f}",
-        'total_philhealth': f"{total_philhealth:,.2f}",
-        'total_pagibig': f"{total_pagibig:,.2f}",
-        'total_tax': f"{total_tax:,.2f}",
-        'net_total': f"{total_net:,.2f}"
-    }
\ No newline at end of file
+    Accepts a list of records.Employee and a date range. Pass `payrolls`
+    (any iterable of PayrollResults) to reuse results already computed.
+    Totals are exact integer sums, returned formatted and as '*_centavos'.
+    """
+    if payrolls is None:
+        payrolls = calculate_payroll_batch(employees, start_date, end_date, tax_mode)
+
+    sums = {
+        'total_salary': 'gross_pay_centavos',
+        'total_sss': 'sss_centavos',
+        'total_philhealth': 'philhealth_centavos',
+        'total_pagibig': 'pagibig_centavos',
+        'total_tax': 'tax_centavos',
+        'net_total': 'net_salary_centavos',
+    }
+    totals = {}
+    for name, field in sums.items():
+        total = sum(getattr(payroll, field) for payroll in payrolls)
+        totals[name] = format_centavos(total)
+        totals[f'{name}_centavos'] = total
+    return totals
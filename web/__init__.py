@@ -0,0 +1,53 @@
+"""
+The web application, built by create_app().
+
+Routes live in four blueprints, registered without URL prefixes so every
+address is unchanged; endpoints are named after their blueprint
+(url_for('admin.employee_list')):
+
+    auth          home page, login, registration, logout
+    admin         dashboard, employees, leave, users, loans, attendance,
+                  payroll processing, the what-if simulator
+    self_service  the employee's own dashboard, payslips and leave
+    reports       CSV, PDF, bank file and remittance downloads
+    api           the versioned JSON API for integrations, under /api/v1
+
+Importing the application loads only Flask and the database layer. ReportLab
+(payslip PDFs) and NumPy (the simulator and the columnar payslip store) are
+imported by the views that need them, on their first request, so workers and
+scripts that never render a PDF or run a simulation don't pay for them;
+test_startup.py holds app.py's import time to a budget.
+"""
+import os
+
+from flask import Flask
+
+from services import compression
+from web import admin, api, auth, common, reports, self_service
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_app(config=None):
+    """Builds and configures the Flask application; `config` overrides the defaults."""
+    app = Flask(__name__, root_path=APP_ROOT)
+    app.config['SECRET_KEY'] = 'your_secret_key_here'  # Change this to a random secret key
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
+    app.config['TIME_INGEST_GROUP_COMMIT'] = True  # False writes each posted record in its own transaction
+    app.config['TAX_MODE'] = 'period'  # 'annualized' withholds against year-to-date totals (utils.TAX_MODES)
+    if config:
+        app.config.update(config)
+
+    compression.init_app(app)
+    common.login_manager.init_app(app)
+    for name, template_filter in common.TEMPLATE_FILTERS.items():
+        app.add_template_filter(template_filter, name)
+    app.before_request(common.set_audit_actor)
+    app.after_request(common.cache_hashed_photos)
+
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(admin.bp)
+    app.register_blueprint(self_service.bp)
+    app.register_blueprint(reports.bp)
+    app.register_blueprint(api.bp)
+    return app
@@ -0,0 +1,474 @@
+"""
+HR routes: the dashboard, employees, leave, user accounts, loans and
+attendance, payroll processing and the what-if simulator.
+
+The simulator and the columnar payslip store need NumPy; they are imported
+by their views on first use rather than with the app.
+"""
+from datetime import date
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
+
+import models
+from utils import calculate_payroll, calculate_payroll_by_employee, get_payroll_totals
+from money import format_centavos, div_round
+from services import http_cache, leave_accrual, pay_periods, photos, time_ingest
+from web.common import PAYROLL_TABLES, allowed_file, stream_page
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/leave')
+@login_required
+@http_cache.conditional('leave_requests', 'leave_ledger', 'employees')
+def manage_leave():
+    if not current_user.is_admin:
+        flash('You do not have permission to view this page.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    # Requests come with the employee's name and current balance for that leave type;
+    # rows stream from the cursor as the tables render
+    return stream_page('manage_leave.html',
+                       pending_count=models.count_leave_requests('Pending'),
+                       approved_count=models.count_leave_requests('Approved'),
+                       pending_requests=models.iter_leave_requests_with_balances('Pending'),
+                       approved_requests=models.iter_leave_requests_with_balances('Approved'))
+
+#Leave status update route
+@bp.route('/leave/update/<int:leave_id>', methods=['POST'])
+@login_required
+def update_leave_status(leave_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    new_status = request.form.get('status')
+    if new_status in ['Approved', 'Rejected']:
+        models.update_leave_status(leave_id, new_status)
+        flash(f'Leave request {new_status.lower()}!', 'success')
+    else:
+        flash('Invalid status.', 'danger')
+
+    return redirect(url_for('admin.manage_leave'))
+
+# --- Main Application Routes ---
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.is_admin:
+        # Admin: Go to admin dashboard
+        period = pay_periods.company_period()
+
+        # All figures from one consistent snapshot, never a half-processed payroll run
+        with models.snapshot() as snapshot:
+            employees_rows = models.get_employees()
+            totals = get_payroll_totals(employees_rows, period.start_date, period.end_date,
+                                        tax_mode=current_app.config['TAX_MODE'])
+        average_salary = div_round(totals['total_salary_centavos'], len(employees_rows)) if employees_rows else 0
+
+        return render_template('dashboard.html',
+                               total_employees=len(employees_rows),
+                               total_salary=totals['total_salary'],
+                               average_salary=format_centavos(average_salary),
+                               employees=employees_rows,
+                               snapshot_time=snapshot.taken_at)
+    else:
+        # Not Admin: Go to employee dashboard
+        return redirect(url_for('self_service.employee_dashboard'))
+
+# --- User Management Route ---
+@bp.route('/users', methods=['GET', 'POST'])
+@login_required
+@http_cache.conditional('users', 'employees')
+def manage_users():
+    if not current_user.is_admin:
+        flash('You do not have permission to view this page.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    if request.method == 'POST':
+        user_id = request.form.get('user_id')
+        employee_id = request.form.get('employee_id')
+        is_admin = 1 if request.form.get('is_admin') else 0
+
+        # Handle "Not Linked"
+        if not employee_id:
+            employee_id = None
+
+        try:
+            models.update_user_links(user_id, employee_id, is_admin)
+            flash('User updated successfully!', 'success')
+        except Exception as e:
+            flash(f'Error updating user: {e}', 'danger')
+
+        return redirect(url_for('admin.manage_users'))
+
+    # GET Request: Show the page
+    # Users stream from the cursor; every row's dropdown reuses the same employee list
+    employees = models.get_employee_choices() # Get all, even inactive
+    return stream_page('manage_users.html', user_count=models.count_users(),
+                       users=models.iter_users(), employees=employees)
+
+# --- Employee Routes ---
+
+@bp.route('/employees')
+@login_required
+@http_cache.conditional(*PAYROLL_TABLES)
+def employee_list():
+    period = pay_periods.company_period()
+
+    # Get all payroll data in one batch, keyed by employee id. The summary needs
+    # every result before the first row; the employee records themselves are
+    # streamed from the cursor after it.
+    payrolls = calculate_payroll_by_employee(period.start_date, period.end_date,
+                                             tax_mode=current_app.config['TAX_MODE'])
+    totals = get_payroll_totals(None, period.start_date, period.end_date, payrolls=payrolls.values())
+
+    return stream_page('employee_list.html',
+                       employees=models.iter_employees(),
+                       payrolls=payrolls,
+                       total_employees=len(payrolls),
+                       **totals) # Unpack all totals
+
+@bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_employee_route():
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    if request.method == 'POST':
+        # Get all form data from the updated template
+        name = request.form['name']
+        position = request.form['position']
+        department = request.form['department']
+        date_hired = request.form['date_hired']
+        salary = request.form['salary']
+        hourly_rate = request.form.get('hourly_rate') or 0.0
+        payroll_period = request.form['payroll_period']
+
+        contact_number = request.form.get('contact_number')
+        address = request.form.get('address')
+        bank_account_number = request.form.get('bank_account_number')
+        tin_number = request.form.get('tin_number')
+        sss_number = request.form.get('sss_number')
+        philhealth_number = request.form.get('philhealth_number')
+        pagibig_number = request.form.get('pagibig_number')
+
+        photo = request.files.get('photo')
+        photo_filename = 'default.png'
+        if photo and allowed_file(photo.filename):
+            photo_filename = photos.save_upload(photo, current_app.config['UPLOAD_FOLDER'])
+
+        # Call the new add_employee function from models.py
+        models.add_employee(
+            name, position, department, salary, payroll_period, date_hired,
+            photo_filename, hourly_rate, contact_number, address,
+            bank_account_number, sss_number, philhealth_number, pagibig_number, tin_number
+        )
+
+        flash('Employee added successfully!', 'success')
+        return redirect(url_for('admin.employee_list'))
+
+    return render_template('add_employee.html',
+                           current_date=date.today().isoformat())
+
+@bp.route('/edit/<int:employee_id>', methods=['GET', 'POST'])
+@login_required
+def edit_employee(employee_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    employee = models.get_employee_by_id(employee_id)
+    if not employee:
+        flash('Employee not found.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    if request.method == 'POST':
+        # Get all form data from the updated template
+        name = request.form['name']
+        position = request.form['position']
+        department = request.form['department']
+        date_hired = request.form['date_hired']
+        salary = request.form['salary']
+        hourly_rate = request.form.get('hourly_rate') or 0.0
+        payroll_period = request.form['payroll_period']
+
+        contact_number = request.form.get('contact_number')
+        address = request.form.get('address')
+        bank_account_number = request.form.get('bank_account_number')
+        tin_number = request.form.get('tin_number')
+        sss_number = request.form.get('sss_number')
+        philhealth_number = request.form.get('philhealth_number')
+        pagibig_number = request.form.get('pagibig_number')
+
+        photo_filename = employee.photo
+        photo = request.files.get('photo')
+        if photo and allowed_file(photo.filename):
+            photo_filename = photos.save_upload(photo, current_app.config['UPLOAD_FOLDER'])
+
+        # Call the new update_employee function
+        models.update_employee(
+            employee_id, name, position, department, salary, payroll_period, date_hired,
+            photo_filename, hourly_rate, contact_number, address,
+            bank_account_number, sss_number, philhealth_number, pagibig_number, tin_number
+        )
+
+        flash('Employee updated successfully!', 'success')
+        return redirect(url_for('admin.employee_list'))
+
+    # For GET request, pass the employee data to the template
+    return render_template('edit_employee.html', employee=employee)
+
+@bp.route('/delete/<int:emp_id>', methods=['POST'])
+@login_required
+def delete_employee_route(emp_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    # Use the new archive_employee function
+    models.archive_employee(emp_id)
+    flash('Employee archived successfully.', 'success')
+    return redirect(url_for('admin.employee_list'))
+
+@bp.route('/payroll/<int:emp_id>')
+@login_required
+@http_cache.conditional(*PAYROLL_TABLES)
+def view_payroll(emp_id):
+    employee = models.get_employee_by_id(emp_id)
+    if not employee:
+        flash('Employee not found.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    # The employee's current pay period, by their pay frequency
+    period = pay_periods.current_period(employee.payroll_period)
+
+    # We now pass the full employee record and date range
+    payroll_data = calculate_payroll(employee, period.start_date, period.end_date,
+                                     tax_mode=current_app.config['TAX_MODE'])
+
+    return render_template('payroll.html', employee=employee, payroll=payroll_data,
+                           pay_period_start=period.start_date,
+                           pay_period_end=period.end_date,
+                           ytd=models.get_ytd(employee.id, period.end.year))
+#Loan Management Route
+@bp.route('/loans/<int:emp_id>', methods=['GET', 'POST'])
+@login_required
+def manage_loans(emp_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    employee = models.get_employee_by_id(emp_id)
+    if not employee:
+        flash('Employee not found.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    if request.method == 'POST':
+        # Add a new loan
+        loan_name = request.form.get('loan_name')
+        total_amount = request.form.get('total_amount')
+        monthly_deduction = request.form.get('monthly_deduction')
+
+        if not total_amount or not monthly_deduction:
+            flash('All loan fields are required.', 'danger')
+        else:
+            try:
+                models.add_loan(emp_id, loan_name, float(total_amount), float(monthly_deduction))
+                flash('Loan added successfully!', 'success')
+            except Exception as e:
+                flash(f'Error adding loan: {e}', 'danger')
+
+        return redirect(url_for('admin.manage_loans', emp_id=emp_id))
+
+    # GET Request: Show the page
+    active_loans = models.get_active_loans(emp_id)
+    payments = models.get_loan_payments(emp_id)
+    return render_template('manage_loans.html', employee=employee, loans=active_loans, payments=payments)
+
+#Attendance Management Route
+@bp.route('/attendance/<int:emp_id>', methods=['GET', 'POST'])
+@login_required
+def manage_attendance(emp_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    employee = models.get_employee_by_id(emp_id)
+    if not employee:
+        flash('Employee not found.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    if request.method == 'POST':
+        record_date = request.form.get('date')
+        hours_worked = request.form.get('hours_worked')
+        overtime_hours = request.form.get('overtime_hours')
+
+        if not record_date or not hours_worked:
+            flash('Date and Hours Worked are required.', 'danger')
+        else:
+            try:
+                models.add_time_record(emp_id, record_date, float(hours_worked), float(overtime_hours or 0))
+                flash('Time record added successfully!', 'success')
+            except Exception as e:
+                flash(f'Error adding time record: {e}', 'danger')
+
+        return redirect(url_for('admin.manage_attendance', emp_id=emp_id))
+
+    # GET Request: Show the page
+    # Fetch recent time records
+    # For now, we just get all. A real app might paginate or limit by date.
+    time_records = models.get_time_records(emp_id, '1900-01-01', '2100-01-01')
+
+    return render_template('manage_attendance.html',
+                           employee=employee,
+                           time_records=time_records[-30:], # Show last 30
+                           current_date=date.today().isoformat())
+
+@bp.route('/attendance/ingest', methods=['POST'])
+@login_required
+def ingest_time_record():
+    """
+    JSON endpoint for clock-in terminals: POST one time record, get 201 once
+    it is committed. Concurrent posts are written together by the
+    group-commit writer (services/time_ingest.py). A record still queued when
+    the wait times out gets 202: it will be written, so the terminal must not
+    post it again. 503 means it was not saved.
+    """
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required.'}), 403
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        employee_id = int(payload['employee_id'])
+        record_date = date.fromisoformat(payload['date']).isoformat()
+        hours_worked = float(payload['hours_worked'])
+        overtime_hours = float(payload.get('overtime_hours') or 0)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'employee_id, date (YYYY-MM-DD) and hours_worked are required.'}), 400
+    if hours_worked < 0 or overtime_hours < 0:
+        return jsonify({'error': 'Hours cannot be negative.'}), 400
+
+    try:
+        if current_app.config['TIME_INGEST_GROUP_COMMIT']:
+            record_id = time_ingest.get_writer().add(employee_id, record_date, hours_worked, overtime_hours)
+        else:
+            record_id = models.add_time_record(employee_id, record_date, hours_worked, overtime_hours)
+    except TimeoutError:
+        return jsonify({'status': 'queued'}), 202
+    except Exception as e:
+        return jsonify({'error': f'Error saving time record: {e}'}), 503
+    return jsonify({'id': record_id, 'status': 'committed'}), 201
+
+def _update_payslip_store(period_start, period_end):
+    """Adds a processed period to the columnar history; the payslips are already saved, so a failure only logs."""
+    from services import payslip_store
+    if not payslip_store.numpy_available():
+        return
+    try:
+        payslip_store.sync(period_start, period_end)
+    except Exception:
+        current_app.logger.exception('Could not update the payslip store; run python -m services.payslip_store sync')
+
+#Payroll Processing Route
+@bp.route('/payroll/process', methods=['POST'])
+@login_required
+def process_payroll():
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    try:
+        # One batch per pay frequency, each for its current period: every batch saves its
+        # payslips and settles its loans in one transaction
+        runs = pay_periods.run_payroll(tax_mode=current_app.config['TAX_MODE'],
+                                       leave_accruals=leave_accrual.MONTHLY_ENTITLEMENTS)
+        for run in runs:
+            period = f'{run.period.frequency}, {run.period.start_date} to {run.period.end_date}'
+            if run.payslips_created:
+                flash(f'Payroll processed successfully for {run.payslips_created} employees! ({period})', 'success')
+                _update_payslip_store(run.period.start_date, run.period.end_date)
+            else:
+                flash(f'Payroll for this period has already been processed. ({period})', 'danger')
+    except Exception as e:
+        flash(f'An error occurred: {e}', 'danger')
+
+    return redirect(url_for('admin.dashboard'))
+
+# --- What-If Simulator Routes ---
+
+def _scenario_from(values, parameters):
+    """Builds a simulator scenario from submitted values, skipping blanks."""
+    scenario = {}
+    for key in parameters:
+        value = values.get(key)
+        if value is None or value == '':
+            continue
+        try:
+            scenario[key] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid value for {key}: {value!r}')
+    return scenario
+
+@bp.route('/simulator', methods=['GET', 'POST'])
+@login_required
+def payroll_simulator():
+    from services import simulator
+    if not current_user.is_admin:
+        flash('You do not have permission to view this page.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    if not simulator.numpy_available():
+        flash('The payroll simulator requires NumPy. Please install it on the server.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    period = pay_periods.company_period()
+
+    scenario = {}
+    if request.method == 'POST':
+        try:
+            scenario = _scenario_from(request.form, simulator.SCENARIO_DEFAULTS)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.payroll_simulator'))
+
+    roster = simulator.load_roster(period.start_date, period.end_date)
+    comparison = simulator.compare(roster, scenario)
+    params = dict(simulator.SCENARIO_DEFAULTS)
+    params.update(scenario)
+
+    return render_template('simulator.html',
+                           comparison=comparison,
+                           params=params,
+                           pay_period_start=period.start_date,
+                           pay_period_end=period.end_date)
+
+@bp.route('/simulator/run', methods=['POST'])
+@login_required
+def run_simulation():
+    """JSON version of the simulator: POST a scenario object, get the department breakdown."""
+    from services import simulator
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required.'}), 403
+    if not simulator.numpy_available():
+        return jsonify({'error': 'The payroll simulator requires NumPy.'}), 501
+
+    payload = request.get_json(silent=True) or {}
+    unknown = set(payload) - set(simulator.SCENARIO_DEFAULTS) - {'pay_period_start', 'pay_period_end'}
+    if unknown:
+        return jsonify({'error': f'Unknown scenario parameters: {", ".join(sorted(unknown))}'}), 400
+    try:
+        scenario = _scenario_from(payload, simulator.SCENARIO_DEFAULTS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    period = pay_periods.company_period()
+    period_start = payload.get('pay_period_start', period.start_date)
+    period_end = payload.get('pay_period_end', period.end_date)
+
+    roster = simulator.load_roster(period_start, period_end)
+    result = simulator.compare(roster, scenario)
+    result.update({'pay_period_start': period_start, 'pay_period_end': period_end,
+                   'scenario': scenario, 'unit': 'centavos'})
+    return jsonify(result)
@@ -0,0 +1,253 @@
+"""
+Versioned JSON API for integrations (time clocks, HRIS, BI), under /api/v1.
+
+    GET  /api/v1/employees           ?ids=  &include_archived=1
+    GET  /api/v1/time-records        ?employee_ids=  &start=  &end=
+    POST /api/v1/time-records        a JSON array of records, written in one transaction
+    GET  /api/v1/payslips            ?ids=  &employee_ids=  &start=  &end=  (by pay_period_end)
+    GET  /api/v1/leave-requests      ?ids=  &employee_ids=  &status=
+
+Every list takes ?fields=a,b (any of models.API_FIELDS for the resource;
+default all) and ?limit= (up to MAX_LIMIT), and answers
+{"data": [...], "next_cursor": ...}; pass next_cursor back as ?cursor= for
+the next page until it is null. Pages are keyset reads, so the thousandth
+page costs what the first does. ?ids= fetches up to MAX_LIMIT records in
+one call and also lists the ids it did not find under "missing".
+
+Reads are plain rows: payslip amounts in integer centavos, hours as stored.
+Nothing is computed per employee, so one call replaces the page loads that
+recompute payroll. GET responses carry ETags (http_cache.conditional), so a
+poller that sends If-None-Match gets 304 until the tables change.
+
+Integrations sign in as an admin user through POST /login and send the
+session cookie, as the clock-in terminals do for /attendance/ingest.
+Errors are {"error": message}, with per-record "errors" for bulk writes.
+"""
+import base64
+import functools
+import json
+from datetime import date
+
+from flask import Blueprint, Response, request
+from flask_login import current_user
+
+import models
+from services import http_cache
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is the fallback
+    orjson = None
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_BULK_RECORDS = 5000  # time records per POST
+LEAVE_STATUSES = ('Pending', 'Approved', 'Rejected')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+@bp.errorhandler(ApiError)
+def api_error(e):
+    return json_response({'error': str(e), **e.extra}, e.status)
+
+
+def json_response(payload, status=200):
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def admin_required(view):
+    """login_required for the API: answers 401/403 as JSON rather than redirecting to the login page."""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            raise ApiError('Authentication required; sign in through POST /login.', 401)
+        if not current_user.is_admin:
+            raise ApiError('Admin access required.', 403)
+        return view(*args, **kwargs)
+    return wrapped
+
+
+# --- Query parameters ---
+
+def _fields(resource):
+    allowed = models.API_FIELDS[resource]
+    requested = request.args.get('fields')
+    if not requested:
+        return allowed
+    fields = tuple(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields:
+        raise ApiError(f'Unknown fields: {", ".join(unknown) or requested!r}; choose from {", ".join(allowed)}')
+    return fields
+
+
+def _id_list(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ApiError(f'{name} must be a comma-separated list of integers')
+    if not ids or len(ids) > MAX_LIMIT:
+        raise ApiError(f'{name} takes 1 to {MAX_LIMIT} ids')
+    return ids
+
+
+def _date(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ApiError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def _limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """The key a cursor from encode_cursor carries, or None for no cursor."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError('Invalid cursor')
+    if not isinstance(key, list) or len(key) != size:
+        raise ApiError('Invalid cursor')
+    return key
+
+
+def _page(read, key_size, fields, limit, **filters):
+    """Runs a models.get_*_page reader and wraps its rows as {"data", "next_cursor"}."""
+    after = decode_cursor(request.args.get('cursor'), key_size)
+    rows = read(fields, after=after, limit=limit + 1, **filters)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {'data': [dict(zip(fields, row[key_size:])) for row in rows],
+            'next_cursor': encode_cursor(rows[-1][:key_size]) if more else None}
+
+
+def _bulk_fetch(read, resource, **filters):
+    """A page of the records named by ?ids=, or a normal page without it; `read` takes ids=."""
+    fields = _fields(resource)
+    ids = _id_list('ids')
+    if ids is None:
+        return _page(read, 1, fields, _limit(), **filters)
+    rows = read(fields, ids=ids, limit=len(ids), **filters)
+    found = {row[0] for row in rows}
+    return {'data': [dict(zip(fields, row[1:])) for row in rows], 'next_cursor': None,
+            'missing': [record_id for record_id in dict.fromkeys(ids) if record_id not in found]}
+
+
+# --- Reads ---
+
+@bp.route('/employees')
+@admin_required
+@http_cache.conditional('employees')
+def employees():
+    return json_response(_bulk_fetch(models.get_employees_page, 'employees',
+                                     include_archived=request.args.get('include_archived') == '1'))
+
+
+@bp.route('/payslips')
+@admin_required
+@http_cache.conditional('payslips')
+def payslips():
+    return json_response(_bulk_fetch(models.get_payslips_page, 'payslips', employee_ids=_id_list('employee_ids'),
+                                     start=_date('start'), end=_date('end')))
+
+
+@bp.route('/leave-requests')
+@admin_required
+@http_cache.conditional('leave_requests')
+def leave_requests():
+    status = request.args.get('status')
+    if status is not None and status not in LEAVE_STATUSES:
+        raise ApiError(f'status must be one of {", ".join(LEAVE_STATUSES)}')
+    return json_response(_bulk_fetch(models.get_leave_requests_page, 'leave_requests',
+                                     employee_ids=_id_list('employee_ids'), status=status))
+
+
+@bp.route('/time-records', methods=['GET'])
+@admin_required
+@http_cache.conditional('time_records')  # compaction and archiving delete from it too
+def time_records():
+    return json_response(_page(models.get_time_records_page, 3, _fields('time_records'), _limit(),
+                               employee_ids=_id_list('employee_ids'), start=_date('start'), end=_date('end')))
+
+
+# --- Writes ---
+
+def _time_record(record):
+    """(employee_id, date, hours_worked, overtime_hours) from one posted object, as /attendance/ingest reads it."""
+    if not isinstance(record, dict):
+        raise ValueError('must be an object')
+    try:
+        values = (int(record['employee_id']), date.fromisoformat(record['date']).isoformat(),
+                  float(record['hours_worked']), float(record.get('overtime_hours') or 0))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('employee_id, date (YYYY-MM-DD) and hours_worked are required')
+    if values[2] < 0 or values[3] < 0:
+        raise ValueError('hours cannot be negative')
+    return values
+
+
+@bp.route('/time-records', methods=['POST'])
+@admin_required
+def add_time_records():
+    """
+    Takes a JSON array of time records and writes all of them in one
+    transaction, or none: any invalid record (or unknown employee) answers
+    400 with every problem listed by index. Answers 201 with the new ids,
+    in the order posted.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        raise ApiError('Post a non-empty JSON array of time records.')
+    if len(payload) > MAX_BULK_RECORDS:
+        raise ApiError(f'At most {MAX_BULK_RECORDS} time records per request.', 413)
+
+    records, errors = [], []
+    for index, record in enumerate(payload):
+        try:
+            records.append(_time_record(record))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if not errors:
+        existing = models.get_existing_employee_ids({record[0] for record in records})
+        errors = [{'index': index, 'error': f'no employee with id {record[0]}'}
+                  for index, record in enumerate(records) if record[0] not in existing]
+    if errors:
+        raise ApiError(f'{len(errors)} invalid time records; nothing was saved.', errors=errors)
+
+    try:
+        ids = models.add_time_records(records)
+    except Exception as e:
+        raise ApiError(f'Error saving time records: {e}', 503)
+    return json_response({'created': len(ids), 'ids': list(ids)}, 201)
@@ -0,0 +1,65 @@
+"""Public & auth routes: the home page, login, registration and logout."""
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, login_required, logout_user, current_user
+from werkzeug.security import check_password_hash
+
+import models
+from web.common import User
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/')
+def home():
+    return render_template('home.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('admin.dashboard'))
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        user_row = models.get_user_by_username(username)
+
+        if user_row and check_password_hash(user_row['password_hash'], password):
+            user_obj = User(user_row)
+            login_user(user_obj)
+            return redirect(url_for('admin.dashboard'))
+        else:
+            flash('Invalid username or password.', 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('admin.dashboard'))
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+
+        if password != confirm_password:
+            flash('Passwords do not match.', 'danger')
+            return redirect(url_for('auth.register'))
+
+        existing_user = models.get_user_by_username(username)
+        if existing_user:
+            flash('Username already exists.', 'danger')
+            return redirect(url_for('auth.register'))
+
+        # Create a new user (default is not admin and no employee_id)
+        models.create_user(username, password)
+
+        flash('Account created successfully! Please log in.', 'success')
+        return redirect(url_for('auth.login'))
+
+    return render_template('register.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out.', 'success')
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,97 @@
+"""
+What every blueprint shares: the Flask-Login user, the template filters,
+the request hooks and the streaming page helper. create_app() wires these
+into the application.
+"""
+from flask import Response, get_flashed_messages, request, stream_template, url_for
+from flask_login import LoginManager, UserMixin, current_user
+
+import models
+from money import format_centavos
+from services import leave_accrual, photos
+
+# Tables a payroll calculation reads (see http_cache.conditional); payslips feed the YTD totals
+PAYROLL_TABLES = ('employees', 'time_records', 'loans', 'leave_requests', 'payslips')
+
+# --- Login Manager Setup ---
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message_category = 'danger'
+
+# This is a simple User class for Flask-Login to use
+class User(UserMixin):
+    def __init__(self, user_row):
+        self.id = user_row['id']
+        self.username = user_row['username']
+        self.is_admin = bool(user_row['is_admin'])
+        self.employee_id = user_row['employee_id']
+
+@login_manager.user_loader
+def load_user(user_id):
+    user_row = models.get_user_by_id(user_id)
+    if user_row:
+        return User(user_row)
+    return None
+
+# --- Template Filters ---
+
+def centavos_filter(value):
+    """Formats an integer centavo amount for display, e.g. 123456 -> '1,234.56'."""
+    return format_centavos(value or 0)
+
+def leave_days_filter(value):
+    return leave_accrual.format_days(value)
+
+def photo_url_filter(photo, size=None):
+    """URL of an employee photo at a THUMBNAIL_SIZES size, e.g. {{ employee.photo|photo_url('sm') }}."""
+    return url_for('static', filename=photos.photo_path(photo, size))
+
+TEMPLATE_FILTERS = {'centavos': centavos_filter, 'leave_days': leave_days_filter, 'photo_url': photo_url_filter}
+
+# --- Helper Functions ---
+
+STREAM_CHUNK_SIZE = 16 * 1024  # characters per chunk written by stream_page
+
+def stream_page(template_name, **context):
+    """
+    Renders a template with stream_template, so the page head and summary go
+    out in the first chunk while table rows are still being read from their
+    cursors. Pass row generators (models.iter_*) rather than lists.
+
+    Flashed messages are popped here, before the first byte: the session
+    cookie is sent with the headers, so the template can't change it later.
+    """
+    get_flashed_messages()  # cached on the request; base.html reads the cache
+    return Response(_join_chunks(stream_template(template_name, **context)))
+
+def _join_chunks(chunks, size=STREAM_CHUNK_SIZE):
+    """Groups Jinja's many small output strings into chunks of about `size` characters."""
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
+
+# --- Request Hooks ---
+
+def set_audit_actor():
+    """Audit entries written while handling the request name the logged-in user."""
+    if request.endpoint != 'static':  # loading the user costs a query; static files change nothing
+        models.set_audit_actor(current_user.username if current_user.is_authenticated else None)
+
+def cache_hashed_photos(response):
+    """Hashed photos and thumbnails never change under the same name, so browsers may keep them."""
+    if request.endpoint == 'static' and photos.is_hashed((request.view_args or {}).get('filename')):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = photos.CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
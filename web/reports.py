@@ -0,0 +1,175 @@
+"""Reports: payroll cost pivots and the downloads (payroll CSV, payslip PDFs, bank credit files, remittance reports)."""
+import csv
+import io
+from datetime import date
+
+from flask import Blueprint, current_app, request, redirect, url_for, flash, make_response, render_template, Response
+from flask_login import login_required, current_user
+
+import models
+from utils import calculate_payroll, calculate_payroll_batch
+from services import bank_files, cost_reports, http_cache, pay_periods, remittances
+from web.common import PAYROLL_TABLES
+
+bp = Blueprint('reports', __name__)
+
+@bp.route('/reports')
+@login_required
+@http_cache.conditional('payslips', 'employees')
+def cost_report():
+    if not current_user.is_admin:
+        flash('You do not have permission to view this page.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    default_start, default_end = cost_reports.default_range()
+    by = request.args.get('by', 'department')
+    metric = request.args.get('metric', cost_reports.DEFAULT_METRIC)
+    start = request.args.get('start') or default_start
+    end = request.args.get('end') or default_end
+    # Closed months come from the payroll_costs cache; only the open month is rebuilt
+    try:
+        report = cost_reports.pivot(by, start, end, metric)
+    except ValueError as e:
+        flash(f'Invalid report: {e}', 'danger')
+        by, metric, start, end = 'department', cost_reports.DEFAULT_METRIC, default_start, default_end
+        report = cost_reports.pivot(by, start, end, metric)
+
+    return render_template('cost_report.html', report=report, by=by, metric=metric, start=start, end=end,
+                           dimensions=cost_reports.DIMENSIONS, metrics=cost_reports.METRICS,
+                           metric_label=cost_reports.metric_label, agencies=remittances.AGENCIES,
+                           formats=remittances.FORMATS)
+
+@bp.route('/export/csv')
+@login_required
+@http_cache.conditional(*PAYROLL_TABLES)
+def export_payroll_csv():
+    # Prepare data for CSV
+    data = []
+    headers = [
+        'ID', 'Name', 'Position', 'Department', 'Base Salary',
+        'SSS', 'PhilHealth', 'Pag-IBIG', 'Total Deductions', 'Net Pay'
+    ]
+    data.append(headers)
+
+    period = pay_periods.company_period()
+
+    # Employees and their payroll inputs are read from one consistent snapshot
+    with models.snapshot() as snapshot:
+        employees_rows = models.get_employees()
+        payrolls = calculate_payroll_batch(employees_rows, period.start_date, period.end_date,
+                                           tax_mode=current_app.config['TAX_MODE'])
+    for emp, payroll in zip(employees_rows, payrolls):
+        data.append([
+            emp.id,
+            emp.name,
+            emp.position,
+            emp.department,
+            emp.salary,
+            # Amounts are exact centavos, written with two decimals and no separators
+            f"{payroll.sss:.2f}",
+            f"{payroll.philhealth:.2f}",
+            f"{payroll.pagibig:.2f}",
+            f"{payroll.total_deductions:.2f}",
+            f"{payroll.net_salary:.2f}"
+        ])
+
+    # Create CSV in memory
+    si = io.StringIO()
+    cw = csv.writer(si)
+    cw.writerows(data)
+
+    output = make_response(si.getvalue())
+    output.headers["Content-Disposition"] = "attachment; filename=payroll_report.csv"
+    output.headers["Content-type"] = "text/csv"
+    # Only in a header: the body is a plain table, and its ETag stands for the data alone
+    output.headers["X-Snapshot-Time"] = snapshot.taken_at
+    return output
+
+@bp.route('/download/pdf/<int:emp_id>')
+@login_required
+@http_cache.conditional(*PAYROLL_TABLES)
+def download_payroll_pdf(emp_id):
+    # ReportLab is loaded by the first PDF request, not at startup
+    from services.pdf_generator import generate_pdf_from_html
+
+    employee = models.get_employee_by_id(emp_id)
+    if not employee:
+        flash('Employee not found.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    # The employee's current pay period, by their pay frequency
+    period = pay_periods.current_period(employee.payroll_period)
+
+    payroll_data = calculate_payroll(employee, period.start_date, period.end_date,
+                                     tax_mode=current_app.config['TAX_MODE'])
+
+    # Generate PDF using the ReportLab function and the calculated data
+    pdf_file = generate_pdf_from_html(employee, payroll_data, period.start_date, period.end_date)
+
+    if pdf_file:
+        response = make_response(pdf_file)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Disposition'] = f'attachment; filename=payslip_{employee.name}.pdf'
+        return response
+    else:
+        flash('Error generating PDF. Check server logs for details (Ensure ReportLab dependencies are met).', 'danger')
+        return redirect(url_for('admin.view_payroll', emp_id=emp_id))
+
+@bp.route('/payroll/bank-file')
+@login_required
+@http_cache.conditional('payslips', 'employees')
+def download_bank_file():
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    period = pay_periods.company_period()
+
+    bank_format = request.args.get('format', 'fixed')
+    period_start = request.args.get('start', period.start_date)
+    period_end = request.args.get('end', period.end_date)
+    try:
+        date.fromisoformat(period_start)
+        date.fromisoformat(period_end)
+    except ValueError:
+        flash('Invalid pay period dates.', 'danger')
+        return redirect(url_for('admin.employee_list'))
+    if bank_format not in bank_files.FORMATS:
+        flash(f'Unknown bank file format: {bank_format}', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    # Checked in full first: once the streamed 200 has started, an error can only cut the file short
+    try:
+        bank_files.validate(bank_format, period_start, period_end)
+    except ValueError as e:
+        flash(f'Cannot build the bank file: {e}', 'danger')
+        return redirect(url_for('admin.employee_list'))
+
+    # Streamed straight from the payslips cursor; nothing is built in memory
+    file_format = bank_files.FORMATS[bank_format]
+    response = Response(bank_files.generate(bank_format, period_start, period_end),
+                        mimetype=file_format.mimetype)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename=bank_credits_{period_start}_{period_end}.{file_format.extension}')
+    return response
+
+@bp.route('/reports/remittances/<agency>/<month>.<fmt>')
+@login_required
+@http_cache.conditional('payslips', 'employees')
+def download_remittance_report(agency, month, fmt):
+    if not current_user.is_admin:
+        flash('You do not have permission to perform this action.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    try:
+        remittances.month_bounds(month)
+    except ValueError:
+        flash('Invalid month; use YYYY-MM.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    if agency not in remittances.AGENCIES or fmt not in remittances.FORMATS:
+        flash('Unknown remittance report.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    # Closed months come from the report cache; the current month is built as it streams
+    response = Response(remittances.report(agency, month, fmt), mimetype=remittances.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={remittances.filename(agency, month, fmt)}'
+    return response
@@ -0,0 +1,91 @@
+"""Employee-facing routes: a linked employee's own dashboard, payslips and leave."""
+from datetime import date
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+import models
+from utils import calculate_payroll
+from services import leave_accrual, pay_periods
+
+bp = Blueprint('self_service', __name__)
+
+@bp.route('/my-dashboard')
+@login_required
+def employee_dashboard():
+    if current_user.is_admin:
+        # Admins should be at the admin dashboard
+        return redirect(url_for('admin.dashboard'))
+
+    if not current_user.employee_id:
+        flash('Your user account is not linked to an employee profile. Please contact admin.', 'danger')
+        return redirect(url_for('auth.logout'))
+
+    employee = models.get_employee_by_id(current_user.employee_id)
+    if not employee:
+        flash('Employee profile not found. Please contact admin.', 'danger')
+        return redirect(url_for('auth.logout'))
+
+    return render_template('employee_dashboard.html', employee_data=employee)
+
+@bp.route('/my-payslips')
+@login_required
+def employee_payslips():
+    if current_user.is_admin:
+        return redirect(url_for('admin.dashboard'))
+    if not current_user.employee_id:
+        return redirect(url_for('auth.logout'))
+
+    employee = models.get_employee_by_id(current_user.employee_id)
+
+    # --- Fetch historical payslips ---
+    payslip_history = models.get_payslips_by_employee(current_user.employee_id)
+
+    # --- Calculate Current (Un-processed) Payslip ---
+    # The employee's current pay period, by their pay frequency
+    period = pay_periods.current_period(employee.payroll_period)
+
+    payroll_data = calculate_payroll(employee, period.start_date, period.end_date,
+                                     tax_mode=current_app.config['TAX_MODE'])
+
+    return render_template('employee_payslips.html',
+                           employee_data=employee,
+                           payslip=payroll_data,
+                           pay_period_start=period.start_date,
+                           pay_period_end=period.end_date,
+                           payslip_history=payslip_history, # Pass the history
+                           ytd=models.get_ytd(employee.id, period.end.year))
+
+@bp.route('/my-leave', methods=['GET', 'POST'])
+@login_required
+def employee_leave():
+    if current_user.is_admin:
+        return redirect(url_for('admin.dashboard'))
+    if not current_user.employee_id:
+        return redirect(url_for('auth.logout'))
+
+    employee = models.get_employee_by_id(current_user.employee_id)
+
+    if request.method == 'POST':
+        leave_type = request.form.get('leave_type')
+        start_date = request.form.get('start_date')
+        end_date = request.form.get('end_date')
+        reason = request.form.get('reason')
+
+        if not leave_type or not start_date or not end_date:
+            flash('All fields are required to request leave.', 'danger')
+        else:
+            models.add_leave_request(current_user.employee_id, leave_type, start_date, end_date, reason)
+            flash('Leave request submitted successfully!', 'success')
+
+        return redirect(url_for('self_service.employee_leave'))
+
+    # GET Request: Show the leave form and history
+    my_requests = models.get_leave_requests(employee_id=current_user.employee_id, status=None) # Get all
+    balances = leave_accrual.balances_for(current_user.employee_id)
+
+    return render_template('employee_leave.html',
+                           employee_data=employee,
+                           my_requests=my_requests,
+                           balances=balances,
+                           current_date=date.today().isoformat())